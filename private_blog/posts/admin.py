@@ -1,6 +1,83 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 
-from .models import Comment, Favourite, Message, Post
+from .models import Comment, Conversation, Favourite, Message, Post
+from .tasks import hide_and_delete_posts
+from .utilities import EstimatedCountPaginator
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с текстовым полем вместо списка всех значений:
+    не загружает в боковую панель всех пользователей и все статьи."""
+
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            return queryset.filter(**{self.lookup: value.strip()})
+        except (ValueError, ValidationError):
+            return queryset.none()
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            'query_parts': [
+                (key, value)
+                for key, value in changelist.get_filters_params().items()
+                if key != self.parameter_name
+            ],
+        }
+
+
+class AuthorFilter(InputFilter):
+    title = 'автору (username)'
+    parameter_name = 'author'
+    lookup = 'author__username'
+
+
+class CommentPostFilter(InputFilter):
+    title = 'статье (id)'
+    parameter_name = 'post_id'
+    lookup = 'post_id'
+
+
+class LikerFilter(InputFilter):
+    title = 'пользователю (username)'
+    parameter_name = 'liker'
+    lookup = 'liker__username'
+
+
+class FavouritePostFilter(InputFilter):
+    title = 'статье (id)'
+    parameter_name = 'post_id'
+    lookup = 'favourite_post_id'
+
+
+class InterlocutorFilter(InputFilter):
+    title = 'собеседнику (username)'
+    parameter_name = 'interlocutor'
+    lookup = 'interlocutor__username'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Базовый класс для больших таблиц: без полного COUNT(*)
+    на каждой странице списка."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,9 +94,16 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('title', 'subheader', 'text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = ('delete_in_background',)
+
+    @admin.action(description='Скрыть и удалить в фоне')
+    def delete_in_background(self, request, queryset):
+        """Действие сразу скрывает статьи, а комментарии и лайки удаляет
+        фоновая задача пачками, без загрузки в память."""
+        hide_and_delete_posts(list(queryset))
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     """Класс нужен для вывода на странице админа
     детальной информации по комментариям."""
 
@@ -30,12 +114,14 @@ class CommentAdmin(admin.ModelAdmin):
         'comment_text',
         'created',
     )
-    search_fields = ('text',)
-    list_filter = ('created',)
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('comment_text',)
+    list_filter = ('created', AuthorFilter, CommentPostFilter)
     empty_value_display = '-пусто-'
 
 
-class FavouriteAdmin(admin.ModelAdmin):
+class FavouriteAdmin(LargeTableAdmin):
     """Класс нужен для вывода на странице админа
     детальной информации по лайкам."""
 
@@ -44,11 +130,13 @@ class FavouriteAdmin(admin.ModelAdmin):
         'liker',
         'favourite_post',
     )
-    list_filter = ('liker', 'favourite_post',)
+    list_select_related = ('liker', 'favourite_post')
+    autocomplete_fields = ('liker', 'favourite_post')
+    list_filter = (LikerFilter, FavouritePostFilter)
     empty_value_display = '-пусто-'
 
 
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(LargeTableAdmin):
     """Класс нужен для вывода на странице админа
     детальной информации по сообщениям."""
 
@@ -59,7 +147,28 @@ class MessageAdmin(admin.ModelAdmin):
         'direction',
         'message_text',
     )
-    list_filter = ('interlocutor', 'direction',)
+    list_select_related = ('interlocutor',)
+    autocomplete_fields = ('interlocutor',)
+    search_fields = ('message_text',)
+    list_filter = (InterlocutorFilter, 'direction',)
+    empty_value_display = '-пусто-'
+
+
+class ConversationAdmin(LargeTableAdmin):
+    """Класс нужен для вывода на странице админа
+    сводок по переписке с автором."""
+
+    list_display = (
+        'interlocutor',
+        'message_count',
+        'last_message_time',
+        'last_incoming_time',
+        'unread_by_user',
+        'unread_by_author',
+    )
+    list_select_related = ('interlocutor',)
+    list_filter = (InterlocutorFilter,)
+    readonly_fields = list_display
     empty_value_display = '-пусто-'
 
 
@@ -67,3 +176,4 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Favourite, FavouriteAdmin)
 admin.site.register(Message, MessageAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(Conversation, ConversationAdmin)
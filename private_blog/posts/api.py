@@ -0,0 +1,219 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import (quote_etag, urlsafe_base64_decode,
+                               urlsafe_base64_encode)
+from django.views.decorators.http import require_GET
+
+from private_blog.db_router import replica_reads
+
+from .caching import get_api_cache_key, get_or_compute
+from .models import Comment, Favourite, Post
+
+
+class ApiError(Exception):
+    """Ошибка в параметрах запроса к API (ответ 400)."""
+
+
+def _count_of(queryset, field):
+    return Coalesce(Subquery(
+        queryset.order_by().values(field).annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+# Поля статьи: имя в ответе -> поле для values() или выражение.
+# Счетчики считаются подзапросами только если их запросили.
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'subheader': 'subheader',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'modify_date': 'modify_date',
+    'updated_at': 'updated_at',
+    'image': 'image',
+    'thumbnails': 'thumbnails',
+    'comment_count': _count_of(
+        Comment.objects.filter(post=OuterRef('pk')), 'post'
+    ),
+    'like_count': _count_of(
+        Favourite.objects.filter(favourite_post=OuterRef('pk')),
+        'favourite_post',
+    ),
+}
+POST_DEFAULT_FIELDS = (
+    'id', 'title', 'subheader', 'pub_date', 'comment_count', 'like_count',
+)
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post',
+    'author': 'author__username',
+    'comment_text': 'comment_text',
+    'created': 'created',
+}
+COMMENT_DEFAULT_FIELDS = tuple(COMMENT_FIELDS)
+
+
+def parse_fields(request, allowed, default):
+    """Функция разбирает ?fields=a,b (sparse fieldset). id отдается
+    всегда: по нему строится курсор."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return ['id', *[name for name in default if name != 'id']]
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return ['id', *[name for name in fields if name != 'id']]
+
+
+def parse_limit(request):
+    """Функция разбирает ?limit= с ограничением API_MAX_PAGE_SIZE."""
+    raw = request.GET.get('limit', settings.API_PAGE_SIZE)
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def encode_cursor(pk):
+    return urlsafe_base64_encode(force_bytes(pk))
+
+
+def decode_cursor(request):
+    """Функция возвращает id из непрозрачного ?cursor= или None."""
+    raw = request.GET.get('cursor')
+    if not raw:
+        return None
+    try:
+        return int(force_str(urlsafe_base64_decode(raw)))
+    except (TypeError, ValueError):
+        raise ApiError('Некорректный cursor')
+
+
+def fetch(queryset, fields, expressions):
+    """Функция выбирает только запрошенные поля через values(): модели
+    не создаются, а ненужные счетчики не считаются."""
+    lookups = {
+        name: expressions[name] for name in fields
+        if isinstance(expressions[name], str)
+    }
+    annotations = {
+        name: expressions[name] for name in fields if name not in lookups
+    }
+    rows = list(queryset.values(*lookups.values(), **annotations))
+    for row in rows:
+        for name, lookup in lookups.items():
+            if name != lookup:
+                row[name] = row.pop(lookup)
+    return rows
+
+
+def serialize_posts(rows):
+    for row in rows:
+        if 'image' in row:
+            row['image'] = row['image'] and default_storage.url(row['image'])
+        row['url'] = reverse('post_view', args=[row['id']])
+    return rows
+
+
+def paginate(request, queryset, fields, expressions, descending):
+    """Функция отдает страницу по курсору (keyset по id): глубина
+    страницы не влияет на стоимость запроса, в отличие от OFFSET."""
+    limit = parse_limit(request)
+    cursor = decode_cursor(request)
+    if cursor is not None:
+        queryset = queryset.filter(
+            **{'pk__lt' if descending else 'pk__gt': cursor}
+        )
+    queryset = queryset.order_by('-pk' if descending else 'pk')
+    rows = fetch(queryset[:limit + 1], fields, expressions)
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        query = request.GET.copy()
+        query['cursor'] = encode_cursor(rows[-1]['id'])
+        next_url = f'{request.path}?{query.urlencode()}'
+    return {'results': rows, 'next': next_url}
+
+
+def api_view(func):
+    """Декоратор JSON API: только GET, чтение с реплик, ETag/304 и кеш
+    готового JSON до следующего изменения статей, комментариев или
+    лайков. Ошибки отдаются в JSON и не кешируются. ETag - хеш самого
+    JSON: версии в ключе кеша хранятся в кеше и после его очистки или в
+    другом процессе повторяются, поэтому для ETag не годятся. ETag
+    ставится и сверяется только для успешных ответов, чтобы 400/404 не
+    превращались в 304."""
+    @replica_reads
+    @require_GET
+    @wraps(func)
+    def view(request, **kwargs):
+        try:
+            content = get_or_compute(
+                get_api_cache_key(request),
+                lambda: json.dumps(
+                    func(request, **kwargs),
+                    cls=DjangoJSONEncoder,
+                    ensure_ascii=False,
+                ),
+                settings.API_CACHE_TIMEOUT,
+            )
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Не найдено'}, status=404)
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = quote_etag(
+            hashlib.md5(response.content).hexdigest()
+        )
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response
+        )
+
+    return view
+
+
+@api_view
+def post_list(request):
+    """Список статей, новые первыми."""
+    fields = parse_fields(request, POST_FIELDS, POST_DEFAULT_FIELDS)
+    page = paginate(
+        request, Post.objects.all(), fields, POST_FIELDS, descending=True
+    )
+    serialize_posts(page['results'])
+    return page
+
+
+@api_view
+def post_detail(request, post_id):
+    """Одна статья; по умолчанию со всеми полями."""
+    fields = parse_fields(request, POST_FIELDS, POST_FIELDS)
+    rows = fetch(Post.objects.filter(pk=post_id), fields, POST_FIELDS)
+    if not rows:
+        raise Http404
+    return serialize_posts(rows)[0]
+
+
+@api_view
+def comment_list(request, post_id):
+    """Комментарии к статье в порядке добавления."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    fields = parse_fields(request, COMMENT_FIELDS, COMMENT_DEFAULT_FIELDS)
+    return paginate(
+        request, Comment.objects.filter(post=post_id), fields,
+        COMMENT_FIELDS, descending=False,
+    )
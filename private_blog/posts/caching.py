@@ -0,0 +1,159 @@
+import hashlib
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+INDEX_VERSION_KEY = 'posts:index:version'
+LIKES_VERSION_KEY = 'posts:likes:version'
+# Версия формата записей get_or_compute (входит в ключ кеша): при смене
+# формата достаточно увеличить ее, чтобы записи прежнего кода (версия по
+# умолчанию, 1 - значения без обертки) не читались как новые.
+ENTRY_CACHE_VERSION = 2
+
+
+def get_index_version():
+    """Функция возвращает текущую версию общего кеша главной страницы."""
+    return cache.get_or_set(INDEX_VERSION_KEY, 1, None)
+
+
+def get_likes_version():
+    """Функция возвращает версию счетчиков лайков в ответах API."""
+    return cache.get_or_set(LIKES_VERSION_KEY, 1, None)
+
+
+def _normalize_page(page_number):
+    return int(page_number) if str(page_number).isdigit() else 1
+
+
+def get_index_cache_key(page_number):
+    """Функция возвращает ключ кеша для страницы главной. Номер страницы
+    нормализуется, чтобы произвольные ?page= не плодили ключи."""
+    return f'posts:index:{get_index_version()}:{_normalize_page(page_number)}'
+
+
+def get_index_stale_key(page_number):
+    """Функция возвращает ключ последней отрендеренной версии страницы
+    главной (без версии): ее отдают, пока новая версия рендерится."""
+    return f'posts:index:latest:{_normalize_page(page_number)}'
+
+
+def get_api_cache_key(request):
+    """Функция возвращает ключ кеша ответа JSON API. Версия общая с
+    главной, поэтому API сбрасывается теми же сигналами; лайки меняют
+    только собственную версию API. Параметры запроса сортируются,
+    чтобы их порядок не плодил ключи."""
+    query = sorted(request.GET.lists())
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    versions = f'{get_index_version()}.{get_likes_version()}'
+    return f'posts:api:{versions}:{digest}'
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def invalidate_index_cache():
+    """Функция сбрасывает общий кеш главной страницы сменой версии:
+    старые ключи просто перестают запрашиваться и вытесняются."""
+    _bump_version(INDEX_VERSION_KEY)
+
+
+def invalidate_like_counts():
+    """Функция сбрасывает ответы API со счетчиками лайков. Главная от
+    лайков не зависит: счетчики на ней подставляет viewer_state."""
+    _bump_version(LIKES_VERSION_KEY)
+
+
+def _should_recompute(entry, now):
+    """Вероятностный ранний пересчет (XFetch): чем ближе срок и чем
+    дольше считалось значение, тем вероятнее, что один из запросов
+    пересчитает его заранее, а не все сразу после истечения."""
+    early = -entry['delta'] * settings.CACHE_EARLY_BETA * math.log(
+        1 - random.random()
+    )
+    return now + early >= entry['expires']
+
+
+def _get_entry(key):
+    """Функция читает запись get_or_compute. Значение другого формата
+    (на случай смены формата без смены версии) считается промахом."""
+    entry = cache.get(key, version=ENTRY_CACHE_VERSION)
+    if isinstance(entry, dict) and entry.keys() >= {
+        'value', 'delta', 'expires'
+    }:
+        return entry
+    return None
+
+
+def _wait_for(key):
+    """Функция ждет, пока значение посчитает процесс, взявший
+    блокировку, но не дольше CACHE_LOCK_WAIT секунд."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = _get_entry(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _compute_entry(key, compute, timeout, stale_key):
+    """Функция считает значение и сохраняет запись с временем расчета и
+    сроком в key и stale_key. Записи хранятся CACHE_STALE_TIMEOUT после
+    срока, чтобы их можно было отдавать устаревшими."""
+    started = time.monotonic()
+    value = compute()
+    entry = {
+        'value': value,
+        'delta': time.monotonic() - started,
+        'expires': time.time() + timeout,
+    }
+    for entry_key in (key, stale_key) if stale_key else (key,):
+        cache.set(
+            entry_key, entry, timeout + settings.CACHE_STALE_TIMEOUT,
+            version=ENTRY_CACHE_VERSION,
+        )
+    return value
+
+
+def get_or_compute(key, compute, timeout, stale_key=None):
+    """Функция возвращает значение из кеша, защищая compute() от
+    одновременного пересчета (cache stampede):
+    - значение пересчитывается заранее с вероятностью, растущей к концу
+      срока (_should_recompute);
+    - пересчитывает только процесс, взявший блокировку cache.add(),
+      остальные отдают устаревшее значение (stale-while-revalidate):
+      из key, хранящегося CACHE_STALE_TIMEOUT после срока, или из
+      stale_key - последнее значение прежней версии ключа;
+    - если устаревшего значения нет (холодный кеш), остальные ждут
+      результата не дольше CACHE_LOCK_WAIT, затем считают сами.
+    Без CACHE_STAMPEDE_PROTECTION записи того же формата читаются до
+    срока и пересчитываются при каждом промахе, поэтому настройку можно
+    переключать без очистки кеша. Исключения compute() не кешируются."""
+    entry = _get_entry(key)
+    if not settings.CACHE_STAMPEDE_PROTECTION:
+        if entry is not None and entry['expires'] > time.time():
+            return entry['value']
+        return _compute_entry(key, compute, timeout, stale_key)
+    if entry is not None and not _should_recompute(entry, time.time()):
+        return entry['value']
+    if entry is None and stale_key:
+        entry = _get_entry(stale_key)
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, settings.CACHE_LOCK_TIMEOUT):
+        entry = entry or _wait_for(key)
+        if entry is not None:
+            return entry['value']
+    try:
+        return _compute_entry(key, compute, timeout, stale_key)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
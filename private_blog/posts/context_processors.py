@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .messaging import get_unread_count
+
+
+def unread_messages(request):
+    """Контекст-процессор для значка непрочитанных сообщений в меню.
+    Счетчик вычисляется лениво - только если шаблон его выводит - из
+    кеша или одним индексированным запросом. Анонимным посетителям и
+    общим оболочкам страниц (рендер без request) не добавляет ничего."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_messages': SimpleLazyObject(lambda: get_unread_count(user)),
+    }
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .messaging import AUTHOR_UNREAD_KEY, get_unread_cache_key
+from .models import Comment, Conversation, Favourite, Message, Post
+
+User = get_user_model()
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """Функция удаляет строки queryset пачками по DELETE_BATCH_SIZE:
+    на пачку один SELECT id и один DELETE ... WHERE id IN (...), каждый
+    в своей короткой транзакции. Строки не загружаются в модели, сигналы
+    не вызываются: общие последствия удаления вызывающий код выполняет
+    один раз. Возвращает число удаленных строк."""
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    model = queryset.model
+    ids = queryset.order_by().values_list('pk', flat=True)
+    deleted = 0
+    while batch := list(ids[:batch_size]):
+        deleted += model._base_manager.using(queryset.db).filter(
+            pk__in=batch
+        )._raw_delete(queryset.db)
+    return deleted
+
+
+def delete_post(post_id):
+    """Функция удаляет статью: комментарии и лайки - пачками, затем саму
+    статью через delete(). Сигналы Post (кеши, статические копии, карта
+    сайта, удаление изображения) срабатывают один раз на статью, а не
+    на каждый комментарий. Возвращает число удаленных строк по типам."""
+    deleted = {
+        'comments': delete_in_batches(Comment.objects.filter(post=post_id)),
+        'favourites': delete_in_batches(
+            Favourite.objects.filter(favourite_post=post_id)
+        ),
+    }
+    post = Post.all_objects.filter(pk=post_id).first()
+    if post is not None:
+        post.delete()
+    deleted['posts'] = int(post is not None)
+    return deleted
+
+
+def delete_user(user_id):
+    """Функция удаляет пользователя: комментарии, лайки и переписку -
+    пачками, затем саму запись. Пачки идут мимо сигналов, поэтому сводка
+    переписки удаляется сразу и закешированные счетчики непрочитанных
+    сбрасываются здесь. Возвращает число удаленных строк по типам и id
+    статей, страницы которых изменились."""
+    comments = Comment.objects.filter(author=user_id)
+    favourites = Favourite.objects.filter(liker=user_id)
+    post_ids = set(
+        comments.order_by().values_list('post', flat=True).distinct()
+    ).union(
+        favourites.order_by().values_list('favourite_post', flat=True)
+    )
+    deleted = {
+        'comments': delete_in_batches(comments),
+        'favourites': delete_in_batches(favourites),
+        'messages': delete_in_batches(
+            Message.objects.filter(interlocutor=user_id)
+        ),
+    }
+    Conversation.objects.filter(interlocutor=user_id).delete()
+    cache.delete_many([AUTHOR_UNREAD_KEY, get_unread_cache_key(user_id)])
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        user.delete()
+    deleted['users'] = int(user is not None)
+    return deleted, post_ids
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import zipfile
+from itertools import chain
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Favourite, Message
+
+# Наборы данных пользователя: имя файла -> (queryset-фабрика, поля).
+# Поля выбираются через values(), модели не создаются.
+USER_DATASETS = {
+    'comments': (
+        lambda user: Comment.objects.filter(author=user).order_by('pk'),
+        ('id', 'post_id', 'post__title', 'comment_text', 'created'),
+    ),
+    'favourites': (
+        lambda user: Favourite.objects.filter(liker=user).order_by('pk'),
+        ('favourite_post_id', 'favourite_post__title'),
+    ),
+    'messages': (
+        lambda user: Message.objects.filter(
+            interlocutor=user
+        ).order_by('send_time', 'pk'),
+        ('id', 'direction', 'message_text', 'send_time'),
+    ),
+}
+PROFILE_FIELDS = (
+    'username', 'first_name', 'last_name', 'email', 'date_joined',
+)
+
+
+class StreamBuffer(io.RawIOBase):
+    """Буфер только для записи: ZipFile и csv пишут в него, а генератор
+    забирает накопленные байты. Буфер не поддерживает seek, поэтому
+    ZipFile пишет размеры файлов после данных (data descriptor)."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+
+def iter_rows(queryset, fields):
+    """Генератор читает строки потоком через iterator(chunk_size)."""
+    return queryset.values_list(*fields).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def iter_json(rows, fields):
+    """Генератор отдает JSON-массив объектов по одной строке."""
+    yield '['
+    separator = '\n'
+    for row in rows:
+        yield separator + json.dumps(
+            dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False
+        )
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def iter_csv(rows, fields):
+    """Генератор отдает CSV с заголовком по одной строке."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for values in chain([fields], rows):
+        writer.writerow(values)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def iter_ndjson(rows, fields):
+    """Генератор отдает NDJSON: один JSON-объект на строку."""
+    for row in rows:
+        yield json.dumps(
+            dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+def stream_zip(files):
+    """Генератор собирает ZIP на лету: files - пары (имя, генератор
+    строк). Каждая строка сжимается и сразу отдается клиенту, поэтому
+    память не зависит от объема данных."""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in files:
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk.encode('utf-8'))
+                    data = buffer.pop()
+                    if data:
+                        yield data
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def get_user_export_files(user, file_format):
+    """Генератор файлов архива с данными пользователя."""
+    serialize = iter_csv if file_format == 'csv' else iter_json
+    profile = [tuple(getattr(user, field) for field in PROFILE_FIELDS)]
+    yield f'profile.{file_format}', serialize(profile, PROFILE_FIELDS)
+    for name, (get_queryset, fields) in USER_DATASETS.items():
+        rows = iter_rows(get_queryset(user), fields)
+        yield f'{name}.{file_format}', serialize(rows, fields)
@@ -0,0 +1,161 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .caching import get_or_compute
+from .models import Comment, Post
+from .utilities import (absolute_url, get_post_validator, get_posts_validator,
+                        post_last_modified)
+
+
+class SiteFeed(Feed):
+    """Базовый класс лент: ссылки строятся от SITE_URL, а не от
+    заголовка Host запроса. Готовая лента кешируется для всех клиентов,
+    и хост первого запроса (подделанный или внутренний web:8000) иначе
+    попал бы во все ответы."""
+
+    def get_feed(self, obj, request):
+        feed = super().get_feed(obj, request)
+        feed.feed['feed_url'] = absolute_url(request.path)
+        return feed
+
+
+class LatestPostsFeed(SiteFeed):
+    """Класс генерит RSS-ленту последних статей блога."""
+
+    title = 'Блог KostKH: новые статьи'
+    description = 'Мысли о программировании и не только'
+
+    def link(self):
+        return absolute_url(reverse('index'))
+
+    def items(self):
+        return Post.objects.all()[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.subheader
+
+    def item_link(self, item):
+        return absolute_url(reverse('post_view', args=[item.id]))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.pub_date, time.min))
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    """Класс генерит Atom-ленту последних статей блога."""
+
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class PostCommentsFeed(SiteFeed):
+    """Класс генерит RSS-ленту комментариев к статье."""
+
+    def get_object(self, request, post_id):
+        return get_object_or_404(Post, id=post_id)
+
+    def title(self, obj):
+        return f'Комментарии к статье "{obj.title}"'
+
+    def description(self, obj):
+        return obj.subheader
+
+    def link(self, obj):
+        return absolute_url(reverse('comments', args=[obj.id]))
+
+    def items(self, obj):
+        return Comment.objects.filter(post=obj).select_related(
+            'author'
+        ).order_by('-created', '-pk')[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return f'{item.author.username}: {item.comment_text[:50]}'
+
+    def item_description(self, item):
+        return item.comment_text
+
+    def item_link(self, item):
+        return absolute_url(
+            f'{reverse("comments", args=[item.post_id])}#comment-{item.pk}'
+        )
+
+    def item_pubdate(self, item):
+        return item.created
+
+
+class PostCommentsAtomFeed(PostCommentsFeed):
+    """Класс генерит Atom-ленту комментариев к статье."""
+
+    feed_type = Atom1Feed
+    subtitle = PostCommentsFeed.description
+
+
+def posts_feed_etag(request):
+    validator = get_posts_validator(request)
+    if validator['last_update'] is None:
+        return 'empty'
+    return f'{validator["last_update"].timestamp()}-{validator["total"]}'
+
+
+def posts_feed_last_modified(request):
+    return get_posts_validator(request)['last_update']
+
+
+def comments_feed_etag(request, post_id):
+    validator = get_post_validator(request, post_id)
+    if validator is None:
+        return None
+    return '{}-{}'.format(
+        post_last_modified(request, post_id).timestamp(),
+        validator['comments_total'] or 0,
+    )
+
+
+def cached_feed(feed, etag_func, last_modified_func):
+    """Функция оборачивает ленту: ответ рендерится один раз на каждую
+    версию содержимого (ETag входит в ключ кеша), а читатели лент с
+    If-None-Match/If-Modified-Since получают 304 без рендеринга."""
+    @condition(etag_func=etag_func, last_modified_func=last_modified_func)
+    def view(request, **kwargs):
+        etag = etag_func(request, **kwargs)
+        if etag is None:
+            return feed(request, **kwargs)
+        key = 'posts:feed:{}:{}:{}'.format(
+            feed.__class__.__name__,
+            ':'.join(str(value) for value in kwargs.values()),
+            etag,
+        )
+        return get_or_compute(
+            key,
+            lambda: feed(request, **kwargs),
+            settings.FEED_CACHE_TIMEOUT,
+        )
+
+    return view
+
+
+posts_rss = cached_feed(
+    LatestPostsFeed(), posts_feed_etag, posts_feed_last_modified
+)
+posts_atom = cached_feed(
+    LatestPostsAtomFeed(), posts_feed_etag, posts_feed_last_modified
+)
+comments_rss = cached_feed(
+    PostCommentsFeed(), comments_feed_etag, post_last_modified
+)
+comments_atom = cached_feed(
+    PostCommentsAtomFeed(), comments_feed_etag, post_last_modified
+)
@@ -1,5 +1,8 @@
-from django.forms import ModelForm
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import ChoiceField, ModelForm
 
+from .images import normalize_image
+from .messaging import BROADCAST_AUDIENCES
 from .models import Comment, Message, Post
 
 
@@ -27,6 +30,14 @@ class PostForm(ModelForm):
             'image': 'Прикрепите изображение',
         }
 
+    def clean_image(self):
+        """Новое изображение проверяется и нормализуется до сохранения:
+        в media/posts/ попадает уже уменьшенный файл без метаданных."""
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
+
 
 class CommentForm(ModelForm):
     """Класс генерирует форму для написания комментариев."""
@@ -44,3 +55,14 @@ class MessageForm(ModelForm):
         model = Message
         fields = ['message_text', ]
         required = {'message_text': True}
+
+
+class BroadcastForm(MessageForm):
+    """Класс генерирует форму рассылки сообщения от автора."""
+
+    audience = ChoiceField(
+        label='Получатели',
+        choices=[
+            (key, title) for key, (title, _) in BROADCAST_AUDIENCES.items()
+        ],
+    )
@@ -0,0 +1,153 @@
+import os
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image, ImageCms, ImageOps, ImageSequence
+
+# Форматы, которые сохраняются в исходном формате после обработки.
+# Остальные (BMP, TIFF ...) перекодируются в PNG или JPEG.
+KEEP_FORMATS = {
+    'JPEG': '.jpg',
+    'GIF': '.gif',
+    'PNG': '.png',
+    'WEBP': '.webp',
+}
+# Метаданные, которые удаляются при загрузке (координаты съемки, модель
+# камеры, комментарии редакторов). ICC-профиль нужен для цветов и остается,
+# кроме перевода CMYK в RGB: тогда цвета переводятся по нему (_to_rgb).
+STRIPPED_INFO = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+# Форматы, анимация которых сохраняется: кадры уменьшаются по отдельности.
+ANIMATED_FORMATS = ('GIF', 'PNG', 'WEBP')
+
+
+def _has_metadata(image):
+    return bool(image.getexif()) or any(
+        key in image.info for key in STRIPPED_INFO
+    )
+
+
+def _get_output_format(image):
+    if image.format in KEEP_FORMATS:
+        return image.format
+    if image.mode in ('RGBA', 'LA', 'P') or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def validate_image(upload, image):
+    """Функция проверяет размер файла в байтах и размеры изображения
+    по заголовку, не декодируя пиксели."""
+    if upload.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл изображения больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.IMAGE_UPLOAD_MAX_BYTES // 2 ** 20},
+        )
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+
+
+def _to_rgb(image, icc_profile):
+    """Функция переводит изображение (например, CMYK) в RGB для JPEG.
+    Если есть ICC-профиль, цвета переводятся по нему в sRGB: профиль
+    исходного цветового пространства к результату уже не подходит."""
+    if icc_profile and image.mode == 'CMYK':
+        try:
+            return ImageCms.profileToProfile(
+                image, BytesIO(icc_profile), ImageCms.createProfile('sRGB'),
+                outputMode='RGB',
+            )
+        except (ImageCms.PyCMSError, OSError):
+            pass
+    return image.convert('RGB')
+
+
+def _resize_frames(image, max_edge):
+    """Функция уменьшает каждый кадр анимации и возвращает кадры и их
+    длительности."""
+    frames = []
+    durations = []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get('duration', 100))
+        frame = frame.convert('RGBA')
+        frame.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        frames.append(frame)
+    return frames, durations
+
+
+def normalize_image(upload):
+    """Функция готовит загруженное изображение к сохранению: проверяет
+    ограничения, поворачивает по EXIF, удаляет метаданные и уменьшает
+    до IMAGE_MAX_EDGE по большей стороне. Файл читается Pillow прямо из
+    загрузки (большие загрузки Django уже держит во временном файле на
+    диске), результат пишется в SpooledTemporaryFile. Если обработка не
+    нужна, возвращается исходная загрузка без перекодирования.
+    Анимация уменьшается покадрово, а небольшая сохраняется как есть."""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        validate_image(upload, image)
+        max_edge = settings.IMAGE_MAX_EDGE
+        needs_resize = max(image.size) > max_edge
+        animated = (getattr(image, 'is_animated', False)
+                    and image.format in ANIMATED_FORMATS)
+        keep = not (needs_resize or _has_metadata(image)
+                    or image.format not in KEEP_FORMATS)
+        if keep or (animated and not needs_resize):
+            # Анимацию без уменьшения не перекодируем: кадры сохранятся.
+            upload.seek(0)
+            return upload
+        output_format = _get_output_format(image)
+        icc_profile = image.info.get('icc_profile')
+        options = {'optimize': True}
+        if animated:
+            loop = image.info.get('loop', 0)
+            frames, durations = _resize_frames(image, max_edge)
+            image = frames[0]
+            options.update(
+                save_all=True,
+                append_images=frames[1:],
+                duration=durations,
+                loop=loop,
+            )
+        else:
+            if image.format == 'JPEG' and needs_resize:
+                # Декодирование JPEG сразу в уменьшенном масштабе
+                # (1/2 ... 1/8) в разы дешевле полного декодирования
+                # большого снимка.
+                image.draft('RGB', (max_edge, max_edge))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        if output_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            converted = image.mode == 'CMYK'
+            image = _to_rgb(image, icc_profile)
+            if converted:
+                icc_profile = None
+        if output_format == 'JPEG':
+            options.update(
+                quality=settings.IMAGE_JPEG_QUALITY, progressive=True
+            )
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        output = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        image.save(output, format=output_format, **options)
+    size = output.tell()
+    output.seek(0)
+    name = os.path.splitext(upload.name)[0] + KEEP_FORMATS[output_format]
+    return InMemoryUploadedFile(
+        output,
+        field_name=getattr(upload, 'field_name', None),
+        name=name,
+        content_type=Image.MIME[output_format],
+        size=size,
+        charset=None,
+    )
@@ -0,0 +1,348 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateField, Value, When
+from django.utils import timezone
+
+from .caching import invalidate_index_cache
+from .images import normalize_image
+from .media import batched
+from .models import Post
+from .signals import schedule_image_cleanup
+from .tasks import (generate_thumbnails, refresh_published_pages,
+                    schedule_proxy_cache_purge, schedule_sitemaps_update)
+
+
+class PostImportError(Exception):
+    """Ошибка в импортируемом файле статьи."""
+
+
+def _describe(error):
+    if isinstance(error, ValidationError):
+        return '; '.join(error.messages)
+    return str(error)
+
+
+def parse_front_matter(text):
+    """Функция делит файл на front-matter (строки 'ключ: значение'
+    между строками ---) и текст статьи."""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != '---':
+        raise PostImportError('файл должен начинаться с front-matter (---)')
+    for end in range(1, len(lines)):
+        if lines[end].strip() == '---':
+            break
+    else:
+        raise PostImportError('front-matter не закрыт строкой ---')
+    meta = {}
+    for line in lines[1:end]:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        key, separator, value = line.partition(':')
+        if not separator:
+            raise PostImportError(f'строка front-matter без ":": {line}')
+        value = value.strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        meta[key.strip().lower()] = value
+    return meta, '\n'.join(lines[end + 1:]).strip()
+
+
+def _file_hash(path):
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def read_source(path, root):
+    """Функция читает файл статьи и возвращает несохраненную статью,
+    дату публикации и путь к изображению. Путь файла относительно
+    каталога импорта хранится в Post.source_path и определяет статью,
+    а хеш содержимого в Post.source_hash - изменился ли файл с прошлого
+    импорта. Хеш изображения (Post.source_image_hash) позволяет не
+    обрабатывать заново неизмененное изображение."""
+    content = path.read_bytes()
+    meta, text = parse_front_matter(content.decode('utf-8'))
+    source_path = path.relative_to(root).as_posix()
+    if len(source_path) > Post._meta.get_field('source_path').max_length:
+        raise PostImportError('слишком длинный путь к файлу')
+    post = Post(
+        title=meta.get('title', ''),
+        subheader=meta.get('subheader', ''),
+        text=text,
+        source_path=source_path,
+        source_hash=hashlib.sha256(content).hexdigest(),
+    )
+    post.full_clean(exclude=['image', 'source_path', 'source_hash'])
+    pub_date = None
+    if meta.get('date'):
+        try:
+            pub_date = date.fromisoformat(meta['date'])
+        except ValueError:
+            raise PostImportError(f'некорректная дата: {meta["date"]}')
+    image = path.parent / meta['image'] if meta.get('image') else None
+    if image:
+        post.source_image_hash = _file_hash(image)
+    return post, pub_date, image
+
+
+def store_image(path):
+    """Функция обрабатывает изображение так же, как загрузку через форму
+    (normalize_image), и сохраняет его в хранилище. Выполняется в
+    процессе пула и не обращается к БД. Возвращает имя файла."""
+    field = Post._meta.get_field('image')
+    with open(path, 'rb') as source:
+        image = normalize_image(File(source, name=os.path.basename(path)))
+        return default_storage.save(
+            field.generate_filename(None, image.name), image
+        )
+
+
+def delete_images(names):
+    """Функция удаляет из хранилища изображения, сохраненные для статей,
+    которые так и не были созданы или обновлены."""
+    for name in names:
+        default_storage.delete(name)
+
+
+def store_images(paths, executor=None):
+    """Функция обрабатывает изображения пачки параллельно в пуле
+    процессов (без пула - по очереди). Возвращает пары (имя, ошибка)."""
+    futures = [executor.submit(store_image, path) for path in paths] if (
+        executor
+    ) else None
+    results = []
+    for index, path in enumerate(paths):
+        try:
+            name = futures[index].result() if futures else store_image(path)
+        except (ValidationError, OSError) as error:
+            results.append((None, error))
+        else:
+            results.append((name, None))
+    return results
+
+
+def set_pub_dates(sources):
+    """Функция проставляет даты публикации из front-matter одним UPDATE
+    с CASE: при создании pub_date заполняется автоматически."""
+    dates = {
+        post.source_path: pub_date
+        for post, pub_date, _ in sources if pub_date
+    }
+    if dates:
+        Post.all_objects.filter(source_path__in=dates).update(pub_date=Case(
+            *[When(source_path=source_path, then=Value(pub_date))
+              for source_path, pub_date in dates.items()],
+            output_field=DateField(),
+        ))
+
+
+def create_posts(sources):
+    """Функция сохраняет пачку статей одним bulk_create. Если те же файлы
+    параллельно импортирует другой запуск, вставка падает на уникальном
+    source_path: тогда уже созданные им статьи отбрасываются и вставка
+    повторяется. Возвращает пути файлов действительно созданных статей."""
+    posts = [post for post, _, _ in sources]
+    with transaction.atomic():
+        while posts:
+            try:
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                break
+            except IntegrityError:
+                taken = set(Post.all_objects.filter(
+                    source_path__in=[post.source_path for post in posts]
+                ).values_list('source_path', flat=True))
+                if not taken:
+                    raise
+                posts = [
+                    post for post in posts if post.source_path not in taken
+                ]
+        created = {post.source_path for post in posts}
+        set_pub_dates([
+            source for source in sources if source[0].source_path in created
+        ])
+        post_ids = Post.objects.filter(
+            source_path__in=[post.source_path for post in posts if post.image]
+        ).values_list('pk', flat=True)
+        for post_id in post_ids:
+            generate_thumbnails.delay(post_id)
+    return created
+
+
+def update_posts(sources, replaced_images):
+    """Функция обновляет статьи измененных файлов одним bulk_update:
+    текст, поля front-matter, изображение и хеши. Дата правки ставится
+    сегодняшняя. Миниатюры создаются только для новых изображений,
+    замененные изображения удаляются после коммита."""
+    today = timezone.localdate()
+    now = timezone.now()
+    posts = [post for post, _, _ in sources]
+    for post in posts:
+        post.modify_date = today
+        post.updated_at = now
+    with transaction.atomic():
+        Post.all_objects.bulk_update(posts, [
+            'title', 'subheader', 'text', 'image', 'thumbnails',
+            'source_hash', 'source_image_hash', 'modify_date', 'updated_at',
+        ])
+        set_pub_dates(sources)
+        for post in posts:
+            if post.image and not post.thumbnails:
+                generate_thumbnails.delay(post.pk)
+        for name in replaced_images:
+            schedule_image_cleanup(name)
+
+
+def match_imported(sources):
+    """Функция сверяет пачку с уже импортированными статьями по
+    source_path. Статьи старых импортов без пути ищутся по хешу
+    содержимого и получают путь. Если у измененного файла изображение
+    то же (по хешу), статья сохраняет прежнее изображение и миниатюры.
+    Возвращает новые и измененные файлы, статьи, которым нужно записать
+    путь, и словарь путь -> имя изображения, которое заменит
+    обновление."""
+    by_path = {
+        post.source_path: post
+        for post in Post.all_objects.filter(
+            source_path__in=[post.source_path for post, _, _ in sources]
+        ).only(
+            'source_path', 'source_hash', 'source_image_hash', 'image',
+            'thumbnails', 'is_deleted',
+        )
+    }
+    by_hash = {
+        post.source_hash: post
+        for post in Post.all_objects.filter(
+            source_path=None,
+            source_hash__in=[
+                post.source_hash for post, _, _ in sources
+                if post.source_path not in by_path
+            ],
+        ).only('source_hash')
+    }
+    new, changed, adopted = [], [], []
+    replaced_images = {}
+    for source in sources:
+        post = source[0]
+        current = by_path.get(post.source_path)
+        if current is None:
+            current = by_hash.pop(post.source_hash, None)
+            if current is None:
+                new.append(source)
+            else:
+                current.source_path = post.source_path
+                adopted.append(current)
+        elif current.source_hash != post.source_hash and (
+            not current.is_deleted
+        ):
+            post.pk = current.pk
+            if current.image and post.source_image_hash and (
+                current.source_image_hash == post.source_image_hash
+            ):
+                post.image = current.image.name
+                post.thumbnails = current.thumbnails
+                source = (post, source[1], None)
+            elif current.image:
+                replaced_images[post.source_path] = current.image.name
+            changed.append(source)
+    return new, changed, adopted, replaced_images
+
+
+def save_posts(new, changed, replaced_images, stored):
+    """Функция создает статьи новых файлов и обновляет статьи измененных.
+    stored - словарь путь -> имя изображения, сохраненного в этой пачке:
+    если сохранение статей упало или статью успел создать параллельный
+    запуск, ее изображение удаляется из хранилища. Возвращает пути
+    файлов созданных статей."""
+    created = set()
+    try:
+        if new:
+            created = create_posts(new)
+        if changed:
+            update_posts(changed, [
+                replaced_images[post.source_path] for post, _, _ in changed
+                if post.source_path in replaced_images
+            ])
+    except Exception:
+        delete_images(
+            name for path, name in stored.items() if path not in created
+        )
+        raise
+    delete_images(
+        stored[post.source_path] for post, _, _ in new
+        if post.source_path in stored and post.source_path not in created
+    )
+    return created
+
+
+def import_batch(paths, root, errors, executor=None):
+    """Функция импортирует одну пачку файлов: пропускает файлы, которые
+    не изменились с прошлого импорта, обновляет статьи измененных файлов,
+    обрабатывает изображения и создает статьи новых файлов. Ошибки
+    добавляет в errors. Возвращает число созданных, обновленных и
+    пропущенных статей."""
+    sources = []
+    for path in paths:
+        try:
+            sources.append(read_source(path, root))
+        except (PostImportError, ValidationError, UnicodeDecodeError) as error:
+            errors.append((path, _describe(error)))
+    new, changed, adopted, replaced_images = match_imported(sources)
+    skipped = len(sources) - len(new) - len(changed)
+    with_images = [source for source in new + changed if source[2]]
+    images = store_images([image for _, _, image in with_images], executor)
+    failed = set()
+    stored = {}
+    for (post, _, image), (name, error) in zip(with_images, images):
+        if error:
+            errors.append((image, _describe(error)))
+            failed.add(post.source_path)
+        else:
+            post.image = name
+            stored[post.source_path] = name
+    new = [source for source in new if source[0].source_path not in failed]
+    changed = [
+        source for source in changed if source[0].source_path not in failed
+    ]
+    if adopted:
+        Post.all_objects.bulk_update(adopted, ['source_path'])
+    created = save_posts(new, changed, replaced_images, stored)
+    return len(created), len(changed), skipped
+
+
+def import_posts(directory, batch_size=100, workers=None):
+    """Функция импортирует статьи из Markdown-файлов каталога (включая
+    подкаталоги) пачками по batch_size. Изображения обрабатываются в
+    пуле из workers процессов, миниатюры создают фоновые задачи.
+    Возвращает число созданных, обновленных и пропущенных статей и
+    список ошибок (путь, описание)."""
+    created = updated = skipped = 0
+    errors = []
+    root = Path(directory)
+    paths = sorted(root.rglob('*.md'))
+    workers = workers or os.cpu_count()
+    pool = ProcessPoolExecutor(workers) if workers > 1 else nullcontext()
+    with pool as executor:
+        for batch in batched(paths, batch_size):
+            batch_created, batch_updated, batch_skipped = import_batch(
+                batch, root, errors, executor
+            )
+            created += batch_created
+            updated += batch_updated
+            skipped += batch_skipped
+    if created or updated:
+        invalidate_index_cache()
+        refresh_published_pages()
+        schedule_proxy_cache_purge()
+        schedule_sitemaps_update()
+    return created, updated, skipped, errors
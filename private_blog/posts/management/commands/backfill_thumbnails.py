@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tasks import generate_thumbnails
+from posts.thumbnails import POST_THUMBNAILS
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь генерацию миниатюр для статей, у которых '
+            'в Post.thumbnails нет адресов для всех размеров или они '
+            'сделаны для прежнего изображения.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True,
+        ).order_by().values_list('pk', 'image', 'thumbnails')
+        queued = 0
+        for post_id, image, thumbnails in posts.iterator():
+            if all(
+                (thumbnails or {}).get(geometry, {}).get('source') == image
+                for geometry in POST_THUMBNAILS
+            ):
+                continue
+            generate_thumbnails.delay(post_id)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь статей: {queued}'
+        ))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность HTML-страниц и JSON API: '
+            'гоняет запросы через тестовый клиент (без сети) с холодным '
+            'и прогретым кешем и печатает запросы в секунду.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Сколько запросов на каждый сценарий.',
+        )
+
+    def measure(self, client, url, requests, warm):
+        started = time.perf_counter()
+        for _ in range(requests):
+            if not warm:
+                cache.clear()
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+        return requests / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        post = Post.objects.order_by('-pk').first()
+        if post is None:
+            raise CommandError('Нужна хотя бы одна статья.')
+        scenarios = (
+            ('Главная, HTML', reverse('index')),
+            ('Список статей, API', reverse('api_post_list')),
+            ('Статья, HTML', reverse('post_view', args=[post.id])),
+            ('Статья, API', reverse('api_post_detail', args=[post.id])),
+            ('Комментарии, HTML', reverse('comments', args=[post.id])),
+            ('Комментарии, API', reverse(
+                'api_comment_list', args=[post.id]
+            )),
+        )
+        client = Client()
+        self.stdout.write(f'{"Сценарий":<22}{"холодный":>12}{"прогретый":>12}')
+        for title, url in scenarios:
+            cold = self.measure(client, url, options['requests'], False)
+            warm = self.measure(client, url, options['requests'], True)
+            self.stdout.write(f'{title:<22}{cold:>10.0f}/s{warm:>10.0f}/s')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import get_chunk_file_name, update_sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Обновляет статические файлы карты сайта в SITEMAP_ROOT: '
+            'перерисовывает только куски, в которых изменились статьи '
+            'или комментарии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Перерисовать все куски заново.',
+        )
+
+    def handle(self, *args, **options):
+        updated = update_sitemaps(full=options['full'])
+        for chunk in updated:
+            self.stdout.write(f'Обновлен {get_chunk_file_name(chunk)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Карта сайта обновлена, изменено кусков: {len(updated)}'
+        ))
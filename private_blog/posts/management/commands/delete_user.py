@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import delete_user
+from posts.tasks import delete_user_data, refresh_after_bulk_delete
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователя вместе с комментариями, лайками и '
+            'перепиской. Связанные строки удаляются пачками, без загрузки '
+            'в память. С --defer пользователь сразу блокируется, а '
+            'удаление выполняет фоновая задача.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--defer',
+            action='store_true',
+            help='Заблокировать сейчас, удалить фоновой задачей.',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['defer']:
+            # save(), а не update(): сигнал сбросит кешированного
+            # пользователя, и его сессии сразу перестанут работать -
+            # если кеш общий с web (CACHE_BACKEND, проверка tasks.W001).
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            delete_user_data.delay(user.pk)
+            self.stdout.write(self.style.SUCCESS(
+                'Пользователь заблокирован, удаление поставлено в очередь'
+            ))
+            return
+        deleted, post_ids = delete_user(user.pk)
+        refresh_after_bulk_delete(post_ids)
+        summary = ', '.join(
+            f'{name}: {count}' for name, count in deleted.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Удалено - {summary}'))
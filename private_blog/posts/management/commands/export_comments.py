@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.export import iter_ndjson, iter_rows
+from posts.models import Comment
+
+COMMENT_FIELDS = (
+    'id', 'post_id', 'post__title', 'author__username', 'comment_text',
+    'created',
+)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает все комментарии в NDJSON (один JSON-объект на '
+            'строку). Комментарии читаются из БД потоком, поэтому память '
+            'не зависит от их числа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл для записи. По умолчанию - стандартный вывод.',
+        )
+
+    def handle(self, *args, **options):
+        rows = iter_rows(Comment.objects.order_by('pk'), COMMENT_FIELDS)
+        output = options['output']
+        if output:
+            with open(output, 'w', encoding='utf-8') as stream:
+                stream.writelines(iter_ndjson(rows, COMMENT_FIELDS))
+            return
+        for line in iter_ndjson(rows, COMMENT_FIELDS):
+            self.stdout.write(line, ending='')
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from posts.media import collect_kvstore, collect_originals, collect_thumbnails
+
+DB_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+
+
+class Command(BaseCommand):
+    help = ('Удаляет изображения статей, на которые не ссылается ни одна '
+            'статья, их миниатюры и ключи kvstore sorl-thumbnail, а также '
+            'миниатюры, о которых kvstore не знает. Файлы читаются потоком '
+            'и проверяются пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько файлов проверять одним запросом к БД.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд (идущие загрузки).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, ничего не удаляя.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        min_age = options['min_age']
+        dry_run = options['dry_run']
+        originals = collect_originals(batch_size, min_age, dry_run)
+        self.stdout.write(f'Оригиналов без статьи: {originals}')
+        if thumbnail_settings.THUMBNAIL_KVSTORE != DB_KVSTORE:
+            self.stdout.write(self.style.WARNING(
+                'kvstore не в БД: очистка миниатюр пропущена.'
+            ))
+            return
+        sources = collect_kvstore(batch_size, dry_run)
+        self.stdout.write(f'Записей kvstore без статьи: {sources}')
+        thumbnails = collect_thumbnails(batch_size, min_age, dry_run)
+        self.stdout.write(f'Миниатюр без записи в kvstore: {thumbnails}')
+        self.stdout.write(self.style.SUCCESS(
+            'Проверка завершена (ничего не удалено)' if dry_run
+            else 'Неиспользуемые файлы удалены'
+        ))
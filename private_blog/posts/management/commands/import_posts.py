@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import import_posts
+
+
+class Command(BaseCommand):
+    help = ('Импортирует статьи из каталога Markdown-файлов с front-matter '
+            '(title, subheader, date, image). Статьи создаются пачками '
+            'через bulk_create, изображения обрабатываются в пуле '
+            'процессов. Статья определяется путем файла в каталоге: '
+            'неизмененные файлы (по хешу содержимого) пропускаются, а '
+            'статьи измененных обновляются, поэтому команду можно '
+            'запускать повторно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            help='Каталог с файлами *.md (подкаталоги тоже читаются).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько статей создавать одним запросом к БД.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Число процессов для обработки изображений '
+                 '(по умолчанию - число ядер, 1 - без пула).',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['directory']):
+            raise CommandError(f'Нет каталога {options["directory"]}')
+        created, updated, skipped, errors = import_posts(
+            options['directory'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+        )
+        for path, message in errors:
+            self.stderr.write(f'{path}: {message}')
+        self.stdout.write(f'Пропущено (уже импортированы): {skipped}')
+        self.stdout.write(f'Обновлено (файл изменился): {updated}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано статей: {created}, ошибок: {len(errors)}'
+        ))
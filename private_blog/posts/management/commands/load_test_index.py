@@ -0,0 +1,97 @@
+import statistics
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.caching import invalidate_index_cache
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест главной страницы: несколько потоков '
+            'запрашивают ее, пока кеш регулярно сбрасывается (как при '
+            'новых комментариях и лайках). Печатает задержки с защитой '
+            'от одновременного пересчета кеша и без нее.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Число одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность каждого прогона, секунд.',
+        )
+        parser.add_argument(
+            '--invalidate-every',
+            type=float,
+            default=0.5,
+            help='Как часто сбрасывать кеш главной, секунд.',
+        )
+
+    def run(self, threads, duration, invalidate_every):
+        url = reverse('index')
+        deadline = time.monotonic() + duration
+        timings = []
+        errors = []
+
+        def client_loop():
+            client = Client()
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        workers = [
+            threading.Thread(target=client_loop) for _ in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        while time.monotonic() < deadline:
+            time.sleep(invalidate_every)
+            invalidate_index_cache()
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise CommandError(f'Ошибочные ответы: {errors[:10]}')
+        return sorted(timings)
+
+    def report(self, title, timings):
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f'{title:<12}{len(timings):>9}'
+            f'{percentiles[49] * 1000:>9.1f}'
+            f'{percentiles[98] * 1000:>9.1f}'
+            f'{timings[-1] * 1000:>9.1f}'
+        )
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError('Нужна хотя бы одна статья.')
+        self.stdout.write(
+            f'{"Защита":<12}{"запросов":>9}{"p50, мс":>9}'
+            f'{"p99, мс":>9}{"max, мс":>9}'
+        )
+        for title, enabled in (('выключена', False), ('включена', True)):
+            cache.clear()
+            with override_settings(CACHE_STAMPEDE_PROTECTION=enabled):
+                timings = self.run(
+                    options['threads'],
+                    options['duration'],
+                    options['invalidate_every'],
+                )
+            self.report(title, timings)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts.prerender import publish_all, publish_post, unpublish
+
+
+class Command(BaseCommand):
+    help = ('Рендерит анонимные версии главной, about и страниц статей '
+            'в PRERENDER_ROOT, откуда их отдает nginx.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post',
+            type=int,
+            help='Перерисовать только страницу статьи с этим id и главную.',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить все статические копии (все запросы пойдут в '
+                 'Django).',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            unpublish()
+            self.stdout.write(self.style.SUCCESS('Статические копии удалены'))
+        elif options['post']:
+            publish_post(options['post'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Статья {options["post"]} опубликована'
+            ))
+        else:
+            published = publish_all()
+            self.stdout.write(self.style.SUCCESS(
+                f'Опубликовано страниц: {published}'
+            ))
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Имитирует отстающую реплику для локальной разработки: '
+            'раз в --lag секунд копирует файл SQLite из default '
+            'во все реплики из DATABASE_REPLICAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag',
+            type=float,
+            default=2.0,
+            help='Отставание реплик от мастера в секундах.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Скопировать один раз и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        replicas = [
+            connections[alias].settings_dict
+            for alias in settings.DATABASE_REPLICAS
+        ]
+        engines = {primary['ENGINE']} | {r['ENGINE'] for r in replicas}
+        if not replicas or engines != {'django.db.backends.sqlite3'}:
+            raise CommandError(
+                'Нужны default и реплики на SQLite (SQLITE_REPLICA=1).'
+            )
+        while True:
+            # Контекст sqlite3.connect только завершает транзакцию,
+            # соединения закрывает closing.
+            with closing(sqlite3.connect(primary['NAME'])) as source:
+                for replica in replicas:
+                    with closing(sqlite3.connect(replica['NAME'])) as target:
+                        source.backup(target)
+            self.stdout.write(f'Реплики обновлены: {time.strftime("%X")}')
+            if options['once']:
+                return
+            time.sleep(options['lag'])
@@ -0,0 +1,124 @@
+import os
+import time
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default as thumbnail_default
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from .models import Post
+
+IMAGE_DIR = Post._meta.get_field('image').upload_to
+
+
+def iter_storage_files(directory, min_age=0):
+    """Генератор обходит каталог хранилища через os.scandir и по одному
+    отдает имена файлов относительно MEDIA_ROOT, поэтому память не растет
+    с числом файлов. Файлы моложе min_age секунд пропускаются: их могла
+    только что записать еще не завершенная загрузка."""
+    deadline = time.time() - min_age
+    stack = [default_storage.path(directory)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif (entry.is_file(follow_symlinks=False)
+                      and entry.stat().st_mtime <= deadline):
+                    yield os.path.relpath(
+                        entry.path, default_storage.location
+                    ).replace(os.sep, '/')
+
+
+def batched(iterable, size):
+    """Генератор режет поток на списки не длиннее size."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def get_referenced_images(names):
+    """Функция возвращает те имена из names, на которые ссылается Post
+    (включая скрытые статьи, ожидающие удаления)."""
+    return set(Post.all_objects.filter(image__in=names).values_list(
+        'image', flat=True
+    ))
+
+
+def delete_image_if_orphaned(name):
+    """Функция удаляет оригинал изображения, его миниатюры и ключи
+    kvstore sorl-thumbnail, если файл больше не нужен ни одной статье.
+    Возвращает True, если файл удален."""
+    if not name or get_referenced_images([name]):
+        return False
+    delete_with_thumbnails(name)
+    return True
+
+
+def collect_originals(batch_size, min_age, dry_run=False):
+    """Функция удаляет из каталога изображений статей файлы, на которые
+    не ссылается ни одна статья, вместе с их миниатюрами."""
+    deleted = 0
+    for names in batched(iter_storage_files(IMAGE_DIR, min_age), batch_size):
+        referenced = get_referenced_images(names)
+        for name in names:
+            if name not in referenced:
+                deleted += 1
+                if not dry_run:
+                    delete_with_thumbnails(name)
+    return deleted
+
+
+def collect_kvstore(batch_size, dry_run=False):
+    """Функция удаляет записи kvstore об исходных изображениях статей,
+    которых уже нет ни в одной статье (например, удаленных до появления
+    хуков), вместе с миниатюрами. Записи читаются потоком."""
+    deleted = 0
+    image_prefix = add_prefix('', 'image')
+    entries = KVStore.objects.filter(
+        key__startswith=image_prefix,
+    ).values_list('value', flat=True).iterator(chunk_size=batch_size)
+    for values in batched(entries, batch_size):
+        image_files = [deserialize_image_file(value) for value in values]
+        sources = [
+            image_file for image_file in image_files
+            if image_file.name.startswith(IMAGE_DIR)
+        ]
+        referenced = get_referenced_images(
+            [source.name for source in sources]
+        )
+        for source in sources:
+            if source.name not in referenced:
+                deleted += 1
+                if not dry_run:
+                    thumbnail_default.kvstore.delete(source)
+    return deleted
+
+
+def collect_thumbnails(batch_size, min_age, dry_run=False):
+    """Функция удаляет файлы миниатюр, о которых не знает kvstore:
+    такие файлы sorl-thumbnail уже никогда не отдаст."""
+    deleted = 0
+    storage = thumbnail_default.storage
+    files = iter_storage_files(thumbnail_settings.THUMBNAIL_PREFIX, min_age)
+    for names in batched(files, batch_size):
+        keys = {
+            add_prefix(ImageFile(name, storage).key): name for name in names
+        }
+        known = set(KVStore.objects.filter(key__in=keys).values_list(
+            'key', flat=True
+        ))
+        for key, name in keys.items():
+            if key not in known:
+                deleted += 1
+                if not dry_run:
+                    storage.delete(name)
+    return deleted
@@ -0,0 +1,160 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.utils import timezone
+
+from tasks.queue import get_progress, report_progress
+
+from .models import Comment, Conversation, Favourite, Message
+
+User = get_user_model()
+
+# Кому отправляется рассылка: ключ -> (название, фильтр пользователей).
+BROADCAST_AUDIENCES = {
+    'all': ('Всем пользователям', lambda users: users),
+    'interlocutors': (
+        'Писавшим автору',
+        lambda users: users.filter(
+            conversation__last_incoming_time__isnull=False
+        ),
+    ),
+    'commenters': (
+        'Комментировавшим статьи',
+        lambda users: users.filter(
+            Exists(Comment.objects.filter(author=OuterRef('pk')))
+        ),
+    ),
+    'likers': (
+        'Ставившим лайки',
+        lambda users: users.filter(
+            Exists(Favourite.objects.filter(liker=OuterRef('pk')))
+        ),
+    ),
+}
+
+
+# Ключ кеша счетчика непрочитанных автором сообщений (по всем диалогам).
+AUTHOR_UNREAD_KEY = 'unread_messages:author'
+# Метка прочтения для переписки, которую еще ни разу не открывали.
+NEVER_READ = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_unread_cache_key(user_id):
+    return f'unread_messages:{user_id}'
+
+
+def record_messages(user_ids, direction, send_time):
+    """Функция учитывает новые сообщения в сводках переписки двумя
+    запросами на любую пачку пользователей: недостающие сводки
+    создаются одним INSERT, счетчики (в том числе непрочитанных
+    получателем) увеличиваются одним UPDATE. Закешированные счетчики
+    получателей сбрасываются."""
+    Conversation.objects.bulk_create(
+        [Conversation(interlocutor_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    updates = {
+        'message_count': F('message_count') + 1,
+        'last_message_time': send_time,
+    }
+    if direction == 'TO_AUTHOR':
+        updates['last_incoming_time'] = send_time
+        updates['unread_by_author'] = F('unread_by_author') + 1
+    else:
+        updates['unread_by_user'] = F('unread_by_user') + 1
+    Conversation.objects.filter(interlocutor__in=user_ids).update(**updates)
+    if direction == 'TO_AUTHOR':
+        cache.delete(AUTHOR_UNREAD_KEY)
+    else:
+        cache.delete_many([get_unread_cache_key(pk) for pk in user_ids])
+
+
+def count_unread(user):
+    """Функция считает непрочитанные сообщения: для автора (персонала) -
+    сумму по диалогам с новыми сообщениями (частичный индекс), для
+    пользователя - счетчик его сводки (уникальный индекс)."""
+    if user.is_staff:
+        return Conversation.objects.filter(unread_by_author__gt=0).aggregate(
+            total=Sum('unread_by_author')
+        )['total'] or 0
+    return Conversation.objects.filter(interlocutor=user).values_list(
+        'unread_by_user', flat=True
+    ).first() or 0
+
+
+def get_unread_count(user):
+    """Функция возвращает число непрочитанных сообщений из кеша, а при
+    промахе - одним индексированным запросом."""
+    key = AUTHOR_UNREAD_KEY if user.is_staff else get_unread_cache_key(
+        user.pk
+    )
+    return cache.get_or_set(
+        key, lambda: count_unread(user), settings.UNREAD_CACHE_TIMEOUT
+    )
+
+
+def read_conversation(user_id, by_author):
+    """Функция отмечает переписку прочитанной одной стороной: обнуляет
+    ее счетчик непрочитанных и сдвигает метку прочтения одним UPDATE
+    (только если новые сообщения есть). Возвращает время, после
+    которого сообщения считаются новыми, или None, если новых нет."""
+    counter, marker = (
+        ('unread_by_author', 'author_read_time') if by_author
+        else ('unread_by_user', 'user_read_time')
+    )
+    conversations = Conversation.objects.filter(interlocutor=user_id)
+    state = conversations.values_list(counter, marker).first()
+    if not state or not state[0]:
+        return None
+    conversations.update(**{counter: 0, marker: timezone.now()})
+    cache.delete(
+        AUTHOR_UNREAD_KEY if by_author else get_unread_cache_key(user_id)
+    )
+    return state[1] or NEVER_READ
+
+
+def get_broadcast_recipients(audience):
+    """Функция возвращает активных пользователей (кроме персонала)
+    из выбранной аудитории рассылки."""
+    users = User.objects.filter(is_active=True, is_staff=False)
+    return BROADCAST_AUDIENCES[audience][1](users)
+
+
+def send_broadcast(message_text, audience):
+    """Функция отправляет сообщение от автора всем получателям пачками
+    по BROADCAST_BATCH_SIZE: получатели выбираются по id (keyset),
+    сообщения создаются одним bulk_create, сводки обновляются
+    record_messages. Пачка и прогресс задачи фиксируются в одной
+    транзакции, поэтому повторная попытка после сбоя продолжает с
+    последнего отправленного id и не дублирует сообщения."""
+    recipients = get_broadcast_recipients(audience).order_by('pk')
+    progress = get_progress()
+    last_id = progress.get('last_id', 0)
+    sent = progress.get('sent', 0)
+    if 'total' not in progress:
+        report_progress(total=recipients.count(), sent=0, last_id=0)
+    while True:
+        user_ids = list(recipients.filter(pk__gt=last_id).values_list(
+            'pk', flat=True
+        )[:settings.BROADCAST_BATCH_SIZE])
+        if not user_ids:
+            return sent
+        send_time = timezone.now()
+        with transaction.atomic():
+            Message.objects.bulk_create([
+                Message(
+                    interlocutor_id=user_id,
+                    direction='FROM_AUTHOR',
+                    message_text=message_text,
+                )
+                for user_id in user_ids
+            ])
+            record_messages(user_ids, 'FROM_AUTHOR', send_time)
+            last_id = user_ids[-1]
+            sent += len(user_ids)
+            report_progress(sent=sent, last_id=last_id)
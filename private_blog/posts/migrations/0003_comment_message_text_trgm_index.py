@@ -0,0 +1,37 @@
+from django.db import migrations
+
+INDEXES = (
+    ('posts_comment_text_trgm', 'posts_comment', 'comment_text'),
+    ('posts_message_text_trgm', 'posts_message', 'message_text'),
+)
+
+
+def create_trgm_indexes(apps, schema_editor):
+    """Триграммные GIN-индексы под поиск админки (icontains превращается
+    в UPPER(col::text) LIKE UPPER(...)). Создаются только в PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_alter_post_subheader_alter_post_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
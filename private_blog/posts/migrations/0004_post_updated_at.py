@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_comment_message_text_trgm_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Время последнего сохранения'),
+        ),
+    ]
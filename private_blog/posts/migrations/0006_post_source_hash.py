@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='Хеш импортированного файла'),
+        ),
+    ]
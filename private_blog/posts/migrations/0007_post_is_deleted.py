@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_source_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Скрыта до удаления'),
+        ),
+    ]
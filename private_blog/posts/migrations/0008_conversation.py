@@ -0,0 +1,54 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+import django.db.models.deletion
+
+
+def fill_conversations(apps, schema_editor):
+    """Сводки по существующей переписке считаются одним GROUP BY."""
+    Message = apps.get_model('posts', 'Message')
+    Conversation = apps.get_model('posts', 'Conversation')
+    summaries = Message.objects.order_by().values('interlocutor').annotate(
+        total=Count('pk'),
+        last_message=Max('send_time'),
+        last_incoming=Max('send_time', filter=Q(direction='TO_AUTHOR')),
+    )
+    Conversation.objects.bulk_create(
+        [
+            Conversation(
+                interlocutor_id=row['interlocutor'],
+                message_count=row['total'],
+                last_message_time=row['last_message'],
+                last_incoming_time=row['last_incoming'],
+            )
+            for row in summaries
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0007_post_is_deleted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_count', models.PositiveIntegerField(default=0, verbose_name='Сообщений')),
+                ('last_message_time', models.DateTimeField(blank=True, null=True, verbose_name='Последнее сообщение')),
+                ('last_incoming_time', models.DateTimeField(blank=True, null=True, verbose_name='Последнее сообщение автору')),
+                ('interlocutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='conversation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('interlocutor',),
+            },
+        ),
+        migrations.RunPython(fill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_history_read(apps, schema_editor):
+    """Переписка до появления счетчиков считается прочитанной."""
+    Conversation = apps.get_model('posts', 'Conversation')
+    Conversation.objects.update(
+        user_read_time=F('last_message_time'),
+        author_read_time=F('last_message_time'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_conversation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='author_read_time',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Прочитано автором'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_by_author',
+            field=models.PositiveIntegerField(default=0, verbose_name='Не прочитано автором'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='unread_by_user',
+            field=models.PositiveIntegerField(default=0, verbose_name='Не прочитано пользователем'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user_read_time',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Прочитано пользователем'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('unread_by_author__gt', 0)), fields=['unread_by_author'], name='conversation_unread_author'),
+        ),
+        migrations.RunPython(mark_history_read, migrations.RunPython.noop),
+    ]
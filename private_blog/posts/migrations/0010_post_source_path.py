@@ -0,0 +1,23 @@
+# Generated by Django 4.1.1 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_conversation_unread'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='source_path',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, unique=True, verbose_name='Путь импортированного файла'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='source_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True, verbose_name='Хеш импортированного файла'),
+        ),
+    ]
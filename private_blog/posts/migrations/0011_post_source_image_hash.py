@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_source_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='source_image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Хеш изображения импортированного файла'),
+        ),
+    ]
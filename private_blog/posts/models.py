@@ -1,9 +1,16 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, router
 
 User = get_user_model()
 
 
+class PostManager(models.Manager):
+    """Менеджер статей без скрытых, ожидающих фонового удаления."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Post(models.Model):
     """Класс Post создает БД SQL для хранения статей."""
 
@@ -27,12 +34,53 @@ class Post(models.Model):
         null=True,
         verbose_name='Дата последних изменений'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Время последнего сохранения'
+    )
     image = models.ImageField(
         upload_to='posts/',
         blank=True,
         null=True,
         verbose_name='Изображение'
     )
+    thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Миниатюры изображения'
+    )
+    source_path = models.CharField(
+        max_length=255,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Путь импортированного файла'
+    )
+    source_hash = models.CharField(
+        max_length=64,
+        db_index=True,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Хеш импортированного файла'
+    )
+    source_image_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Хеш изображения импортированного файла'
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Скрыта до удаления'
+    )
+
+    objects = PostManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date', '-pk')
@@ -85,6 +133,44 @@ class Comment(models.Model):
         return self.comment_text[:25]
 
 
+class FavouriteManager(models.Manager):
+    """Менеджер лайков с атомарным переключением лайка."""
+
+    def toggle(self, liker, post):
+        """Метод переключает лайк пользователя к статье и возвращает
+        True, если после вызова лайк стоит. Лайк удаляется одним
+        условным DELETE (с RETURNING, если его поддерживает БД),
+        а если удалять было нечего - добавляется через
+        INSERT ... ON CONFLICT DO NOTHING, поэтому одновременные
+        клики не приводят к IntegrityError."""
+        connection = connections[
+            self._db or router.db_for_write(self.model)
+        ]
+        opts = self.model._meta
+        quote_name = connection.ops.quote_name
+        sql = 'DELETE FROM {} WHERE {} = %s AND {} = %s'.format(
+            quote_name(opts.db_table),
+            quote_name(opts.get_field('liker').column),
+            quote_name(opts.get_field('favourite_post').column),
+        )
+        returning = connection.features.can_return_columns_from_insert
+        if returning:
+            sql += ' RETURNING {}'.format(quote_name(opts.pk.column))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [liker.pk, post.pk])
+            deleted = (
+                cursor.fetchone() is not None if returning
+                else cursor.rowcount > 0
+            )
+        if deleted:
+            return False
+        self.bulk_create(
+            [self.model(liker=liker, favourite_post=post)],
+            ignore_conflicts=True,
+        )
+        return True
+
+
 class Favourite(models.Model):
     """Класс создает БД SQL для хранения
     информации о лайках к статьям."""
@@ -100,6 +186,8 @@ class Favourite(models.Model):
         related_name='favourites'
     )
 
+    objects = FavouriteManager()
+
     class Meta:
         unique_together = ['liker', 'favourite_post']
 
@@ -139,3 +227,65 @@ class Message(models.Model):
 
     def __str__(self):
         return self.message_text[:30]
+
+
+class Conversation(models.Model):
+    """Класс создает БД SQL для сводки по переписке автора с
+    пользователем: счетчики сообщений (всех и непрочитанных каждой
+    стороной), время последних сообщений и метки прочтения.
+    Сводка обновляется при добавлении сообщений (в том числе пачками
+    при рассылке), поэтому список диалогов не читает таблицу
+    сообщений."""
+
+    interlocutor = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='conversation',
+    )
+    message_count = models.PositiveIntegerField(
+        verbose_name='Сообщений',
+        default=0,
+    )
+    last_message_time = models.DateTimeField(
+        verbose_name='Последнее сообщение',
+        blank=True,
+        null=True,
+    )
+    last_incoming_time = models.DateTimeField(
+        verbose_name='Последнее сообщение автору',
+        blank=True,
+        null=True,
+    )
+    unread_by_user = models.PositiveIntegerField(
+        verbose_name='Не прочитано пользователем',
+        default=0,
+    )
+    unread_by_author = models.PositiveIntegerField(
+        verbose_name='Не прочитано автором',
+        default=0,
+    )
+    user_read_time = models.DateTimeField(
+        verbose_name='Прочитано пользователем',
+        blank=True,
+        null=True,
+    )
+    author_read_time = models.DateTimeField(
+        verbose_name='Прочитано автором',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        ordering = ('interlocutor',)
+        indexes = [
+            # Счетчик непрочитанных автором суммируется только по
+            # диалогам с новыми сообщениями, которых немного.
+            models.Index(
+                fields=('unread_by_author',),
+                condition=models.Q(unread_by_author__gt=0),
+                name='conversation_unread_author',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.interlocutor} ({self.message_count})'
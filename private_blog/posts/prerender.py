@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import Post
+from .utilities import write_file_atomic
+
+
+def get_page_file(path):
+    """Функция возвращает файл для пререндера страницы: /5/ ->
+    PRERENDER_ROOT/5/index.html. nginx ищет его через try_files."""
+    return settings.PRERENDER_ROOT.joinpath(path.strip('/'), 'index.html')
+
+
+def get_shared_paths():
+    """Функция возвращает пути общих страниц, которые не относятся
+    к конкретной статье."""
+    return [reverse('index'), reverse('about')]
+
+
+def render_page(path):
+    """Функция рендерит страницу так, как ее увидит анонимный посетитель,
+    и записывает HTML в PRERENDER_ROOT. Если страница не отдает 200
+    (например, статья удалена), старый файл удаляется."""
+    match = resolve(path)
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        response = None
+    if response is None or response.status_code != 200:
+        get_page_file(path).unlink(missing_ok=True)
+        return False
+    write_file_atomic(get_page_file(path), response.content)
+    return True
+
+
+def get_default_shared_paths():
+    """Функция возвращает общие страницы, в которых видны счетчики
+    статьи: главную."""
+    return [reverse('index')]
+
+
+def publish_post(post_id, shared_paths=None):
+    """Функция перерисовывает страницу статьи и общие страницы,
+    в которых видны ее счетчики (по умолчанию - главную)."""
+    render_page(reverse('post_view', args=[post_id]))
+    publish_paths(
+        get_default_shared_paths() if shared_paths is None else shared_paths
+    )
+
+
+def publish_paths(paths):
+    """Функция перерисовывает переданные общие страницы."""
+    for path in paths:
+        render_page(path)
+
+
+def publish_all():
+    """Функция перерисовывает общие страницы и страницы всех статей.
+    Возвращает число записанных файлов."""
+    published = 0
+    for path in get_shared_paths():
+        published += render_page(path)
+    post_ids = Post.objects.order_by().values_list('pk', flat=True)
+    for post_id in post_ids.iterator():
+        published += render_page(reverse('post_view', args=[post_id]))
+    return published
+
+
+def unpublish(post_id=None, shared_paths=None):
+    """Функция удаляет устаревшие файлы, чтобы nginx сразу отправлял
+    запросы в Django, пока фоновая задача не перерисует страницы:
+    страницу статьи post_id и общие страницы shared_paths (по умолчанию
+    главную). Без аргументов удаляются все файлы - это нужно, только
+    когда меняется блок 'Еще', который есть на всех страницах."""
+    if post_id is None and shared_paths is None:
+        paths = list(settings.PRERENDER_ROOT.rglob('index.html'))
+    else:
+        if shared_paths is None:
+            shared_paths = get_default_shared_paths()
+        paths = [get_page_file(path) for path in shared_paths]
+        if post_id is not None:
+            paths.append(
+                get_page_file(reverse('post_view', args=[post_id]))
+            )
+    for path in paths:
+        path.unlink(missing_ok=True)
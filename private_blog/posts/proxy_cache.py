@@ -0,0 +1,59 @@
+import logging
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+# Ключ кеша nginx включает вариант сжатия ($cache_encoding),
+# поэтому каждая страница обновляется во всех вариантах.
+PURGE_ENCODINGS = ('br', 'gzip', 'identity')
+SHARED_PAGES = ('index', 'posts_rss', 'posts_atom', 'api_post_list')
+POST_PAGES = (
+    'post_view', 'comments', 'comments_rss', 'comments_atom',
+    'api_post_detail', 'api_comment_list',
+)
+
+
+def get_purge_paths(post_id=None, shared=True):
+    """Функция возвращает пути страниц, которые меняются вместе со
+    статьей: общие страницы (если shared) и, если передан post_id,
+    страницы статьи. Остальные адреса (другие страницы главной,
+    запросы к API с параметрами) обновятся сами через
+    PROXY_CACHE_TIMEOUT."""
+    paths = [reverse(name) for name in SHARED_PAGES] if shared else []
+    if post_id is not None:
+        paths += [reverse(name, args=[post_id]) for name in POST_PAGES]
+    return paths
+
+
+def purge(paths):
+    """Функция обновляет страницы в кеше nginx. Открытая сборка nginx не
+    умеет удалять записи, поэтому страницы запрашиваются через
+    внутренний server (PROXY_CACHE_PURGE_URL): он всегда идет в Django
+    мимо кеша (proxy_cache_bypass) и кладет в кеш свежий ответ.
+    Без PROXY_CACHE_PURGE_URL (разработка, тесты) ничего не делает.
+    Возвращает число обновленных записей."""
+    base_url = settings.PROXY_CACHE_PURGE_URL.rstrip('/')
+    if not base_url:
+        return 0
+    refreshed = 0
+    for path in paths:
+        for encoding in PURGE_ENCODINGS:
+            request = Request(
+                base_url + path, headers={'Accept-Encoding': encoding}
+            )
+            try:
+                with urlopen(
+                    request, timeout=settings.PROXY_CACHE_PURGE_TIMEOUT
+                ) as response:
+                    response.read()
+            except URLError as error:
+                # 404 удаленной статьи тоже обновляет запись в кеше.
+                if getattr(error, 'code', None) != 404:
+                    logger.warning('Не удалось обновить %s: %s', path, error)
+                    continue
+            refreshed += 1
+    return refreshed
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_index_cache
+from .messaging import AUTHOR_UNREAD_KEY, get_unread_cache_key, record_messages
+from .models import Comment, Conversation, Message, Post
+from .tasks import (delete_replaced_image, refresh_post_pages,
+                    refresh_published_pages, schedule_proxy_cache_purge,
+                    schedule_sitemaps_update)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def content_changed(sender, instance, **kwargs):
+    """При изменении статей и комментариев сбрасываем кеш главной
+    и статические копии затронутых страниц, планируем обновление кеша
+    nginx и карты сайта."""
+    invalidate_index_cache()
+    if sender is Post:
+        refresh_post_pages([instance])
+    else:
+        refresh_published_pages(instance.post_id)
+    post_id = instance.pk if sender is Post else instance.post_id
+    schedule_proxy_cache_purge(post_id)
+    schedule_sitemaps_update([post_id])
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    """Запоминаем имя файла изображения, с которым статья загружена
+    из БД, чтобы после сохранения понять, заменено ли оно."""
+    instance._original_image = instance.__dict__.get('image')
+
+
+def schedule_image_cleanup(name):
+    """Удаление файла ставим в очередь только после коммита: при откате
+    транзакции старое изображение должно остаться на месте."""
+    transaction.on_commit(lambda: delete_replaced_image.delay(name))
+
+
+@receiver(post_save, sender=Post)
+def image_replaced(sender, instance, **kwargs):
+    """При замене или удалении изображения статьи чистим старый файл."""
+    original = getattr(instance, '_original_image', None)
+    current = instance.image.name
+    if original and original != current:
+        schedule_image_cleanup(original)
+    instance._original_image = current
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """При удалении статьи чистим ее изображение."""
+    if instance.image:
+        schedule_image_cleanup(instance.image.name)
+
+
+@receiver(post_save, sender=Message)
+def message_added(sender, instance, created, **kwargs):
+    """Новое сообщение учитываем в сводке переписки."""
+    if created:
+        record_messages(
+            [instance.interlocutor_id], instance.direction, instance.send_time
+        )
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    """Удаленное сообщение вычитаем из счетчика сводки, а если его еще
+    не прочитали - и из счетчика непрочитанных получателем."""
+    counter, marker = (
+        ('unread_by_author', 'author_read_time')
+        if instance.direction == 'TO_AUTHOR'
+        else ('unread_by_user', 'user_read_time')
+    )
+    unread = Q(**{f'{marker}__isnull': True}) | Q(
+        **{f'{marker}__lt': instance.send_time}
+    )
+    Conversation.objects.filter(
+        interlocutor=instance.interlocutor_id, message_count__gt=0
+    ).update(
+        message_count=F('message_count') - 1,
+        **{counter: Case(
+            When(unread, **{f'{counter}__gt': 0}, then=F(counter) - 1),
+            default=F(counter),
+            output_field=PositiveIntegerField(),
+        )},
+    )
+    cache.delete(
+        AUTHOR_UNREAD_KEY if instance.direction == 'TO_AUTHOR'
+        else get_unread_cache_key(instance.interlocutor_id)
+    )
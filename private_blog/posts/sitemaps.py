@@ -0,0 +1,212 @@
+import fcntl
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Comment, Post
+from .utilities import absolute_url, write_file_atomic
+
+SITEMAP_INDEX = 'sitemap.xml'
+SITEMAP_PAGES = 'sitemap-pages.xml'
+SITEMAP_STATE = 'sitemap-state.json'
+SITEMAP_LOCK = 'sitemap.lock'
+
+
+def get_chunk_file_name(chunk):
+    """Функция возвращает имя файла куска карты сайта."""
+    return f'sitemap-posts-{chunk + 1}.xml'
+
+
+def get_chunk(post_id):
+    """Функция возвращает номер куска карты сайта, в который попадает
+    статья (так же, как _chunk_of в запросах)."""
+    return (post_id - 1) // settings.SITEMAP_CHUNK_SIZE
+
+
+def _in_chunks(field, chunks):
+    """Условие на диапазоны id статей перечисленных кусков: по индексу
+    читаются только строки этих кусков."""
+    size = settings.SITEMAP_CHUNK_SIZE
+    condition = Q(pk__in=[])
+    for chunk in chunks:
+        condition |= Q(**{
+            f'{field}__gt': chunk * size,
+            f'{field}__lte': (chunk + 1) * size,
+        })
+    return condition
+
+
+def _chunk_of(field):
+    """Выражение номера куска: статьи делятся на куски по диапазонам id,
+    поэтому изменение статьи затрагивает ровно один кусок."""
+    return ExpressionWrapper(
+        (F(field) - 1) / settings.SITEMAP_CHUNK_SIZE,
+        output_field=IntegerField(),
+    )
+
+
+def get_chunk_signatures(chunks=None):
+    """Функция двумя групповыми запросами считает подпись каждого куска
+    (или только кусков chunks): число статей и время последнего
+    сохранения, число комментариев и время последнего из них. Подпись
+    меняется при любом добавлении, изменении или удалении статьи или
+    комментария в куске."""
+    signatures = {}
+    posts = Post.objects.all()
+    comments = Comment.objects.all()
+    if chunks is not None:
+        posts = posts.filter(_in_chunks('pk', chunks))
+        comments = comments.filter(_in_chunks('post_id', chunks))
+    posts = posts.order_by().annotate(
+        chunk=_chunk_of('pk'),
+    ).values('chunk').annotate(
+        total=Count('pk'),
+        last_update=Max('updated_at'),
+    )
+    for row in posts:
+        signatures[row['chunk']] = [
+            row['total'], row['last_update'].isoformat()
+        ]
+    comments = comments.order_by().annotate(
+        chunk=_chunk_of('post_id'),
+    ).values('chunk').annotate(
+        total=Count('pk'),
+        last_comment=Max('created'),
+    )
+    for row in comments:
+        if row['chunk'] in signatures:
+            signatures[row['chunk']] += [
+                row['total'], row['last_comment'].isoformat()
+            ]
+    return {
+        chunk: '|'.join(str(part) for part in signature)
+        for chunk, signature in signatures.items()
+    }
+
+
+def get_post_lastmod(post):
+    """Функция возвращает дату последнего изменения статьи для карты
+    сайта: дату правки (или публикации) либо дату свежего комментария."""
+    lastmod = post['modify_date'] or post['pub_date']
+    if post['last_comment'] is None:
+        return lastmod
+    return max(lastmod, timezone.localdate(post['last_comment']))
+
+
+def render_chunk(chunk):
+    """Функция рендерит кусок карты сайта и возвращает XML и дату
+    (ISO 8601) самого свежего изменения в куске либо None, если статьи
+    куска успели удалить."""
+    size = settings.SITEMAP_CHUNK_SIZE
+    posts = Post.objects.filter(
+        pk__gt=chunk * size,
+        pk__lte=(chunk + 1) * size,
+    ).order_by('pk').annotate(
+        last_comment=Max('comment__created'),
+    ).values('pk', 'pub_date', 'modify_date', 'last_comment')
+    urls = [
+        {
+            'loc': absolute_url(reverse('post_view', args=[post['pk']])),
+            'lastmod': get_post_lastmod(post).isoformat(),
+        }
+        for post in posts
+    ]
+    if not urls:
+        return None
+    lastmod = max(url['lastmod'] for url in urls)
+    xml = render_to_string('sitemaps/urlset.xml', {'urls': urls})
+    return xml, lastmod
+
+
+def _load_state(root):
+    try:
+        with open(root / SITEMAP_STATE, encoding='utf-8') as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def _locked(root):
+    """Блокировка каталога карты сайта: задачи разных кусков могут
+    выполняться одновременно, а файл состояния и индекс общие."""
+    with open(root / SITEMAP_LOCK, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def update_sitemaps(full=False, chunks=None):
+    """Функция обновляет статические файлы карты сайта в SITEMAP_ROOT.
+    Перерисовываются только куски, подпись которых изменилась с прошлого
+    запуска (или файл которых пропал); куски без статей удаляются.
+    Со списком chunks подписи считаются только для этих кусков (их
+    отмечают сигналы правок), без него - для всех. Возвращает список
+    номеров перерисованных кусков."""
+    root = settings.SITEMAP_ROOT
+    root.mkdir(parents=True, exist_ok=True)
+    with _locked(root):
+        state = {} if full else _load_state(root)
+        signatures = get_chunk_signatures(None if full else chunks)
+        updated = []
+        for chunk, signature in sorted(signatures.items()):
+            saved = state.get(str(chunk))
+            if (saved and saved['signature'] == signature
+                    and (root / get_chunk_file_name(chunk)).exists()):
+                continue
+            rendered = render_chunk(chunk)
+            if rendered is None:
+                del signatures[chunk]
+                continue
+            xml, lastmod = rendered
+            write_file_atomic(root / get_chunk_file_name(chunk), xml)
+            state[str(chunk)] = {'signature': signature, 'lastmod': lastmod}
+            updated.append(chunk)
+        checked = set(state) if full or chunks is None else {
+            str(chunk) for chunk in chunks
+        }
+        removed = checked & set(state) - {
+            str(chunk) for chunk in signatures
+        }
+        for chunk in removed:
+            (root / get_chunk_file_name(int(chunk))).unlink(missing_ok=True)
+            del state[chunk]
+        if (updated or removed
+                or not (root / SITEMAP_INDEX).exists()
+                or not (root / SITEMAP_PAGES).exists()):
+            _write_index(root, state)
+            write_file_atomic(root / SITEMAP_STATE, json.dumps(state))
+    return updated
+
+
+def _write_index(root, state):
+    """Функция записывает карту общих страниц и индекс карт сайта."""
+    lastmod = max(
+        (entry['lastmod'] for entry in state.values()), default=None
+    )
+    pages = [
+        {'loc': absolute_url(reverse('index')), 'lastmod': lastmod},
+        {'loc': absolute_url(reverse('about'))},
+    ]
+    write_file_atomic(
+        root / SITEMAP_PAGES,
+        render_to_string('sitemaps/urlset.xml', {'urls': pages}),
+    )
+    sitemaps = [{'loc': absolute_url('/' + SITEMAP_PAGES)}]
+    sitemaps += [
+        {
+            'loc': absolute_url('/' + get_chunk_file_name(int(chunk))),
+            'lastmod': entry['lastmod'],
+        }
+        for chunk, entry in sorted(
+            state.items(), key=lambda item: int(item[0])
+        )
+    ]
+    write_file_atomic(
+        root / SITEMAP_INDEX,
+        render_to_string('sitemaps/index.xml', {'sitemaps': sitemaps}),
+    )
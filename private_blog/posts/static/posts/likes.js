@@ -0,0 +1,35 @@
+// Переключение лайка без перезагрузки страницы. Без JS ссылка
+// продолжает работать как раньше (GET /<id>/like/ с редиректом).
+(function () {
+  function getCookie(name) {
+    var match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+    return match ? decodeURIComponent(match[1]) : null;
+  }
+
+  document.addEventListener('click', function (event) {
+    var link = event.target.closest('a[data-like-toggle]');
+    if (!link) {
+      return;
+    }
+    event.preventDefault();
+    event.stopPropagation();
+    var wrapper = link.closest('.likes-comments');
+    fetch(link.dataset.likeToggle + '?format=html', {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: {
+        'X-CSRFToken': getCookie('csrftoken') || '',
+        'X-Requested-With': 'XMLHttpRequest'
+      }
+    }).then(function (response) {
+      if (!response.ok || response.redirected) {
+        throw new Error('like toggle failed');
+      }
+      return response.text();
+    }).then(function (html) {
+      wrapper.outerHTML = html;
+    }).catch(function () {
+      window.location.href = link.href;
+    });
+  });
+})();
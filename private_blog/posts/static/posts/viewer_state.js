@@ -0,0 +1,46 @@
+// Гидратация общей (анонимной) оболочки страницы: запрашивает состояние
+// текущего пользователя и подставляет меню, значок непрочитанных
+// сообщений, лайки и их счетчики (в кеше главной они не обновляются).
+(function () {
+  var stateUrl = document.currentScript.dataset.stateUrl;
+
+  function isVisible(role, state) {
+    if (role === 'guest') {
+      return !state.authenticated;
+    }
+    if (role === 'user') {
+      return state.authenticated;
+    }
+    return state.is_staff;
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    var wrappers = document.querySelectorAll('.likes-comments[data-post-id]');
+    var ids = Array.prototype.map.call(wrappers, function (wrapper) {
+      return wrapper.dataset.postId;
+    });
+    fetch(stateUrl + '?posts=' + ids.join(','), {
+      credentials: 'same-origin'
+    }).then(function (response) {
+      return response.json();
+    }).then(function (state) {
+      document.querySelectorAll('[data-auth]').forEach(function (element) {
+        element.hidden = !isVisible(element.dataset.auth, state);
+      });
+      document.querySelectorAll('[data-unread]').forEach(function (badge) {
+        var shown = state.unread > 0 &&
+          (badge.dataset.unread === 'staff') === state.is_staff;
+        badge.textContent = shown ? state.unread : '';
+        badge.hidden = !shown;
+      });
+      wrappers.forEach(function (wrapper) {
+        var postId = wrapper.dataset.postId;
+        var liked = state.liked.indexOf(Number(postId)) !== -1;
+        wrapper.querySelector('[data-like-icon="on"]').hidden = !liked;
+        wrapper.querySelector('[data-like-icon="off"]').hidden = liked;
+        wrapper.querySelector('[data-like-count]').textContent =
+          state.likes[postId] || 0;
+      });
+    });
+  });
+})();
@@ -0,0 +1,190 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from tasks.queue import enqueue, task
+
+from .caching import invalidate_index_cache, invalidate_like_counts
+from .deletion import delete_post, delete_user
+from .media import delete_image_if_orphaned
+from .messaging import send_broadcast
+from .models import Post
+from .prerender import (get_default_shared_paths, publish_all, publish_paths,
+                        publish_post, unpublish)
+from .proxy_cache import get_purge_paths, purge
+from .sitemaps import get_chunk, update_sitemaps
+from .thumbnails import build_thumbnails
+from .utilities import changes_also_lists
+
+
+@task
+def generate_thumbnails(post_id):
+    """Задача заранее создает миниатюры изображения статьи, чтобы
+    первый просмотр страницы не ждал обработки картинки в Pillow, и
+    сохраняет их адреса в Post.thumbnails. Запись идет через update()
+    с проверкой имени файла: если изображение успели заменить,
+    устаревшие адреса не сохранятся."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnails=build_thumbnails(post)
+    )
+
+
+@task
+def delete_replaced_image(name):
+    """Задача удаляет замененное или оставшееся от удаленной статьи
+    изображение вместе с миниатюрами, если оно больше не используется."""
+    delete_image_if_orphaned(name)
+
+
+@task
+def build_sitemaps(chunk=None):
+    """Задача обновляет кусок chunk статической карты сайта или, без
+    аргумента, проверяет подписи всех кусков."""
+    update_sitemaps(chunks=None if chunk is None else [chunk])
+
+
+def _enqueue_debounced(func, delay, *args, now=None):
+    """Функция откладывает задачу до конца текущего окна в delay секунд.
+    Ключ уникальности включает аргументы и номер окна, поэтому серия
+    правок дает одну задачу, а не задачу на каждую правку."""
+    now = now or datetime.now(timezone.utc)
+    slot = int(now.timestamp() // delay)
+    key_args = ','.join(str(arg) for arg in args)
+    enqueue(
+        func.task_name,
+        args,
+        run_at=datetime.fromtimestamp((slot + 1) * delay, timezone.utc),
+        unique_key=f'{func.task_name}({key_args})@{slot}',
+    )
+
+
+def schedule_sitemaps_update(post_ids=None, now=None):
+    """Функция планирует обновление кусков карты сайта, в которые
+    попадают статьи post_ids (без них - проверку всех кусков), не чаще
+    раза в SITEMAP_UPDATE_DELAY секунд на кусок."""
+    if post_ids is None:
+        _enqueue_debounced(
+            build_sitemaps, settings.SITEMAP_UPDATE_DELAY, now=now
+        )
+        return
+    for chunk in sorted({get_chunk(post_id) for post_id in post_ids}):
+        _enqueue_debounced(
+            build_sitemaps, settings.SITEMAP_UPDATE_DELAY, chunk, now=now
+        )
+
+
+@task
+def publish_pages(post_id=None, shared_paths=None):
+    """Задача перерисовывает статические копии публичных страниц:
+    страницу статьи и общие страницы shared_paths (по умолчанию
+    главную) или, без аргументов, все страницы."""
+    if post_id is None and shared_paths is None:
+        publish_all()
+    elif post_id is None:
+        publish_paths(shared_paths)
+    else:
+        publish_post(post_id, shared_paths)
+
+
+def refresh_published_pages(post_id=None, shared_paths=None):
+    """Функция сразу удаляет устаревшие статические копии страниц
+    (nginx начинает отправлять запросы в Django) и планирует их
+    перерисовку через PRERENDER_DELAY секунд. Аргументы те же, что
+    у publish_pages: без них обновляются все страницы."""
+    unpublish(post_id, shared_paths)
+    args = (post_id,)
+    if shared_paths is not None:
+        args += (list(shared_paths),)
+    elif post_id is None:
+        args = ()
+    _enqueue_debounced(publish_pages, settings.PRERENDER_DELAY, *args)
+
+
+def refresh_post_pages(posts):
+    """Функция обновляет статические копии после изменения, скрытия
+    или удаления статей: все страницы - только если статьи видны в
+    блоке 'Еще', иначе страницы этих статей и главную."""
+    if changes_also_lists(posts):
+        refresh_published_pages()
+        return
+    for post in posts:
+        refresh_published_pages(post.pk, shared_paths=[])
+    refresh_published_pages(shared_paths=get_default_shared_paths())
+
+
+@task
+def purge_proxy_cache(post_id=None, shared=True):
+    """Задача обновляет в кеше nginx страницы статьи и, если shared,
+    общие страницы."""
+    purge(get_purge_paths(post_id, shared))
+
+
+def schedule_proxy_cache_purge(post_id=None, shared=True):
+    """Функция планирует обновление кеша nginx. Серия правок одной
+    статьи за PROXY_CACHE_PURGE_DELAY секунд дает одну задачу."""
+    args = () if post_id is None else (post_id,)
+    if not shared:
+        args += (False,)
+    _enqueue_debounced(
+        purge_proxy_cache, settings.PROXY_CACHE_PURGE_DELAY, *args
+    )
+
+
+def refresh_after_like(post_id):
+    """Функция обновляет то, что зависит от лайков статьи: ответы API,
+    статическую копию и кеш nginx страниц статьи. Общий кеш главной не
+    сбрасывается: счетчики на ней подставляет viewer_state."""
+    invalidate_like_counts()
+    refresh_published_pages(post_id, shared_paths=[])
+    schedule_proxy_cache_purge(post_id, shared=False)
+
+
+def refresh_after_bulk_delete(post_ids):
+    """Функция один раз выполняет то, что сигналы делают на каждое
+    удаление комментариев и лайков: сбрасывает кеш главной, обновляет
+    статические копии страниц затронутых статей и главной, планирует
+    обновление кеша nginx и карты сайта."""
+    invalidate_index_cache()
+    for post_id in post_ids:
+        refresh_published_pages(post_id, shared_paths=[])
+        schedule_proxy_cache_purge(post_id)
+    refresh_published_pages(shared_paths=get_default_shared_paths())
+    schedule_sitemaps_update(post_ids)
+
+
+@task
+def delete_post_data(post_id):
+    """Задача удаляет скрытую статью вместе с комментариями и лайками."""
+    delete_post(post_id)
+
+
+@task
+def delete_user_data(user_id):
+    """Задача удаляет пользователя вместе с комментариями, лайками
+    и перепиской."""
+    _, post_ids = delete_user(user_id)
+    refresh_after_bulk_delete(post_ids)
+
+
+def hide_and_delete_posts(posts):
+    """Функция сразу скрывает статьи (Post.objects их больше не
+    возвращает), один раз обновляет кеши и статические копии страниц
+    и ставит удаление каждой статьи в очередь."""
+    post_ids = [post.pk for post in posts]
+    Post.all_objects.filter(pk__in=post_ids).update(is_deleted=True)
+    invalidate_index_cache()
+    refresh_post_pages(posts)
+    for post_id in post_ids:
+        schedule_proxy_cache_purge(post_id)
+        delete_post_data.delay(post_id)
+    schedule_sitemaps_update(post_ids)
+
+
+@task(max_attempts=5)
+def broadcast_message(message_text, audience):
+    """Задача рассылает сообщение от автора выбранной аудитории.
+    Прогресс (total, sent) виден на странице рассылки и в админке."""
+    send_broadcast(message_text, audience)
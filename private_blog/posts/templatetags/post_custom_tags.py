@@ -1,5 +1,7 @@
 from django import template
 
+from posts.thumbnails import get_post_thumbnail
+
 register = template.Library()
 
 
@@ -11,3 +13,8 @@ def check_like(post, user):
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={"class": css})
+
+
+@register.simple_tag
+def post_thumbnail(post, geometry):
+    return get_post_thumbnail(post, geometry)
@@ -0,0 +1,140 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Favourite, Post, User
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='UserOne')
+        cls.posts = [
+            Post.objects.create(
+                title=f'Статья {number}',
+                subheader='Подзаголовок',
+                text='Текст статьи',
+            )
+            for number in range(5)
+        ]
+        cls.post = cls.posts[0]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                comment_text=f'Комментарий {number}',
+            )
+        Favourite.objects.create(liker=cls.user, favourite_post=cls.post)
+        cls.client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_list_cursor_pagination(self):
+        """Курсор проходит все статьи без повторов, новые первыми."""
+        url = reverse('api_post_list')
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen += [row['id'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(
+            seen, sorted((post.id for post in self.posts), reverse=True)
+        )
+
+    def test_post_fields_and_counts(self):
+        """?fields= ограничивает поля, счетчики считаются по запросу."""
+        response = self.client.get(
+            reverse('api_post_detail', args=[self.post.id]),
+            {'fields': 'title,like_count,comment_count'},
+        )
+        self.assertEqual(response.json(), {
+            'id': self.post.id,
+            'title': self.post.title,
+            'like_count': 1,
+            'comment_count': 3,
+            'url': reverse('post_view', args=[self.post.id]),
+        })
+        response = self.client.get(
+            reverse('api_post_list'), {'fields': 'title,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('api_post_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_list(self):
+        """Комментарии отдаются по порядку с именем автора."""
+        response = self.client.get(
+            reverse('api_comment_list', args=[self.post.id]),
+            {'fields': 'author,comment_text', 'limit': 10},
+        )
+        data = response.json()
+        self.assertIsNone(data['next'])
+        self.assertEqual(
+            [row['comment_text'] for row in data['results']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        self.assertEqual(data['results'][0]['author'], self.user.username)
+
+    def test_cache_etag_and_invalidation(self):
+        """Повтор отдается из кеша без запросов к БД, с If-None-Match -
+        304, а новый комментарий сбрасывает кеш и меняет ETag."""
+        url = reverse('api_post_detail', args=[self.post.id])
+        url += '?fields=comment_count'
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post, author=self.user, comment_text='Новый'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_survives_cache_reset(self):
+        """После очистки кеша версии начинаются заново, но ETag зависит
+        от данных: измененный ответ не превращается в 304."""
+        url = reverse('api_post_detail', args=[self.post.id])
+        url += '?fields=comment_count'
+        etag = self.client.get(url)['ETag']
+        Comment.objects.bulk_create([Comment(
+            post=self.post, author=self.user, comment_text='Без сигнала'
+        )])
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_errors_have_no_etag(self):
+        """Ответы 400 и 404 не получают ETag и не заменяются на 304."""
+        for url, params, status in (
+            (reverse('api_post_list'), {'fields': 'password'}, 400),
+            (reverse('api_post_detail', args=[999]), {}, 404),
+        ):
+            with self.subTest(status=status):
+                response = self.client.get(url, params)
+                self.assertNotIn('ETag', response)
+                response = self.client.get(
+                    url, params, HTTP_IF_NONE_MATCH='*'
+                )
+                self.assertEqual(response.status_code, status)
+
+    def test_benchmark_command(self):
+        """Команда сравнения HTML и API отрабатывает на всех сценариях."""
+        out = StringIO()
+        call_command('bench_views', requests=1, stdout=out)
+        self.assertIn('Статья, API', out.getvalue())
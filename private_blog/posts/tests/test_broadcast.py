@@ -0,0 +1,109 @@
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.messaging import record_messages
+from posts.models import Comment, Conversation, Message, Post, User
+from posts.tasks import broadcast_message
+from tasks.models import Task
+
+
+@override_settings(BROADCAST_BATCH_SIZE=2, TASK_SCHEDULE={})
+class BroadcastTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Author', is_staff=True
+        )
+        cls.readers = [
+            User.objects.create_user(username=f'Reader{number}')
+            for number in range(5)
+        ]
+        User.objects.create_user(username='Inactive', is_active=False)
+        post = Post.objects.create(
+            title='Статья', subheader='Подзаголовок', text='Текст'
+        )
+        Comment.objects.create(
+            post=post, author=cls.readers[0], comment_text='Комментарий'
+        )
+        Message.objects.create(
+            interlocutor=cls.readers[1], direction='TO_AUTHOR',
+            message_text='Вопрос автору',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def run_broadcast(self, audience='all'):
+        response = self.client.post(reverse('broadcast'), {
+            'message_text': 'Новости блога', 'audience': audience,
+        })
+        self.assertRedirects(response, reverse('broadcast'))
+        call_command('run_workers', once=True)
+        return Task.objects.get(name=broadcast_message.task_name)
+
+    def test_broadcast_to_all_users(self):
+        """Сообщение получают все активные пользователи, кроме
+        персонала; сводки переписки и прогресс обновляются."""
+        task = self.run_broadcast()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.progress['sent'], 5)
+        self.assertEqual(task.progress['total'], 5)
+        received = Message.objects.filter(
+            direction='FROM_AUTHOR', message_text='Новости блога'
+        )
+        self.assertEqual(
+            set(received.values_list('interlocutor', flat=True)),
+            {reader.pk for reader in self.readers},
+        )
+        conversation = Conversation.objects.get(interlocutor=self.readers[1])
+        self.assertEqual(conversation.message_count, 2)
+        self.assertIsNotNone(conversation.last_incoming_time)
+        self.assertIsNone(Conversation.objects.get(
+            interlocutor=self.readers[2]
+        ).last_incoming_time)
+        response = self.client.get(reverse('broadcast'))
+        self.assertContains(response, '5 из 5')
+
+    def test_broadcast_to_filtered_audience(self):
+        """Фильтр аудитории ограничивает получателей."""
+        self.run_broadcast('commenters')
+        self.assertEqual(
+            list(Message.objects.filter(direction='FROM_AUTHOR')
+                 .values_list('interlocutor', flat=True)),
+            [self.readers[0].pk],
+        )
+
+    def test_broadcast_resumes_after_failure(self):
+        """Повторная попытка продолжает с последнего отправленного id."""
+        broadcast_message.delay('Новости блога', 'all')
+        tasks = Task.objects.filter(name=broadcast_message.task_name)
+        tasks.update(progress={
+            'total': 5, 'sent': 2, 'last_id': self.readers[1].pk,
+        })
+        call_command('run_workers', once=True)
+        self.assertEqual(
+            Message.objects.filter(direction='FROM_AUTHOR').count(), 3
+        )
+        self.assertEqual(tasks.get().progress['sent'], 5)
+
+    def test_dialogs_list_skips_broadcast_only_users(self):
+        """В диалогах только пользователи, писавшие автору."""
+        self.run_broadcast()
+        response = self.client.get(reverse('message_reply'))
+        self.assertEqual(response.context['interlocutors'],
+                         [self.readers[1]])
+
+    def test_record_messages_is_constant_in_queries(self):
+        """Сводки пачки пользователей обновляются двумя запросами."""
+        user_ids = [reader.pk for reader in self.readers]
+        with self.assertNumQueries(2):
+            record_messages(user_ids, 'FROM_AUTHOR', None)
+
+    def test_broadcast_page_is_for_staff_only(self):
+        client = Client()
+        client.force_login(self.readers[0])
+        response = client.get(reverse('broadcast'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,122 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from posts.caching import (ENTRY_CACHE_VERSION, _should_recompute,
+                           get_or_compute)
+
+
+@override_settings(CACHE_LOCK_WAIT=2)
+class StampedeProtectionTests(SimpleTestCase):
+
+    threads_count = 8
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_compute(self, value='new', delay=0.2):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def run_concurrently(self, func):
+        barrier = threading.Barrier(self.threads_count)
+        results = []
+
+        def worker():
+            barrier.wait()
+            started = time.monotonic()
+            value = func()
+            results.append((value, time.monotonic() - started))
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(self.threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return list(results)
+
+    def test_cold_cache_is_computed_once(self):
+        """На холодном кеше значение считает один поток, остальные
+        дожидаются его результата."""
+        compute = self.slow_compute()
+        results = self.run_concurrently(
+            lambda: get_or_compute('key', compute, 60)
+        )
+        self.assertEqual(self.calls, 1)
+        self.assertEqual({value for value, _ in results}, {'new'})
+
+    def test_stale_value_is_served_while_recomputing(self):
+        """После смены версии ключа один поток пересчитывает значение,
+        остальные сразу получают прежнее из stale_key."""
+        get_or_compute('key:1', lambda: 'old', 60, stale_key='latest')
+        compute = self.slow_compute()
+        results = self.run_concurrently(
+            lambda: get_or_compute('key:2', compute, 60, stale_key='latest')
+        )
+        self.assertEqual(self.calls, 1)
+        values = [value for value, _ in results]
+        self.assertEqual(values.count('new'), 1)
+        self.assertEqual(values.count('old'), self.threads_count - 1)
+        stale_times = [spent for value, spent in results if value == 'old']
+        self.assertLess(max(stale_times), 0.1)
+        self.assertEqual(get_or_compute('key:2', compute, 60), 'new')
+
+    @override_settings(CACHE_STAMPEDE_PROTECTION=False)
+    def test_without_protection_every_miss_recomputes(self):
+        """Без защиты каждый одновременный промах пересчитывает
+        значение (то, от чего защищает get_or_compute)."""
+        compute = self.slow_compute()
+        self.run_concurrently(lambda: get_or_compute('key', compute, 60))
+        self.assertEqual(self.calls, self.threads_count)
+
+    def test_entries_of_other_format_are_a_miss(self):
+        """Значения, записанные прежним кодом под тем же ключом или в
+        другом формате, не ломают чтение и пересчитываются."""
+        cache.set('key', '<html>старая страница</html>')
+        cache.set('other', 'не запись', version=ENTRY_CACHE_VERSION)
+        self.assertEqual(get_or_compute('key', lambda: 'new', 60), 'new')
+        self.assertEqual(get_or_compute('other', lambda: 'new', 60), 'new')
+
+    def test_protection_can_be_toggled(self):
+        """Записи обоих режимов читаются друг другом, поэтому
+        CACHE_STAMPEDE_PROTECTION переключается без очистки кеша."""
+        with override_settings(CACHE_STAMPEDE_PROTECTION=False):
+            get_or_compute('key', lambda: 'first', 60)
+        self.assertEqual(get_or_compute('key', lambda: 'second', 60), 'first')
+        get_or_compute('other', lambda: 'first', 60)
+        with override_settings(CACHE_STAMPEDE_PROTECTION=False):
+            self.assertEqual(
+                get_or_compute('other', lambda: 'second', 60), 'first'
+            )
+
+    def test_errors_are_not_cached(self):
+        """Исключение не кешируется и освобождает блокировку."""
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            get_or_compute('key', fail, 60)
+        self.assertIsNone(cache.get('key:lock'))
+        self.assertEqual(get_or_compute('key', lambda: 'ok', 60), 'ok')
+
+    def test_early_recompute_probability(self):
+        """Значение пересчитывается заранее только близко к сроку."""
+        now = time.time()
+        entry = {'value': 'x', 'delta': 1.0, 'expires': now + 100}
+        with mock.patch('posts.caching.random.random', return_value=0.5):
+            self.assertFalse(_should_recompute(entry, now))
+            self.assertTrue(_should_recompute(entry, now + 99.5))
+        with mock.patch('posts.caching.random.random', return_value=0.0):
+            self.assertFalse(_should_recompute(entry, now + 99))
@@ -0,0 +1,83 @@
+import gzip
+
+import brotli
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from private_blog.template_loaders import minify_html
+
+
+class MinifyHtmlTests(TestCase):
+
+    def test_indentation_collapsed_outside_preserved_blocks(self):
+        """Отступы схлопываются, а pre, textarea и script не меняются."""
+        source = (
+            '<div>\n    <p>\n      Текст\n    </p>\n</div>\n'
+            '<pre>\n  код\n    с отступом\n</pre>\n'
+            '<script>\n  let a = 1 // комментарий\n  a++\n</script>\n'
+        )
+        self.assertEqual(
+            minify_html(source),
+            '<div> <p> Текст </p> </div> '
+            '<pre>\n  код\n    с отступом\n</pre> '
+            '<script>\n  let a = 1 // комментарий\n  a++\n</script>',
+        )
+
+
+class CompressionTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(3):
+            Post.objects.create(
+                title=f'Статья {number}',
+                subheader='Подзаголовок',
+                text='Текст статьи',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_index_compressed_for_accepted_encodings(self):
+        """Ответ сжимается Brotli или gzip по Accept-Encoding."""
+        plain = self.client.get(reverse('index'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        cases = (
+            ('gzip, deflate, br', 'br', brotli.decompress),
+            ('gzip, deflate', 'gzip', gzip.decompress),
+        )
+        for accept, encoding, decompress in cases:
+            with self.subTest(accept=accept):
+                response = self.client.get(
+                    reverse('index'), HTTP_ACCEPT_ENCODING=accept
+                )
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertEqual(decompress(response.content), plain.content)
+
+    def test_zip_export_is_not_compressed_again(self):
+        """Архив выгрузки отдается как есть при любом Accept-Encoding."""
+        user = User.objects.create_user(username='Exporter')
+        self.client.force_login(user)
+        for accept in ('gzip, deflate, br', 'gzip, deflate'):
+            with self.subTest(accept=accept):
+                response = self.client.get(
+                    reverse('export_data'), HTTP_ACCEPT_ENCODING=accept
+                )
+                self.assertEqual(response['Content-Type'], 'application/zip')
+                self.assertFalse(response.has_header('Content-Encoding'))
+                content = b''.join(response.streaming_content)
+                self.assertTrue(content.startswith(b'PK'))
+
+    def test_icons_are_shared_symbols(self):
+        """Иконки описаны один раз в спрайте и подключаются через use."""
+        response = self.client.get(reverse('index'))
+        content = response.content.decode()
+        self.assertEqual(content.count('<symbol id="icon-heart"'), 1)
+        self.assertEqual(content.count('<use href="#icon-heart"/>'), 3)
+        body = content[content.index('<body>'):]
+        self.assertNotIn('\n', body)
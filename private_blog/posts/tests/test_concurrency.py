@@ -0,0 +1,61 @@
+import threading
+
+from django.db import connections
+from django.test import TransactionTestCase
+
+from posts.models import Favourite, Post, User
+
+
+class FavouriteToggleConcurrencyTest(TransactionTestCase):
+
+    threads_count = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Liker')
+        self.post = Post.objects.create(
+            title='Статья для теста - заголовок',
+            subheader='А это подзаголовок',
+            text='Ну и сама статья - она вот такая, короткая.'
+        )
+
+    def run_concurrently(self, func):
+        barrier = threading.Barrier(self.threads_count)
+        errors = []
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(func())
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(self.threads_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_toggle_switches_like(self):
+        """Проверяем, что toggle поочередно ставит и снимает лайк."""
+        self.assertTrue(Favourite.objects.toggle(self.user, self.post))
+        self.assertEqual(self.post.like_count(), 1)
+        self.assertFalse(Favourite.objects.toggle(self.user, self.post))
+        self.assertEqual(self.post.like_count(), 0)
+
+    def test_concurrent_toggles_do_not_raise(self):
+        """Одновременные клики по лайку не вызывают IntegrityError,
+        и в базе остается не больше одного лайка."""
+        for _ in range(3):
+            results, errors = self.run_concurrently(
+                lambda: Favourite.objects.toggle(self.user, self.post)
+            )
+            self.assertEqual(errors, [])
+            self.assertEqual(len(results), self.threads_count)
+            self.assertIn(self.post.like_count(), (0, 1))
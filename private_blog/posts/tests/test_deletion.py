@@ -0,0 +1,127 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.deletion import delete_post
+from posts.media import get_referenced_images
+from posts.messaging import get_unread_count, record_messages
+from posts.models import Comment, Favourite, Message, Post, User
+from posts.tasks import delete_post_data, delete_user_data
+from tasks.models import Task
+
+
+@override_settings(DELETE_BATCH_SIZE=2)
+class DeletionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        self.spammer = User.objects.create_user(username='Spammer')
+        self.posts = [
+            Post.objects.create(
+                title=f'Статья {number}', subheader='Подзаголовок',
+                text='Текст',
+            )
+            for number in range(2)
+        ]
+        self.post = self.posts[0]
+        Post.objects.filter(pk=self.post.pk).update(image='posts/0.jpg')
+        self.post.refresh_from_db()
+        for post in self.posts:
+            Comment.objects.bulk_create([
+                Comment(post=post, author=author, comment_text='Текст')
+                for author in (self.staff, self.spammer) for _ in range(3)
+            ])
+            Favourite.objects.create(liker=self.spammer, favourite_post=post)
+        Message.objects.bulk_create([
+            Message(interlocutor=self.spammer, direction='TO_AUTHOR',
+                    message_text='Спам')
+            for _ in range(5)
+        ])
+
+    def test_delete_post_removes_rows_in_batches(self):
+        """Комментарии удаляются пачками, без загрузки строк в память."""
+        with CaptureQueriesContext(connection) as queries:
+            deleted = delete_post(self.post.id)
+        self.assertEqual(
+            deleted, {'comments': 6, 'favourites': 1, 'posts': 1}
+        )
+        self.assertFalse(Comment.objects.filter(post=self.post.id).exists())
+        self.assertFalse(Post.all_objects.filter(pk=self.post.id).exists())
+        self.assertEqual(Comment.objects.count(), 6)
+        comment_deletes = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('DELETE FROM "posts_comment"')
+        ]
+        self.assertEqual(len(comment_deletes), 3)
+
+    def test_post_delete_view_hides_post_and_defers_delete(self):
+        """Статья сразу пропадает с сайта, данные удаляет задача."""
+        client = Client()
+        client.force_login(self.staff)
+        response = client.post(reverse('post_delete', args=[self.post.id]))
+        self.assertRedirects(response, reverse('post_management'))
+        self.assertFalse(Post.objects.filter(pk=self.post.id).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.id).exists())
+        self.assertEqual(
+            client.get(reverse('post_view', args=[self.post.id])).status_code,
+            404,
+        )
+        self.assertNotContains(client.get(reverse('index')), 'Статья 0')
+        self.assertEqual(
+            get_referenced_images([self.post.image.name]),
+            {self.post.image.name},
+        )
+        self.assertTrue(Task.objects.filter(
+            name=delete_post_data.task_name, args=[self.post.id]
+        ).exists())
+        delete_post_data(self.post.id)
+        self.assertFalse(Post.all_objects.filter(pk=self.post.id).exists())
+        self.assertFalse(Comment.objects.filter(post=self.post.id).exists())
+
+    @override_settings(POST_DELETE_IN_BACKGROUND=False)
+    def test_post_delete_view_without_background(self):
+        client = Client()
+        client.force_login(self.staff)
+        client.post(reverse('post_delete', args=[self.post.id]))
+        self.assertFalse(Post.all_objects.filter(pk=self.post.id).exists())
+        self.assertFalse(Comment.objects.filter(post=self.post.id).exists())
+
+    def test_delete_user_command(self):
+        """Команда удаляет пользователя и все его данные."""
+        out = StringIO()
+        call_command('delete_user', 'Spammer', stdout=out)
+        self.assertIn('comments: 6', out.getvalue())
+        self.assertIn('messages: 5', out.getvalue())
+        self.assertFalse(User.objects.filter(username='Spammer').exists())
+        self.assertFalse(Favourite.objects.exists())
+        self.assertFalse(Message.objects.exists())
+        self.assertEqual(Comment.objects.count(), 6)
+
+    def test_delete_user_resets_unread_counter(self):
+        """Закешированный счетчик непрочитанных автором сообщений
+        сбрасывается, хотя сообщения удаляются мимо сигналов."""
+        record_messages([self.spammer.pk], 'TO_AUTHOR', timezone.now())
+        self.assertEqual(get_unread_count(self.staff), 1)
+        call_command('delete_user', 'Spammer', stdout=StringIO())
+        self.assertEqual(get_unread_count(self.staff), 0)
+
+    def test_delete_user_command_deferred(self):
+        """С --defer пользователь блокируется, данные удаляет задача."""
+        call_command('delete_user', 'Spammer', defer=True, stdout=StringIO())
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.assertTrue(Task.objects.filter(
+            name=delete_user_data.task_name, args=[self.spammer.pk]
+        ).exists())
+        delete_user_data(self.spammer.pk)
+        self.assertFalse(User.objects.filter(pk=self.spammer.pk).exists())
+        self.assertEqual(Comment.objects.count(), 6)
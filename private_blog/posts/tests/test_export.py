@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import zipfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Favourite, Message, Post, User
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='UserOne', email='one@example.com'
+        )
+        cls.other = User.objects.create_user(username='UserTwo')
+        cls.post = Post.objects.create(
+            title='Статья', subheader='Подзаголовок', text='Текст'
+        )
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                comment_text=f'Комментарий, "{number}"',
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.other, comment_text='Чужой'
+        )
+        Favourite.objects.create(liker=cls.user, favourite_post=cls.post)
+        Message.objects.create(
+            interlocutor=cls.user,
+            direction='TO_AUTHOR',
+            message_text='Привет',
+        )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def get_archive(self, file_format):
+        response = self.authorized_client.get(
+            reverse('export_data'), {'format': file_format}
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('private_blog_UserOne.zip',
+                      response['Content-Disposition'])
+        content = b''.join(response.streaming_content)
+        return zipfile.ZipFile(io.BytesIO(content))
+
+    def test_export_json(self):
+        """Архив JSON содержит только данные пользователя."""
+        archive = self.get_archive('json')
+        self.assertEqual(archive.namelist(), [
+            'profile.json', 'comments.json', 'favourites.json',
+            'messages.json',
+        ])
+        profile = json.loads(archive.read('profile.json'))
+        self.assertEqual(profile[0]['email'], 'one@example.com')
+        comments = json.loads(archive.read('comments.json'))
+        self.assertEqual(
+            [comment['comment_text'] for comment in comments],
+            [f'Комментарий, "{number}"' for number in range(5)],
+        )
+        favourites = json.loads(archive.read('favourites.json'))
+        self.assertEqual(favourites[0]['favourite_post__title'], 'Статья')
+        messages = json.loads(archive.read('messages.json'))
+        self.assertEqual(messages[0]['message_text'], 'Привет')
+
+    def test_export_csv(self):
+        """Архив CSV содержит заголовок и корректно экранирует текст."""
+        archive = self.get_archive('csv')
+        self.assertIn('comments.csv', archive.namelist())
+        text = archive.read('comments.csv').decode('utf-8')
+        rows = list(csv.reader(StringIO(text)))
+        self.assertEqual(rows[0], [
+            'id', 'post_id', 'post__title', 'comment_text', 'created',
+        ])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'Комментарий, "0"')
+
+    def test_export_requires_login(self):
+        """Гость перенаправляется на страницу входа."""
+        response = self.guest_client.get(reverse('export_data'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response.url)
+
+    def test_export_comments_command(self):
+        """Команда выгружает все комментарии в NDJSON."""
+        out = StringIO()
+        call_command('export_comments', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        first = json.loads(lines[0])
+        self.assertEqual(first['author__username'], 'UserOne')
+        self.assertEqual(first['post__title'], 'Статья')
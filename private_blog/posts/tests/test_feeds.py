@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+class PostsFeedsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_one = User.objects.create_user(username='UserOne')
+        cls.post = Post.objects.create(
+            title='Статья для теста - заголовок',
+            subheader='А это подзаголовок',
+            text='Ну и сама статья - она вот такая, короткая.'
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post,
+            author=cls.user_one,
+            comment_text='Небольшой комментарий к статье'
+        )
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_items(self):
+        """Ленты статей и комментариев содержат нужные записи."""
+        feeds = [
+            (reverse('posts_rss'), self.post.title, 'application/rss+xml'),
+            (reverse('posts_atom'), self.post.title, 'application/atom+xml'),
+            (reverse('comments_rss', args=[self.post.id]),
+             self.comment.comment_text, 'application/rss+xml'),
+            (reverse('comments_atom', args=[self.post.id]),
+             self.comment.comment_text, 'application/atom+xml'),
+        ]
+        for url, text, content_type in feeds:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, text)
+                self.assertTrue(response.has_header('ETag'))
+
+    @override_settings(SITE_URL='https://blog.example')
+    def test_feed_links_ignore_request_host(self):
+        """Ссылки кешируемой ленты строятся от SITE_URL: чужой Host
+        первого запроса не попадает в ответы остальным."""
+        for name in ('posts_rss', 'posts_atom'):
+            with self.subTest(name=name):
+                url = reverse(name)
+                response = self.guest_client.get(url, HTTP_HOST='evil.test')
+                self.assertNotContains(response, 'evil.test')
+                response = self.guest_client.get(url)
+                self.assertContains(
+                    response, f'https://blog.example/{self.post.id}/'
+                )
+                self.assertContains(response, f'https://blog.example{url}')
+
+    def test_feed_is_cached_and_answers_not_modified(self):
+        """Лента рендерится один раз на версию содержимого и
+        отдает 304 по ETag, пока статьи не изменились."""
+        url = reverse('posts_rss')
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            cached = self.guest_client.get(url)
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        post = Post.objects.create(
+            title='Еще одна статья',
+            subheader='Подзаголовок',
+            text='Текст.',
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, post.title)
+
+    def test_comments_feed_changes_with_comments(self):
+        """Лента комментариев обновляется при новом комментарии."""
+        url = reverse('comments_rss', args=[self.post.id])
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.post,
+            author=self.user_one,
+            comment_text='Свежий комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Свежий комментарий')
+        response = self.guest_client.get(
+            reverse('comments_rss', args=[self.post.id + 100])
+        )
+        self.assertEqual(response.status_code, 404)
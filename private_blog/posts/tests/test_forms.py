@@ -1,13 +1,16 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.forms import CommentForm, MessageForm, PostForm
 from posts.models import Comment, Message, Post, User
+from tasks.models import Task
 
 
 class PostsFormTests(TestCase):
@@ -100,6 +103,26 @@ class PostsFormTests(TestCase):
         self.assertEqual(new_post.subheader, form_data['subheader'])
         self.assertEqual(new_post.text, form_data['text'])
         self.assertEqual(new_post.image, self.img_url)
+        self.assertTrue(Task.objects.filter(
+            name='posts.tasks.generate_thumbnails',
+            args=[new_post.id],
+        ).exists())
+
+    @override_settings(IMAGE_MAX_EDGE=100)
+    def test_create_post_normalizes_image(self):
+        """Большое изображение сохраняется уменьшенным."""
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), 'blue').save(buffer, 'JPEG')
+        form_data = {
+            'title': 'Статья с фото',
+            'subheader': 'Подзаголовок',
+            'text': 'Текст',
+            'image': SimpleUploadedFile('photo.jpg', buffer.getvalue()),
+        }
+        self.author_client.post(reverse('new_post'), data=form_data)
+        new_post = Post.objects.get(title=form_data['title'])
+        with Image.open(new_post.image) as image:
+            self.assertEqual(image.size, (100, 75))
 
     def test_edit_post(self):
         """Проверяем, что при редактировании пост изменился."""
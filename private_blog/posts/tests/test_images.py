@@ -0,0 +1,111 @@
+from io import BytesIO
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from posts.images import normalize_image
+
+
+def make_upload(name, size=(400, 200), image_format='JPEG', exif=None,
+                mode='RGB'):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif is not None else {}
+    Image.new(mode, size, 'red').save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def make_exif(orientation=1):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'Camera Maker'
+    return exif
+
+
+@override_settings(IMAGE_MAX_EDGE=100, IMAGE_MAX_PIXELS=10 ** 6,
+                   IMAGE_UPLOAD_MAX_BYTES=2 ** 20)
+class NormalizeImageTests(SimpleTestCase):
+
+    def open(self, upload):
+        upload.seek(0)
+        return Image.open(BytesIO(upload.read()))
+
+    def test_large_image_is_downscaled(self):
+        """Изображение уменьшается до IMAGE_MAX_EDGE по большей стороне."""
+        image = self.open(normalize_image(make_upload('big.jpg')))
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(image.format, 'JPEG')
+
+    def test_exif_orientation_applied_and_metadata_stripped(self):
+        """Поворот из EXIF применяется, а метаданные удаляются."""
+        for name, image_format in (('photo.jpg', 'JPEG'),
+                                   ('photo.png', 'PNG'),
+                                   ('photo.webp', 'WEBP')):
+            with self.subTest(image_format=image_format):
+                upload = make_upload(
+                    name, size=(80, 40), image_format=image_format,
+                    exif=make_exif(orientation=6),
+                )
+                result = normalize_image(upload)
+                image = self.open(result)
+                self.assertEqual(image.size, (40, 80))
+                self.assertEqual(image.format, image_format)
+                self.assertFalse(image.getexif())
+                self.assertEqual(result.name, name)
+
+    def test_clean_small_image_kept_as_is(self):
+        """Небольшой файл без метаданных сохраняется без перекодирования."""
+        upload = make_upload('small.png', size=(50, 50), image_format='PNG')
+        self.assertIs(normalize_image(upload), upload)
+
+    def test_other_formats_converted(self):
+        """Прочие форматы перекодируются в JPEG или PNG."""
+        result = normalize_image(
+            make_upload('scan.bmp', size=(50, 50), image_format='BMP')
+        )
+        self.assertEqual(result.name, 'scan.jpg')
+        self.assertEqual(self.open(result).format, 'JPEG')
+
+    def test_animation_keeps_all_frames(self):
+        """Анимированный GIF уменьшается покадрово, а небольшой
+        сохраняется без перекодирования."""
+        def make_animation(name, size):
+            frames = [
+                Image.new('RGB', size, color)
+                for color in ('red', 'green', 'blue')
+            ]
+            buffer = BytesIO()
+            frames[0].save(
+                buffer, 'GIF', save_all=True, append_images=frames[1:],
+                duration=80, loop=0, comment=b'editor',
+            )
+            return SimpleUploadedFile(name, buffer.getvalue())
+
+        image = self.open(normalize_image(
+            make_animation('anim.gif', (400, 200))
+        ))
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(image.n_frames, 3)
+        small = make_animation('small.gif', (50, 50))
+        self.assertIs(normalize_image(small), small)
+
+    def test_cmyk_profile_not_kept_after_conversion(self):
+        """После перевода CMYK в RGB профиль CMYK не сохраняется."""
+        buffer = BytesIO()
+        Image.new('CMYK', (400, 200)).save(
+            buffer, 'JPEG', icc_profile=b'not a real profile'
+        )
+        upload = SimpleUploadedFile('print.tif', buffer.getvalue())
+        image = self.open(normalize_image(upload))
+        self.assertEqual(image.mode, 'RGB')
+        self.assertNotIn('icc_profile', image.info)
+
+    def test_limits(self):
+        """Слишком большие файлы и изображения отклоняются."""
+        with self.assertRaises(ValidationError):
+            normalize_image(make_upload('huge.png', size=(2000, 1000),
+                                        image_format='PNG'))
+        with override_settings(IMAGE_UPLOAD_MAX_BYTES=100):
+            with self.assertRaises(ValidationError):
+                normalize_image(make_upload('big.jpg'))
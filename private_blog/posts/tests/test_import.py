@@ -0,0 +1,226 @@
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from posts import importer
+from posts.models import Post
+from posts.tasks import generate_thumbnails
+from tasks.models import Task
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+ARTICLE = """---
+title: "Статья {number}"
+subheader: Подзаголовок {number}
+date: 2021-03-0{number}
+{image}---
+
+Текст статьи {number}.
+
+Второй абзац.
+"""
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_MAX_EDGE=50)
+class ImportPostsTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.source = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        Image.new('RGB', (100, 80), 'red').save(self.source / 'cover.jpg')
+        for number in range(1, 4):
+            image = 'image: cover.jpg\n' if number == 1 else ''
+            (self.source / f'post{number}.md').write_text(
+                ARTICLE.format(number=number, image=image), encoding='utf-8'
+            )
+
+    def stored_files(self):
+        return {path for path in Path(MEDIA_ROOT).rglob('*') if path.is_file()}
+
+    def import_posts(self, **options):
+        out, err = StringIO(), StringIO()
+        options = {'workers': 1, 'batch_size': 2, **options}
+        call_command(
+            'import_posts', str(self.source), stdout=out, stderr=err,
+            **options,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_creates_posts(self):
+        """Статьи создаются с полями из front-matter и текстом."""
+        out, err = self.import_posts()
+        self.assertEqual(err, '')
+        self.assertIn('Импортировано статей: 3', out)
+        post = Post.objects.get(title='Статья 1')
+        self.assertEqual(post.subheader, 'Подзаголовок 1')
+        self.assertEqual(post.text, 'Текст статьи 1.\n\nВторой абзац.')
+        self.assertEqual(post.pub_date, date(2021, 3, 1))
+        self.assertEqual(
+            Post.objects.get(title='Статья 3').pub_date, date(2021, 3, 3)
+        )
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual(
+            max(Image.open(default_storage.path(post.image.name)).size), 50
+        )
+        self.assertEqual(Task.objects.filter(
+            name=generate_thumbnails.task_name, args=[post.pk]
+        ).count(), 1)
+
+    def test_import_is_idempotent(self):
+        """Повторный импорт пропускает неизмененные файлы, а новый файл
+        импортируется."""
+        self.import_posts()
+        (self.source / 'post4.md').write_text(
+            ARTICLE.format(number=4, image=''), encoding='utf-8'
+        )
+        out, _ = self.import_posts()
+        self.assertIn('Пропущено (уже импортированы): 3', out)
+        self.assertIn('Обновлено (файл изменился): 0', out)
+        self.assertIn('Импортировано статей: 1', out)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_edited_file_updates_its_post(self):
+        """Измененный файл обновляет свою статью, а не создает новую;
+        файлы с одинаковым текстом - разные статьи."""
+        self.import_posts()
+        post = Post.objects.get(title='Статья 1')
+        (self.source / 'post1.md').write_text(
+            ARTICLE.format(number=1, image='').replace(
+                'Статья 1', 'Статья 1 (исправлена)'
+            ),
+            encoding='utf-8',
+        )
+        (self.source / 'copy.md').write_text(
+            (self.source / 'post2.md').read_text(encoding='utf-8'),
+            encoding='utf-8',
+        )
+        out, err = self.import_posts()
+        self.assertEqual(err, '')
+        self.assertIn('Пропущено (уже импортированы): 2', out)
+        self.assertIn('Обновлено (файл изменился): 1', out)
+        self.assertIn('Импортировано статей: 1', out)
+        self.assertEqual(Post.objects.count(), 4)
+        post.refresh_from_db()
+        self.assertEqual(post.title, 'Статья 1 (исправлена)')
+        self.assertEqual(post.pub_date, date(2021, 3, 1))
+        self.assertEqual(post.modify_date, timezone.localdate())
+        self.assertFalse(post.image)
+
+    def test_unchanged_image_is_kept(self):
+        """Если в файле изменился только текст, изображение статьи не
+        обрабатывается заново; новое изображение заменяет старое."""
+        self.import_posts()
+        post = Post.objects.get(title='Статья 1')
+        image = post.image.name
+        generate_thumbnails(post.pk)
+        files = self.stored_files()
+        path = self.source / 'post1.md'
+        path.write_text(
+            path.read_text(encoding='utf-8').replace('Второй', 'Третий'),
+            encoding='utf-8',
+        )
+        out, _ = self.import_posts()
+        self.assertIn('Обновлено (файл изменился): 1', out)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, image)
+        self.assertEqual(self.stored_files(), files)
+        self.assertEqual(Task.objects.filter(
+            name=generate_thumbnails.task_name, args=[post.pk]
+        ).count(), 1)
+
+        Image.new('RGB', (100, 80), 'blue').save(self.source / 'cover.jpg')
+        path.write_text(
+            path.read_text(encoding='utf-8').replace('Третий', 'Четвертый'),
+            encoding='utf-8',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.import_posts()
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, image)
+        self.assertTrue(default_storage.exists(post.image.name))
+
+    def test_failed_save_removes_stored_images(self):
+        """Если сохранить статьи не удалось, изображения, сохраненные
+        для них, удаляются из хранилища."""
+        files = self.stored_files()
+        with mock.patch(
+            'posts.importer.create_posts', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.import_posts()
+        self.assertEqual(self.stored_files(), files)
+
+    def test_posts_of_old_imports_get_path(self):
+        """Статья, импортированная до появления source_path, находится
+        по хешу и не дублируется."""
+        self.import_posts()
+        Post.objects.update(source_path=None)
+        out, _ = self.import_posts()
+        self.assertIn('Пропущено (уже импортированы): 3', out)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(
+            set(Post.objects.values_list('source_path', flat=True)),
+            {'post1.md', 'post2.md', 'post3.md'},
+        )
+
+    def test_concurrent_import_is_not_counted(self):
+        """Статьи, которые успел создать параллельный запуск, не
+        считаются созданными и не дублируются."""
+        create_posts = importer.create_posts
+
+        def race(sources):
+            post = sources[0][0]
+            Post.objects.create(
+                title=post.title, subheader=post.subheader, text=post.text,
+                source_path=post.source_path, source_hash=post.source_hash,
+            )
+            return create_posts(sources)
+
+        files = self.stored_files()
+        with mock.patch('posts.importer.create_posts', race):
+            out, _ = self.import_posts(batch_size=3)
+        self.assertIn('Импортировано статей: 2', out)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(self.stored_files(), files)
+
+    def test_invalid_files_are_reported(self):
+        """Файлы с ошибками пропускаются, остальные импортируются."""
+        (self.source / 'broken.md').write_text('Без front-matter')
+        (self.source / 'long.md').write_text(
+            ARTICLE.format(number=5, image='').replace(
+                'Статья 5', 'З' * 61
+            ),
+            encoding='utf-8',
+        )
+        (self.source / 'no_image.md').write_text(
+            ARTICLE.format(number=6, image='image: missing.jpg\n'),
+            encoding='utf-8',
+        )
+        out, err = self.import_posts()
+        self.assertIn('broken.md', err)
+        self.assertIn('long.md', err)
+        self.assertIn('missing.jpg', err)
+        self.assertIn('Импортировано статей: 3, ошибок: 3', out)
+
+    def test_import_with_process_pool(self):
+        """Изображения обрабатываются в пуле процессов."""
+        out, err = self.import_posts(workers=2)
+        self.assertEqual(err, '')
+        post = Post.objects.get(title='Статья 1')
+        self.assertTrue(default_storage.exists(post.image.name))
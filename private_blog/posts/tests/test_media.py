@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Post
+from posts.tasks import delete_replaced_image
+from tasks.models import Task
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image_file():
+    buffer = BytesIO()
+    Image.new('RGB', (40, 30), 'green').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GarbageCollectorTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            title='Статья с картинкой',
+            subheader='Подзаголовок',
+            text='Текст',
+        )
+        self.post.image.save('kept.jpg', make_image_file())
+        self.kept_thumbnail = get_thumbnail(self.post.image, '20x20')
+
+    def add_orphan(self):
+        name = default_storage.save('posts/orphan.jpg', make_image_file())
+        return name, get_thumbnail(name, '20x20')
+
+    def test_gc_media_deletes_orphans_only(self):
+        """gc_media удаляет неиспользуемые оригиналы, их миниатюры
+        и миниатюры без записи в kvstore, не трогая нужные файлы."""
+        orphan, orphan_thumbnail = self.add_orphan()
+        stray = default_storage.save('cache/00/00/stray.jpg',
+                                     make_image_file())
+        call_command('gc_media', min_age=0, stdout=StringIO())
+        for name in (orphan, orphan_thumbnail.name, stray):
+            with self.subTest(name=name):
+                self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(self.post.image.name))
+        self.assertTrue(default_storage.exists(self.kept_thumbnail.name))
+
+    def test_gc_media_dry_run_and_min_age(self):
+        """В режиме --dry-run и для свежих файлов ничего не удаляется."""
+        orphan, _ = self.add_orphan()
+        call_command('gc_media', min_age=0, dry_run=True, stdout=StringIO())
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+
+    def test_replaced_image_is_cleaned_up(self):
+        """Замена изображения ставит задачу удаления старого файла."""
+        old_name = self.post.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.image.save('new.jpg', make_image_file())
+        task = Task.objects.get(name='posts.tasks.delete_replaced_image')
+        self.assertEqual(task.args, [old_name])
+        delete_replaced_image(*task.args)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertFalse(default_storage.exists(self.kept_thumbnail.name))
+        self.assertTrue(default_storage.exists(self.post.image.name))
+
+    def test_deleted_post_image_is_cleaned_up(self):
+        """Удаление статьи удаляет ее изображение, если на него больше
+        никто не ссылается."""
+        name = self.post.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        delete_replaced_image(name)
+        self.assertFalse(default_storage.exists(name))
@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.prerender import get_page_file, publish_all
+from posts.tasks import hide_and_delete_posts
+from tasks.models import Task
+
+PRERENDER_ROOT = Path(tempfile.mkdtemp())
+
+
+@override_settings(PRERENDER_ROOT=PRERENDER_ROOT)
+class PrerenderTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='UserOne')
+        self.post = Post.objects.create(
+            title='Статья для теста - заголовок',
+            subheader='А это подзаголовок',
+            text='Ну и сама статья - она вот такая, короткая.'
+        )
+        self.other_post = Post.objects.create(
+            title='Другая статья',
+            subheader='Подзаголовок',
+            text='Текст.'
+        )
+        self.post_path = reverse('post_view', args=[self.post.id])
+
+    def test_publish_all_renders_anonymous_pages(self):
+        """Команда публикует главную, about и страницы статей такими,
+        какими их видит аноним."""
+        call_command('publish_pages', stdout=StringIO())
+        for path in (reverse('index'), reverse('about'), self.post_path):
+            with self.subTest(path=path):
+                self.assertTrue(get_page_file(path).exists())
+        html = get_page_file(self.post_path).read_text(encoding='utf-8')
+        self.assertIn(self.post.text, html)
+        self.assertEqual(
+            html, Client().get(self.post_path).content.decode('utf-8')
+        )
+
+    def test_comment_unpublishes_post_page(self):
+        """Новый комментарий удаляет копии статьи и главной и ставит
+        задачу перерисовки, не трогая страницы других статей."""
+        publish_all()
+        Task.objects.all().delete()
+        Comment.objects.create(
+            post=self.post, author=self.user, comment_text='Комментарий'
+        )
+        other_path = reverse('post_view', args=[self.other_post.id])
+        self.assertFalse(get_page_file(self.post_path).exists())
+        self.assertFalse(get_page_file(reverse('index')).exists())
+        self.assertTrue(get_page_file(other_path).exists())
+        self.assertTrue(Task.objects.filter(
+            name='posts.tasks.publish_pages', args=[self.post.id]
+        ).exists())
+
+    def test_post_change_unpublishes_everything(self):
+        """Изменение статьи удаляет все копии: статьи видны в блоке
+        'Еще' на всех страницах."""
+        publish_all()
+        self.post.title = 'Новый заголовок'
+        self.post.save()
+        self.assertEqual(list(PRERENDER_ROOT.rglob('index.html')), [])
+
+    def test_deleted_post_is_not_published(self):
+        """Страница удаленной статьи не публикуется."""
+        post_id = self.post.id
+        self.post.delete()
+        call_command('publish_pages', post=post_id, stdout=StringIO())
+        self.assertFalse(get_page_file(self.post_path).exists())
+        self.assertTrue(get_page_file(reverse('index')).exists())
+
+    def test_old_post_change_keeps_other_pages(self):
+        """Изменение статьи вне блока 'Еще' удаляет только ее копию и
+        главную; страницы других статей не перерисовываются."""
+        for number in range(4):
+            Post.objects.create(
+                title=f'Новая статья {number}', subheader='Подзаголовок',
+                text='Текст.'
+            )
+        publish_all()
+        Task.objects.all().delete()
+        self.post.title = 'Новый заголовок'
+        self.post.save()
+        other_path = reverse('post_view', args=[self.other_post.id])
+        self.assertFalse(get_page_file(self.post_path).exists())
+        self.assertFalse(get_page_file(reverse('index')).exists())
+        self.assertTrue(get_page_file(other_path).exists())
+        self.assertFalse(Task.objects.filter(
+            name='posts.tasks.publish_pages', args=[]
+        ).exists())
+        newest = Post.objects.first()
+        newest.title = 'Новый заголовок'
+        newest.save()
+        self.assertEqual(list(PRERENDER_ROOT.rglob('index.html')), [])
+
+    def test_hiding_posts_refreshes_pages_once(self):
+        """Скрытие пачки старых статей не перерисовывает все страницы."""
+        for number in range(4):
+            Post.objects.create(
+                title=f'Новая статья {number}', subheader='Подзаголовок',
+                text='Текст.'
+            )
+        publish_all()
+        Task.objects.all().delete()
+        hide_and_delete_posts([self.post, self.other_post])
+        self.assertFalse(get_page_file(self.post_path).exists())
+        self.assertTrue(get_page_file(reverse('about')).exists())
+        self.assertFalse(Task.objects.filter(
+            name='posts.tasks.publish_pages', args=[]
+        ).exists())
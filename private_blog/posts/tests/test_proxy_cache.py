@@ -0,0 +1,103 @@
+from unittest import mock
+from urllib.error import HTTPError
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.proxy_cache import PURGE_ENCODINGS, get_purge_paths, purge
+from posts.tasks import purge_proxy_cache
+from tasks.models import Task
+
+
+@override_settings(PROXY_CACHE_TIMEOUT=10)
+class ProxyCacheHeadersTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='UserOne')
+        cls.post = Post.objects.create(
+            title='Статья', subheader='Подзаголовок', text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_response_is_shared(self):
+        """Ответ анониму nginx кеширует, браузер перепроверяет."""
+        for url in (reverse('index'), reverse('post_view',
+                                              args=[self.post.id])):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertEqual(response['X-Accel-Expires'], '10')
+                cache_control = response['Cache-Control']
+                self.assertIn('public', cache_control)
+                self.assertIn('s-maxage=10', cache_control)
+                self.assertIn('max-age=0', cache_control)
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_authenticated_response_is_private(self):
+        """Ответ пользователю с сессией не попадает в общий кеш."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('index'))
+        self.assertNotIn('X-Accel-Expires', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_responses_with_cookies_or_own_headers_are_not_shared(self):
+        """Не кешируются ответы с Set-Cookie, с собственным
+        Cache-Control и ответы на POST."""
+        client = Client()
+        login = client.get(reverse('login'))
+        self.assertIn('csrftoken', login.cookies)
+        self.assertNotIn('X-Accel-Expires', login)
+        self.assertIn('private', login['Cache-Control'])
+        state = client.get(reverse('viewer_state'))
+        self.assertNotIn('X-Accel-Expires', state)
+        post = client.post(reverse('like_toggle', args=[self.post.id]))
+        self.assertNotIn('X-Accel-Expires', post)
+
+    def test_changes_schedule_purge(self):
+        """Новый комментарий планирует обновление страниц статьи."""
+        Task.objects.all().delete()
+        Comment.objects.create(
+            post=self.post, author=self.user, comment_text='Комментарий'
+        )
+        self.assertTrue(Task.objects.filter(
+            name=purge_proxy_cache.task_name, args=[self.post.id]
+        ).exists())
+
+
+class PurgeTests(TestCase):
+
+    def test_purge_is_disabled_without_url(self):
+        with mock.patch('posts.proxy_cache.urlopen') as urlopen:
+            self.assertEqual(purge(['/']), 0)
+        urlopen.assert_not_called()
+
+    @override_settings(PROXY_CACHE_PURGE_URL='http://nginx:8080/')
+    def test_purge_requests_every_encoding(self):
+        """Каждая страница запрашивается во всех вариантах сжатия,
+        ответ 404 (статья удалена) тоже обновляет запись."""
+        paths = get_purge_paths(1)
+        self.assertIn(reverse('post_view', args=[1]), paths)
+        self.assertIn(reverse('index'), paths)
+
+        def fake_urlopen(request, timeout):
+            if request.full_url.endswith('/missing/'):
+                raise HTTPError(request.full_url, 404, 'Not Found', {}, None)
+            return mock.MagicMock()
+
+        with mock.patch('posts.proxy_cache.urlopen',
+                        side_effect=fake_urlopen) as urlopen:
+            refreshed = purge(['/', '/missing/'])
+        self.assertEqual(refreshed, 2 * len(PURGE_ENCODINGS))
+        requested = {
+            (call.args[0].full_url, call.args[0].get_header('Accept-encoding'))
+            for call in urlopen.call_args_list
+        }
+        self.assertIn(('http://nginx:8080/', 'br'), requested)
+        self.assertIn(('http://nginx:8080/missing/', 'identity'), requested)
@@ -0,0 +1,72 @@
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from private_blog.db_router import (PIN_COOKIE, ReplicaRoutingMiddleware,
+                                    replica_reads)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='UserOne')
+        cls.post = Post.objects.create(
+            title='Статья для теста - заголовок',
+            subheader='А это подзаголовок',
+            text='Ну и сама статья - она вот такая, короткая.'
+        )
+
+    def call_view(self, view, cookies=None):
+        """Вызывает view через middleware и возвращает ответ
+        и БД, выбранную роутером для чтения внутри view."""
+        used = []
+
+        def wrapped(request):
+            used.append(router.db_for_read(Post))
+            return view(request)
+
+        if getattr(view, 'replica_reads', False):
+            wrapped = replica_reads(wrapped)
+
+        def get_response(request):
+            middleware.process_view(request, wrapped, (), {})
+            return wrapped(request)
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request), used[0]
+
+    def test_read_only_views_use_replica(self):
+        """Чтение в помеченных view идет на реплику, в остальных
+        и после записи - на мастер."""
+        read_only = replica_reads(lambda request: HttpResponse())
+        response, alias = self.call_view(read_only)
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        _, alias = self.call_view(lambda request: HttpResponse())
+        self.assertEqual(alias, 'default')
+        _, alias = self.call_view(read_only, {PIN_COOKIE: '1'})
+        self.assertEqual(alias, 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь закрепляется за мастером."""
+        client = self.client
+        client.force_login(self.user)
+        client.cookies.pop(PIN_COOKIE, None)
+        response = client.post(
+            reverse('add_comment', args=[self.post.id]),
+            {'comment_text': 'Комментарий'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]['max-age'],
+            5
+        )
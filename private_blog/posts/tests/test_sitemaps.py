@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post, User
+from posts.sitemaps import get_chunk_signatures, update_sitemaps
+from tasks.models import Task
+
+SITEMAP_ROOT = Path(tempfile.mkdtemp())
+
+
+@override_settings(
+    SITEMAP_ROOT=SITEMAP_ROOT,
+    SITEMAP_CHUNK_SIZE=2,
+    SITE_URL='https://blog.example',
+)
+class SitemapsTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+        self.user = User.objects.create_user(username='UserOne')
+        self.posts = [
+            Post.objects.create(
+                title=f'Статья {number}',
+                subheader='Подзаголовок',
+                text='Текст статьи',
+            )
+            for number in range(3)
+        ]
+
+    def read(self, name):
+        return (SITEMAP_ROOT / name).read_text(encoding='utf-8')
+
+    def chunk_of(self, post):
+        return (post.id - 1) // 2
+
+    def test_sitemap_index_and_chunks(self):
+        """Индекс ссылается на куски, а куски - на все статьи."""
+        updated = update_sitemaps()
+        chunks = {self.chunk_of(post) for post in self.posts}
+        self.assertEqual(set(updated), chunks)
+        index = self.read('sitemap.xml')
+        self.assertIn('https://blog.example/sitemap-pages.xml', index)
+        for chunk in chunks:
+            self.assertIn(
+                f'https://blog.example/sitemap-posts-{chunk + 1}.xml', index
+            )
+        for post in self.posts:
+            chunk = self.read(f'sitemap-posts-{self.chunk_of(post) + 1}.xml')
+            self.assertIn(f'https://blog.example/{post.id}/</loc>', chunk)
+            self.assertIn(f'<lastmod>{post.pub_date.isoformat()}', chunk)
+
+    def test_only_changed_chunks_are_rebuilt(self):
+        """Повторная сборка перерисовывает только измененные куски."""
+        update_sitemaps()
+        self.assertEqual(update_sitemaps(), [])
+        post = self.posts[-1]
+        Comment.objects.create(
+            post=post, author=self.user, comment_text='Комментарий'
+        )
+        self.assertEqual(update_sitemaps(), [self.chunk_of(post)])
+        post.title = 'Новый заголовок'
+        post.save()
+        self.assertEqual(update_sitemaps(), [self.chunk_of(post)])
+
+    def test_empty_chunk_is_removed(self):
+        """Кусок без статей удаляется из индекса и с диска."""
+        update_sitemaps()
+        chunk = self.chunk_of(self.posts[-1])
+        chunk_name = f'sitemap-posts-{chunk + 1}.xml'
+        self.assertTrue((SITEMAP_ROOT / chunk_name).exists())
+        for post in self.posts:
+            if self.chunk_of(post) == chunk:
+                post.delete()
+        update_sitemaps()
+        self.assertFalse((SITEMAP_ROOT / chunk_name).exists())
+        self.assertNotIn(chunk_name, self.read('sitemap.xml'))
+
+    def test_chunk_emptied_during_build_is_removed(self):
+        """Кусок, статьи которого удалили между подсчетом подписей и
+        рендером, не ломает сборку и убирается из индекса."""
+        update_sitemaps()
+        chunk = self.chunk_of(self.posts[-1])
+        chunk_name = f'sitemap-posts-{chunk + 1}.xml'
+        signatures = get_chunk_signatures()
+        signatures[chunk] += '|изменен'
+        self.posts[-1].delete()
+        with mock.patch(
+            'posts.sitemaps.get_chunk_signatures', return_value=signatures
+        ):
+            self.assertEqual(update_sitemaps(), [])
+        self.assertFalse((SITEMAP_ROOT / chunk_name).exists())
+        self.assertNotIn(chunk_name, self.read('sitemap.xml'))
+
+    def test_changes_schedule_one_task_per_chunk(self):
+        """Серия правок ставит по одной отложенной задаче на каждый
+        затронутый кусок."""
+        Task.objects.filter(name='posts.tasks.build_sitemaps').delete()
+        for post in self.posts:
+            post.save()
+        Comment.objects.create(
+            post=self.posts[0], author=self.user, comment_text='Комментарий'
+        )
+        self.assertEqual(
+            sorted(Task.objects.filter(
+                name='posts.tasks.build_sitemaps'
+            ).values_list('args', flat=True)),
+            sorted([self.chunk_of(post)] for post in self.posts[1:]),
+        )
+
+    def test_dirty_chunk_is_rebuilt_alone(self):
+        """Обновление куска считает подпись только по его статьям и
+        не трогает остальные куски в индексе."""
+        update_sitemaps()
+        post = self.posts[-1]
+        post.title = 'Новый заголовок'
+        post.save()
+        chunk = self.chunk_of(post)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(update_sitemaps(chunks=[chunk]), [chunk])
+        self.assertIn(f'"posts_post"."id" > {chunk * 2}', queries[0]['sql'])
+        self.assertIn(
+            f'"posts_comment"."post_id" > {chunk * 2}', queries[1]['sql']
+        )
+        index = self.read('sitemap.xml')
+        for other in self.posts:
+            self.assertIn(
+                f'sitemap-posts-{self.chunk_of(other) + 1}.xml', index
+            )
+
+    def test_command_full_rebuild(self):
+        """Команда build_sitemaps --full перерисовывает все куски."""
+        call_command('build_sitemaps', stdout=StringIO())
+        self.assertTrue((SITEMAP_ROOT / 'sitemap.xml').exists())
+        self.assertEqual(
+            set(update_sitemaps(full=True)),
+            {self.chunk_of(post) for post in self.posts},
+        )
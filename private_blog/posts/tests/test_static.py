@@ -0,0 +1,62 @@
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]\s*%}""")
+
+
+class StaticManifestTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                'private_blog.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get_static_references(self):
+        references = set()
+        for template in Path(settings.TEMPLATES_DIR).rglob('*.html'):
+            references.update(STATIC_TAG.findall(template.read_text()))
+        return references
+
+    def test_static_references_resolve_through_manifest(self):
+        """Каждый {% static %} из шаблонов есть в манифесте,
+        а его хешированный файл лежит в STATIC_ROOT."""
+        references = self.get_static_references()
+        self.assertIn('posts/bootstrap.min.css', references)
+        manifest = staticfiles_storage.load_manifest()
+        for name in references:
+            with self.subTest(name=name):
+                self.assertIn(name, manifest)
+                hashed_name = staticfiles_storage.stored_name(name)
+                self.assertNotEqual(hashed_name, name)
+                self.assertTrue(staticfiles_storage.exists(hashed_name))
+
+    def test_text_assets_are_precompressed(self):
+        """Рядом с хешированными css/js лежат сжатые копии."""
+        for name in ('posts/bootstrap.min.css',
+                     'posts/bootstrap.bundle.min.js'):
+            with self.subTest(name=name):
+                path = staticfiles_storage.path(
+                    staticfiles_storage.stored_name(name)
+                )
+                self.assertTrue(Path(path + '.gz').exists())
@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.tasks import generate_thumbnails
+from posts.thumbnails import POST_THUMBNAILS, get_post_thumbnail
+from tasks.models import Task
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image_file():
+    buffer = BytesIO()
+    Image.new('RGB', (60, 40), 'green').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class StoredThumbnailsTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            title='Статья с картинкой',
+            subheader='Подзаголовок',
+            text='Текст',
+        )
+        self.post.image.save('picture.jpg', make_image_file())
+
+    def test_generated_thumbnails_are_stored(self):
+        """Задача сохраняет адреса и размеры миниатюр всех размеров,
+        и шаблоны берут их без обращений к kvstore."""
+        generate_thumbnails(self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(set(self.post.thumbnails), set(POST_THUMBNAILS))
+        stored = self.post.thumbnails['225x300']
+        self.assertEqual((stored['width'], stored['height']), (225, 300))
+        self.assertEqual(stored['source'], self.post.image.name)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_post_thumbnail(self.post, '225x300'), stored
+            )
+        response = Client().get(reverse('post_view', args=[self.post.id]))
+        self.assertContains(response, self.post.thumbnails['300x300']['url'])
+
+    def test_stale_entry_falls_back_to_sorl(self):
+        """Миниатюры прежнего изображения не используются."""
+        generate_thumbnails(self.post.id)
+        self.post.refresh_from_db()
+        stored = self.post.thumbnails['225x300']
+        self.post.image.save('replaced.jpg', make_image_file())
+        thumbnail = get_post_thumbnail(self.post, '225x300')
+        self.assertNotEqual(thumbnail.url, stored['url'])
+        self.assertIsNone(get_post_thumbnail(
+            Post(title='Без картинки'), '225x300'
+        ))
+
+    def test_backfill_queues_missing_thumbnails(self):
+        """Команда ставит генерацию только для статей без миниатюр."""
+        Task.objects.all().delete()
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.assertEqual(Task.objects.filter(
+            name='posts.tasks.generate_thumbnails', args=[self.post.id],
+        ).count(), 1)
+        generate_thumbnails(self.post.id)
+        Task.objects.all().delete()
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.messaging import get_unread_count
+from posts.models import Conversation, Message, Post, User
+
+
+class UnreadMessagesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Author', is_staff=True
+        )
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def send(self, direction, count=1):
+        for number in range(count):
+            Message.objects.create(
+                interlocutor=self.reader, direction=direction,
+                message_text=f'Сообщение {number}',
+            )
+
+    def get_conversation(self):
+        return Conversation.objects.get(interlocutor=self.reader)
+
+    def test_incoming_messages_are_unread_until_dialog_opened(self):
+        """Сообщения автору учитываются в его значке и в списке диалогов
+        и сбрасываются при открытии диалога."""
+        self.send('TO_AUTHOR', 2)
+        response = self.author_client.get(reverse('message_reply'))
+        self.assertEqual(response.context['unread_messages'], 2)
+        self.assertEqual(response.context['interlocutors'][0].unread, 2)
+        response = self.author_client.get(
+            reverse('message_reply_id', args=[self.reader.pk])
+        )
+        self.assertContains(response, '>Новое</span>', count=2)
+        self.assertEqual(response.context['unread_messages'], 0)
+        conversation = self.get_conversation()
+        self.assertEqual(conversation.unread_by_author, 0)
+        self.assertIsNotNone(conversation.author_read_time)
+        response = self.author_client.get(
+            reverse('message_reply_id', args=[self.reader.pk])
+        )
+        self.assertNotContains(response, '>Новое</span>')
+
+    def test_replies_are_unread_by_user_until_messages_opened(self):
+        """Ответы автора видны в значке пользователя до открытия
+        страницы сообщений; значок автора от них не меняется."""
+        self.send('FROM_AUTHOR', 3)
+        response = self.reader_client.get(reverse('private_cabinet'))
+        self.assertEqual(response.context['unread_messages'], 3)
+        self.assertEqual(get_unread_count(self.author), 0)
+        response = self.reader_client.get(reverse('messages'))
+        self.assertContains(response, '>Новое</span>', count=3)
+        self.assertEqual(self.get_conversation().unread_by_user, 0)
+        response = self.reader_client.get(reverse('private_cabinet'))
+        self.assertEqual(response.context['unread_messages'], 0)
+
+    def test_opening_read_dialog_does_not_write(self):
+        """Открытие прочитанного диалога обходится без UPDATE."""
+        self.send('FROM_AUTHOR')
+        self.reader_client.get(reverse('messages'))
+        with self.assertNumQueries(0):
+            get_unread_count(self.reader)
+        self.reader_client.get(reverse('messages'))
+        self.assertEqual(self.get_conversation().unread_by_user, 0)
+
+    def test_unread_count_needs_one_query_or_cache(self):
+        """Счетчик для значка берется одним запросом, затем из кеша,
+        пока не придет новое сообщение."""
+        self.send('TO_AUTHOR', 2)
+        for user in (self.author, self.reader):
+            with self.subTest(user=user.username):
+                with self.assertNumQueries(1):
+                    get_unread_count(user)
+                with self.assertNumQueries(0):
+                    get_unread_count(user)
+        self.send('TO_AUTHOR')
+        self.assertEqual(get_unread_count(self.author), 3)
+
+    def test_deleted_unread_message_is_not_counted(self):
+        """Удаленное непрочитанное сообщение вычитается из счетчика."""
+        self.send('TO_AUTHOR', 2)
+        get_unread_count(self.author)
+        Message.objects.filter(direction='TO_AUTHOR').first().delete()
+        self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_viewer_state_reports_unread(self):
+        """Общая оболочка страницы получает счетчик из viewer_state."""
+        self.send('FROM_AUTHOR', 2)
+        response = self.reader_client.get(reverse('viewer_state'))
+        self.assertEqual(response.json()['unread'], 2)
+        response = Client().get(reverse('viewer_state'))
+        self.assertEqual(response.json()['unread'], 0)
+        response = self.reader_client.get(reverse('index'))
+        self.assertContains(response, 'data-unread="user"')
+        self.assertNotContains(response, '>2</span>')
+
+    def test_post_etag_follows_unread_badge(self):
+        """Новое сообщение меняет ETag страницы статьи, чтобы 304 не
+        оставил на ней устаревший значок."""
+        post = Post.objects.create(
+            title='Статья', subheader='Подзаголовок', text='Текст'
+        )
+        url = reverse('post_view', args=[post.pk])
+        etag = self.reader_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.send('FROM_AUTHOR')
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['unread_messages'], 1)
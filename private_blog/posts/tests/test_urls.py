@@ -58,6 +58,7 @@ class PostsURLTests(TestCase):
             (f'/{self.post.id}/comments/', 200),
             (f'/{self.post.id}/comments/add_comment/', 302),
             (f'/{self.post.id}/like/', 302),
+            (f'/{self.post.id}/like/toggle/', 302),
             ('/private-cabinet/', 302),
             ('/favourite/', 302),
             ('/my-comments/', 302),
@@ -278,7 +278,7 @@ class PostsViewsTests(TestCase):
         response1 = str(
             self.author_client.get(reverse('index')).content
         )
-        post.delete()
+        Post.objects.filter(id=post.id).update(title='Измененная статья')
         response2 = str(
             self.author_client.get(reverse('index')).content
         )
@@ -288,3 +288,205 @@ class PostsViewsTests(TestCase):
             self.author_client.get(reverse('index')).content
         )
         self.assertNotEqual(response1, response3)
+
+    def test_like_toggle_returns_json(self):
+        """AJAX-запрос к like_toggle переключает лайк и возвращает JSON."""
+        post = self.post[1]
+        url = reverse('like_toggle', args=[post.id])
+        response = self.authorized_client.post(
+            url,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {'post_id': post.id, 'liked': True, 'like_count': 1}
+        )
+        self.assertTrue(post.is_liked_by_user(self.user_one))
+        response = self.authorized_client.post(
+            url,
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(
+            response.json(),
+            {'post_id': post.id, 'liked': False, 'like_count': 0}
+        )
+        self.assertFalse(post.is_liked_by_user(self.user_one))
+
+    def test_like_toggle_returns_fragment(self):
+        """При format=html like_toggle возвращает фрагмент
+        likes_comments.html, а без AJAX - редирект на статью."""
+        post = self.post[2]
+        url = reverse('like_toggle', args=[post.id])
+        response = self.authorized_client.post(
+            f'{url}?format=html',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertTemplateUsed(response, 'likes_comments.html')
+        self.assertTemplateNotUsed(response, 'posts/post.html')
+        self.assertContains(response, 'data-like-icon="off" hidden')
+        response = self.authorized_client.post(url)
+        self.assertRedirects(response, reverse('post_view', args=[post.id]))
+        self.assertFalse(post.is_liked_by_user(self.user_one))
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_admin_changelists_search_and_filter(self):
+        """Списки комментариев, лайков и сообщений в админке ищут по
+        тексту и фильтруются по полю ввода без списка всех значений."""
+        changelists = [
+            ('admin:posts_comment_changelist',
+             {'q': 'от 2-го', 'author': self.user_two.username},
+             self.comment2.comment_text, self.comment.comment_text),
+            ('admin:posts_message_changelist',
+             {'q': 'ответ', 'interlocutor': self.user_one.username},
+             self.message_reply.message_text, self.message2.message_text),
+            ('admin:posts_favourite_changelist',
+             {'liker': self.user_two.username, 'post_id': 'abc'},
+             None, str(self.like3)),
+        ]
+        for name, params, expected, unexpected in changelists:
+            with self.subTest(name=name):
+                response = self.author_client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 200)
+                if expected:
+                    self.assertContains(response, expected)
+                self.assertNotContains(response, unexpected)
+
+    def test_post_etag_follows_also_list(self):
+        """ETag статьи меняется при изменении или скрытии статей
+        из блока 'Еще'."""
+        url = reverse('post_view', args=[self.post[0].id])
+        etag = self.authorized_client.get(url)['ETag']
+        also_post = Post.objects.get(pk=self.post[-2].pk)
+        also_post.title = 'Новый заголовок'
+        also_post.save()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый заголовок')
+        etag = response['ETag']
+        Post.all_objects.filter(pk=self.post[-3].pk).update(is_deleted=True)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_pages_answer_not_modified(self):
+        """Страницы статьи и комментариев отдают 304 по ETag, пока
+        не изменились статья, ее комментарии или лайк пользователя."""
+        post = self.post[-1]
+        for name in ('post_view', 'comments'):
+            with self.subTest(name=name):
+                url = reverse(name, args=[post.id])
+                response = self.authorized_client.get(url)
+                etag = response['ETag']
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(1):
+                    response = self.authorized_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+        url = reverse('post_view', args=[post.id])
+        etag = self.authorized_client.get(url)['ETag']
+        Favourite.objects.toggle(self.user_one, post)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        Comment.objects.create(
+            post=post,
+            author=self.user_two,
+            comment_text='Новый комментарий'
+        )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comments_etag_follows_csrf_secret(self):
+        """После выхода и повторного входа секрет CSRF другой, и
+        страница комментариев с формой отдается заново, а не 304 со
+        старым токеном."""
+        User.objects.create_user(username='Csrf', password='Pass-123-pass')
+        client = Client()
+        credentials = {'username': 'Csrf', 'password': 'Pass-123-pass'}
+        client.post(reverse('login'), credentials)
+        url = reverse('comments', args=[self.post[-1].id])
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        client.get(reverse('logout'))
+        client.post(reverse('login'), credentials)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_is_shared_shell_for_all_users(self):
+        """Главная страница одинакова для всех пользователей и
+        сбрасывается из кеша при изменении статей."""
+        cache.clear()
+        response = self.author_client.get(reverse('index'))
+        self.assertContains(response, 'data-auth="staff" hidden>')
+        self.assertContains(response, 'posts/viewer_state.js')
+        with self.assertNumQueries(0):
+            guest_response = self.guest_client.get(reverse('index'))
+        self.assertEqual(response.content, guest_response.content)
+        post = Post.objects.create(
+            title='Новая статья',
+            subheader='Подзаголовок новой статьи',
+            text='Текст новой статьи.',
+        )
+        response = self.guest_client.get(reverse('index'))
+        self.assertEqual(response.context.get('page')[0], post)
+        post.delete()
+
+    def test_viewer_state_returns_user_likes(self):
+        """viewer_state отдает состояние пользователя и его лайки."""
+        posts = f'{self.post[0].id},{self.post[1].id},{self.post[-1].id}'
+        response = self.authorized_client.get(
+            reverse('viewer_state'), {'posts': posts}
+        )
+        state = response.json()
+        self.assertTrue(state['authenticated'])
+        self.assertFalse(state['is_staff'])
+        self.assertEqual(
+            sorted(state['liked']),
+            sorted([self.post[0].id, self.post[-1].id])
+        )
+        response = self.guest_client.get(
+            reverse('viewer_state'), {'posts': posts}
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                'authenticated': False,
+                'is_staff': False,
+                'liked': [],
+                'likes': {
+                    str(self.post[0].id): 1,
+                    str(self.post[-1].id): 2,
+                },
+                'unread': 0,
+            }
+        )
+
+    def test_like_keeps_index_cache(self):
+        """Лайк не сбрасывает общий кеш главной: счетчики на ней
+        подставляет viewer_state. Ответы API со счетчиками обновляются."""
+        cache.clear()
+        self.guest_client.get(reverse('index'))
+        api_response = self.guest_client.get(reverse('api_post_list'))
+        self.authorized_client.post(
+            reverse('like_toggle', args=[self.post[1].id])
+        )
+        with self.assertNumQueries(0):
+            self.guest_client.get(reverse('index'))
+        response = self.guest_client.get(
+            reverse('api_post_list'),
+            HTTP_IF_NONE_MATCH=api_response['ETag'],
+        )
+        self.assertEqual(response.status_code, 200)
+        state = self.guest_client.get(
+            reverse('viewer_state'), {'posts': self.post[1].id}
+        ).json()
+        self.assertEqual(state['likes'], {str(self.post[1].id): 1})
@@ -0,0 +1,47 @@
+import logging
+
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Размеры миниатюр, которые используют шаблоны postcard.html, post.html
+# и post_management.html.
+POST_THUMBNAILS = {
+    '225x300': {'crop': 'center', 'upscale': True},
+    '300x300': {'crop': 'center', 'upscale': True},
+}
+
+
+def build_thumbnails(post):
+    """Функция создает (или находит) миниатюры всех размеров для
+    изображения статьи и возвращает словарь для Post.thumbnails:
+    geometry -> url, размеры и имя исходного файла."""
+    thumbnails = {}
+    for geometry, options in POST_THUMBNAILS.items():
+        thumbnail = get_thumbnail(post.image, geometry, **options)
+        thumbnails[geometry] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+            'source': post.image.name,
+        }
+    return thumbnails
+
+
+def get_post_thumbnail(post, geometry):
+    """Функция возвращает миниатюру статьи: сохраненную в
+    Post.thumbnails без обращения к kvstore, а если ее нет или она
+    сделана для прежнего изображения - через sorl-thumbnail."""
+    if not post.image:
+        return None
+    stored = (post.thumbnails or {}).get(geometry)
+    if stored and stored.get('source') == post.image.name:
+        return stored
+    try:
+        return get_thumbnail(
+            post.image, geometry, **POST_THUMBNAILS[geometry]
+        )
+    except Exception:
+        # Как и тег {% thumbnail %}: битое изображение не ломает страницу.
+        logger.exception('Не удалось получить миниатюру %s', post.image)
+        return None
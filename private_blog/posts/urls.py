@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -10,8 +10,14 @@ urlpatterns = [
     path('<int:post_id>/', views.post_view, name='post_view'),
     path('<int:post_id>/like/', views.like,
          name='like'),
+    path('<int:post_id>/like/toggle/', views.like_toggle,
+         name='like_toggle'),
     path('<int:post_id>/comments/', views.comments,
          name='comments'),
+    path('<int:post_id>/comments/feed/rss/', feeds.comments_rss,
+         name='comments_rss'),
+    path('<int:post_id>/comments/feed/atom/', feeds.comments_atom,
+         name='comments_atom'),
     path('<int:post_id>/comments/add_comment/', views.add_comment,
          name='add_comment'),
     path('my-comments/', views.my_comments,
@@ -24,6 +30,8 @@ urlpatterns = [
          name='add_message'),
     path('private-cabinet/', views.private_cabinet,
          name='private_cabinet'),
+    path('private-cabinet/export/', views.export_data,
+         name='export_data'),
     path('post-management/', views.post_management,
          name='post_management'),
     path('post-management/<int:post_id>/delete/', views.post_delete,
@@ -32,10 +40,24 @@ urlpatterns = [
          name='post_update'),
     path('message-reply/', views.message_reply,
          name='message_reply'),
+    path('message-reply/broadcast/', views.broadcast,
+         name='broadcast'),
     path('message-reply/<int:chosen_user_id>/', views.message_reply,
          name='message_reply_id'),
     path('message-reply/<int:chosen_user_id>/add_reply/', views.add_reply,
          name='add_reply'),
     path('about/', views.about,
          name='about'),
+    path('feed/rss/', feeds.posts_rss,
+         name='posts_rss'),
+    path('feed/atom/', feeds.posts_atom,
+         name='posts_atom'),
+    path('viewer-state/', views.viewer_state,
+         name='viewer_state'),
+    path('api/posts/', api.post_list,
+         name='api_post_list'),
+    path('api/posts/<int:post_id>/', api.post_detail,
+         name='api_post_detail'),
+    path('api/posts/<int:post_id>/comments/', api.comment_list,
+         name='api_comment_list'),
 ]
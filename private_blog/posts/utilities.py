@@ -1,10 +1,22 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Exists, Max, OuterRef, Subquery, Sum, Value
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 
-from .models import Post
+from .messaging import get_unread_count
+from .models import Comment, Favourite, Post
 
 User = get_user_model()
 
+ESTIMATED_COUNT_THRESHOLD = 10000
+
 
 def is_staff_check(user):
     return user.is_staff
@@ -19,3 +31,170 @@ def get_also_list(current_post_id=None):
     if not current_post_id:
         return Post.objects.all()[:3]
     return Post.objects.exclude(id=current_post_id)[:3]
+
+
+def changes_also_lists(posts):
+    """Функция одним запросом проверяет, видны ли статьи posts (в том
+    числе только что удаленные или скрытые) в блоке 'Еще'. Блок - это
+    три новые статьи, кроме текущей, поэтому его содержимое на всех
+    страницах зависит только от четырех новых статей."""
+    newest = list(Post.objects.values_list('pub_date', 'pk')[:4])
+    if len(newest) < 4:
+        return True
+    return any((post.pub_date, post.pk) >= newest[-1] for post in posts)
+
+
+def absolute_url(path):
+    """Функция превращает путь в абсолютный URL сайта (SITE_URL)."""
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def write_file_atomic(path, content):
+    """Функция атомарно записывает файл (str или bytes) через временный
+    файл в том же каталоге: nginx никогда не отдаст недописанный файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+        tmp.write(content)
+    os.chmod(tmp.name, 0o644)
+    os.replace(tmp.name, path)
+
+
+def get_post_validator(request, post_id):
+    """Функция одним запросом получает версию статьи, число комментариев
+    и лайков к ней, время последнего комментария, версию статей блока
+    'Еще' и лайк текущего пользователя.
+    Результат запоминается на объекте запроса, чтобы etag и
+    last_modified не делали повторных запросов."""
+    validators = request.__dict__.setdefault('_post_validators', {})
+    if post_id in validators:
+        return validators[post_id]
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    likes = Favourite.objects.filter(
+        favourite_post=OuterRef('pk')
+    ).order_by()
+    # Блок 'Еще': версия и состав трех новых статей (сумма id меняется,
+    # когда статья уходит из блока или попадает в него).
+    also_posts = Post.objects.filter(
+        pk__in=get_also_list(post_id).values('pk')
+    ).order_by().values(group=Value(1))
+    user = request.user
+    liked = Value(False)
+    if user.is_authenticated:
+        liked = Exists(likes.filter(liker=user.pk))
+    validators[post_id] = Post.objects.filter(pk=post_id).annotate(
+        comments_total=Subquery(
+            comments.values('post').annotate(total=Count('pk'))
+            .values('total')
+        ),
+        last_comment=Subquery(
+            comments.values('post').annotate(last=Max('created'))
+            .values('last')
+        ),
+        likes_total=Subquery(
+            likes.values('favourite_post').annotate(total=Count('pk'))
+            .values('total')
+        ),
+        also_updated=Subquery(also_posts.annotate(
+            last=Max('updated_at')
+        ).values('last')),
+        also_key=Subquery(also_posts.annotate(
+            key=Sum('pk')
+        ).values('key')),
+        liked=liked,
+    ).values(
+        'updated_at',
+        'comments_total',
+        'last_comment',
+        'likes_total',
+        'also_updated',
+        'also_key',
+        'liked',
+    ).first()
+    return validators[post_id]
+
+
+def get_posts_validator(request):
+    """Функция одним агрегирующим запросом получает время последнего
+    изменения статей и их количество (оно меняется при удалении)."""
+    if not hasattr(request, '_posts_validator'):
+        request._posts_validator = Post.objects.aggregate(
+            last_update=Max('updated_at'),
+            total=Count('pk'),
+        )
+    return request._posts_validator
+
+
+def post_etag(request, post_id):
+    """Функция возвращает ETag страницы статьи (и ее комментариев)
+    для текущего пользователя или None, если статьи нет. Страница
+    рендерится со значком непрочитанных сообщений, поэтому для
+    пользователя в ETag входит и их число (обычно из кеша)."""
+    validator = get_post_validator(request, post_id)
+    if validator is None:
+        return None
+    user = request.user
+    raw = ':'.join(str(item) for item in (
+        post_id,
+        validator['updated_at'].timestamp(),
+        validator['comments_total'] or 0,
+        validator['likes_total'] or 0,
+        validator['also_updated'],
+        validator['also_key'],
+        validator['liked'],
+        user.pk,
+        user.is_staff,
+        get_unread_count(user) if user.is_authenticated else 0,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def comments_etag(request, post_id):
+    """Функция возвращает ETag страницы комментариев. На странице форма
+    с csrf_token, а вход и выход меняют секрет CSRF, поэтому он тоже
+    входит в ETag: иначе 304 оставит в браузере форму со старым токеном
+    и отправка комментария получит 403."""
+    etag = post_etag(request, post_id)
+    if etag is None:
+        return None
+    secret = request.META.get('CSRF_COOKIE', '')
+    return hashlib.md5(f'{etag}:{secret}'.encode()).hexdigest()
+
+
+def post_last_modified(request, post_id):
+    """Функция возвращает время последнего изменения статьи,
+    комментариев к ней или статей блока 'Еще'."""
+    validator = get_post_validator(request, post_id)
+    if validator is None:
+        return None
+    return max(
+        moment for moment in (
+            validator['updated_at'],
+            validator['last_comment'],
+            validator['also_updated'],
+        ) if moment is not None
+    )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для больших таблиц: для нефильтрованного списка
+    в PostgreSQL берет оценку числа строк из статистики pg_class
+    вместо полного COUNT(*). Для небольших таблиц и отфильтрованных
+    списков считает точно."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[self.object_list.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples FROM pg_class WHERE relname = %s',
+                        [self.object_list.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                    return int(row[0])
+        return super().count
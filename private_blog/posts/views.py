@@ -3,28 +3,96 @@ from datetime import datetime
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.models import AnonymousUser
 from django.core.paginator import Paginator
+from django.db.models import Count, F
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-
-from .forms import CommentForm, MessageForm, PostForm
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition, require_POST
+
+from private_blog.db_router import replica_reads
+from tasks.models import Task
+
+from .caching import get_index_cache_key, get_index_stale_key, get_or_compute
+from .deletion import delete_post
+from .export import get_user_export_files, stream_zip
+from .forms import BroadcastForm, CommentForm, MessageForm, PostForm
+from .messaging import BROADCAST_AUDIENCES, get_unread_count, read_conversation
 from .models import Comment, Favourite, Message, Post
-from .utilities import get_also_list, is_staff_check
+from .tasks import (broadcast_message, generate_thumbnails,
+                    hide_and_delete_posts, refresh_after_like)
+from .utilities import (comments_etag, get_also_list, is_staff_check,
+                        post_etag, post_last_modified)
 
 User = get_user_model()
 
 
-@cache_page(5)
+@replica_reads
 def index(request):
     """Функция возвращает объект класса BaseManager (результат SQL-запроса)
-    со статьями из БД Posts и возвращает сгенерированную страницу."""
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGE_NO)
+    со статьями из БД Posts и возвращает сгенерированную страницу.
+    Страница рендерится как общая для всех (анонимная) оболочка и
+    кешируется надолго; лайки и меню текущего пользователя подставляются
+    в браузере из viewer_state."""
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/index.html', {'page': page})
-
 
+    def render_index():
+        post_list = Post.objects.all()
+        paginator = Paginator(post_list, settings.PAGE_NO)
+        page = paginator.get_page(page_number)
+        context = {
+            'page': page,
+            'user': AnonymousUser(),
+            'shared_shell': True,
+        }
+        return render_to_string('posts/index.html', context)
+
+    content = get_or_compute(
+        get_index_cache_key(page_number),
+        render_index,
+        settings.INDEX_CACHE_TIMEOUT,
+        stale_key=get_index_stale_key(page_number),
+    )
+    return HttpResponse(content)
+
+
+@never_cache
+def viewer_state(request):
+    """Функция возвращает JSON с состоянием текущего пользователя для
+    общей оболочки страницы: признаки авторизации, число непрочитанных
+    сообщений, а для статей из ?posts= - счетчики лайков и id статей,
+    которые он лайкнул. Поэтому лайки не сбрасывают кеш главной."""
+    user = request.user
+    state = {
+        'authenticated': user.is_authenticated,
+        'is_staff': user.is_staff,
+        'liked': [],
+        'likes': {},
+        'unread': get_unread_count(user) if user.is_authenticated else 0,
+    }
+    post_ids = [
+        int(post_id)
+        for post_id in request.GET.get('posts', '').split(',')[:100]
+        if post_id.isdigit()
+    ]
+    if post_ids:
+        state['likes'] = dict(Favourite.objects.filter(
+            favourite_post__in=post_ids,
+        ).order_by().values('favourite_post').annotate(
+            total=Count('pk')
+        ).values_list('favourite_post', 'total'))
+    if user.is_authenticated and post_ids:
+        state['liked'] = list(Favourite.objects.filter(
+            liker=user,
+            favourite_post__in=post_ids,
+        ).values_list('favourite_post', flat=True))
+    return JsonResponse(state)
+
+
+@replica_reads
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
 def post_view(request, post_id):
     """Функция отбирает нужную статью из базы и
      возвращает сгенерированную страницу."""
@@ -37,6 +105,8 @@ def post_view(request, post_id):
     return render(request, 'posts/post.html', context)
 
 
+@replica_reads
+@condition(etag_func=comments_etag, last_modified_func=post_last_modified)
 def comments(request, post_id):
     """Функция отбирает из базы комментарии к статье
      и возвращает сгенерированную страницу."""
@@ -62,6 +132,7 @@ def my_comments(request):
      и возвращает сгенерированную страницу."""
     comment_list = Comment.objects.filter(
         author=request.user,
+        post__is_deleted=False,
     ).order_by('-post', 'id')
     paginator = Paginator(comment_list, settings.PAGE_NO)
     page_number = request.GET.get('page')
@@ -92,20 +163,34 @@ def add_comment(request, post_id):
 def like(request, post_id):
     """Функция добавляет/удаляет в базе данных
     лайк от пользователя к конкретной статье"""
-    liker = request.user
     post = get_object_or_404(Post, id=post_id)
-    if Favourite.objects.filter(liker=liker, favourite_post=post).exists():
-        post_like = get_object_or_404(
-            Favourite,
-            liker=liker,
-            favourite_post=post,
-        )
-        post_like.delete()
-    else:
-        Favourite.objects.create(liker=liker, favourite_post=post)
+    Favourite.objects.toggle(request.user, post)
+    refresh_after_like(post.id)
     return redirect('post_view', post_id=post.id)
 
 
+@login_required
+@require_POST
+def like_toggle(request, post_id):
+    """Функция переключает лайк пользователя к статье без перезагрузки
+    страницы: возвращает JSON с новым состоянием лайка и количеством
+    лайков, а при ?format=html - обновленный фрагмент likes_comments.html.
+    Обычный (не AJAX) запрос перенаправляется на страницу статьи."""
+    post = get_object_or_404(Post, id=post_id)
+    liked = Favourite.objects.toggle(request.user, post)
+    refresh_after_like(post.id)
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return redirect('post_view', post_id=post.id)
+    if request.GET.get('format') == 'html':
+        return render(request, 'likes_comments.html', {'post': post})
+    return JsonResponse({
+        'post_id': post.id,
+        'liked': liked,
+        'like_count': post.like_count(),
+    })
+
+
+@replica_reads
 @login_required
 def favourite(request):
     """Функция отбирает в БД все статьи, которые лайкнул данный
@@ -127,6 +212,7 @@ def messages(request):
     """Функция отбирает из базы все сообщения из диалога пользователя
      с автором и возвращает сгенерированную страницу."""
     form = MessageForm(request.POST or None)
+    new_since = read_conversation(request.user.pk, by_author=False)
     message_list = Message.objects.filter(interlocutor=request.user)
     paginator = Paginator(message_list, settings.PAGE_NO)
     page_number = request.GET.get('page')
@@ -137,6 +223,7 @@ def messages(request):
         'form': form,
         'also_list': also_list,
         'other_side': 'FROM_AUTHOR',
+        'new_since': new_since,
     }
     return render(request, 'posts/messages.html', context)
 
@@ -165,6 +252,22 @@ def private_cabinet(request):
     return render(request, 'posts/private_cabinet.html', context)
 
 
+@login_required
+def export_data(request):
+    """Функция отдает ZIP со всеми данными пользователя: профилем,
+    комментариями, лайками и перепиской (JSON или CSV при
+    ?format=csv). Архив собирается и отдается потоком."""
+    file_format = 'csv' if request.GET.get('format') == 'csv' else 'json'
+    files = get_user_export_files(request.user, file_format)
+    response = StreamingHttpResponse(
+        stream_zip(files), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="private_blog_{request.user.username}.zip"'
+    )
+    return response
+
+
 @user_passes_test(is_staff_check)
 def post_management(request):
     """Функция отбирает все статьи из базы и
@@ -194,6 +297,8 @@ def new_post(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            generate_thumbnails.delay(post.id)
         return redirect('post_management')
     return render(request, 'posts/new.html', {'form': form})
 
@@ -212,6 +317,8 @@ def post_update(request, post_id):
         updated_post = form.save()
         updated_post.modify_date = datetime.now().date()
         updated_post.save()
+        if 'image' in form.changed_data and updated_post.image:
+            generate_thumbnails.delay(updated_post.id)
         return redirect('post_management')
     context = {
         'form': form,
@@ -225,7 +332,10 @@ def post_delete(request, post_id):
     """Функция обрабатывает запрос на удаление статьи из базы."""
     post = get_object_or_404(Post, id=post_id)
     if request.method == 'POST':
-        post.delete()
+        if settings.POST_DELETE_IN_BACKGROUND:
+            hide_and_delete_posts([post])
+        else:
+            delete_post(post.id)
         return redirect('post_management')
     return render(request, 'posts/post_delete.html', {'post': post, })
 
@@ -236,20 +346,18 @@ def message_reply(request, chosen_user_id=None):
     по выбранному пользователю отбирает сообщения и
     и возвращает сгенерированную страницу."""
     form = MessageForm(request.POST or None)
-    interlocutors = []
     message_list = []
+    new_since = None
     also_list = get_also_list()
-    messages = Message.objects.all()
-    if messages:
-        interlocutor_ids = messages.order_by().values(
-            'interlocutor'
-        ).distinct()
-        for item in interlocutor_ids:
-            interlocutor = User.objects.get(id=item['interlocutor'])
-            interlocutors.append(interlocutor)
-        if chosen_user_id:
-            chosen_user = get_object_or_404(User, id=chosen_user_id)
-            message_list = Message.objects.filter(interlocutor=chosen_user)
+    if chosen_user_id:
+        chosen_user = get_object_or_404(User, id=chosen_user_id)
+        new_since = read_conversation(chosen_user.pk, by_author=True)
+        message_list = Message.objects.filter(interlocutor=chosen_user)
+    # Диалоги берутся из сводок переписки одним запросом: получатели
+    # рассылок, которые сами автору не писали, в список не попадают.
+    interlocutors = list(User.objects.filter(
+        conversation__last_incoming_time__isnull=False,
+    ).annotate(unread=F('conversation__unread_by_author')).order_by('pk'))
     paginator = Paginator(message_list, settings.PAGE_NO)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
@@ -260,6 +368,7 @@ def message_reply(request, chosen_user_id=None):
         'interlocutors': interlocutors,
         'also_list': also_list,
         'other_side': 'TO_AUTHOR',
+        'new_since': new_since,
     }
     if chosen_user_id:
         context['chosen_user'] = chosen_user
@@ -280,6 +389,35 @@ def add_reply(request, chosen_user_id):
     return redirect('message_reply_id', chosen_user_id)
 
 
+@user_passes_test(is_staff_check)
+def broadcast(request):
+    """Функция ставит в очередь рассылку сообщения от автора всем или
+    выбранным пользователям и показывает прогресс последних рассылок."""
+    form = BroadcastForm(request.POST or None)
+    if form.is_valid():
+        broadcast_message.delay(
+            form.cleaned_data['message_text'], form.cleaned_data['audience']
+        )
+        return redirect('broadcast')
+    broadcasts = [
+        {
+            'task': task,
+            'message_text': task.args[0],
+            'audience': BROADCAST_AUDIENCES[task.args[1]][0],
+            'sent': task.progress.get('sent', 0),
+            'total': task.progress.get('total'),
+        }
+        for task in Task.objects.filter(
+            name=broadcast_message.task_name,
+        ).order_by('-pk')[:settings.PAGE_NO]
+    ]
+    context = {
+        'form': form,
+        'broadcasts': broadcasts,
+    }
+    return render(request, 'posts/broadcast.html', context)
+
+
 def page_not_found(request, exception=None):
     """Функция возвращает сгенерированную страницу для ошибки 404."""
     return render(
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+# Форматы, которые уже сжаты: повторное сжатие тратит CPU и не дает
+# выигрыша, а поток архива теряет Content-Length и докачку.
+COMPRESSED_CONTENT_TYPES = (
+    'application/zip',
+    'application/gzip',
+    'image/',
+    'video/',
+    'audio/',
+    'font/woff',
+)
+
+
+def compress_sequence_brotli(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжатие ответов в Django, чтобы оно работало и без nginx: Brotli,
+    если клиент его принимает и установлен пакет brotli, иначе gzip.
+    Уже сжатые ответы (Content-Encoding или сжатый формат вроде ZIP) и
+    короткие ответы не трогает.
+    Для динамических ответов уровень Brotli невысокий (BROTLI_QUALITY):
+    максимальное сжатие дороже по CPU, чем экономия трафика."""
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith(COMPRESSED_CONTENT_TYPES):
+            return response
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (brotli is None
+                or not re_accepts_brotli.search(accept_encoding)
+                or response.has_header('Content-Encoding')
+                or not response.streaming and len(response.content) < 200):
+            return super().process_response(request, response)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        quality = settings.BROTLI_QUALITY
+        if response.streaming:
+            response.streaming_content = compress_sequence_brotli(
+                response.streaming_content, quality
+            )
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
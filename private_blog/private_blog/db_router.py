@@ -0,0 +1,70 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+def replica_reads(view_func):
+    """Декоратор помечает view как только читающее: его запросы к БД
+    могут уйти на реплику, если пользователь не закреплен за мастером."""
+    view_func.replica_reads = True
+    return view_func
+
+
+class PrimaryReplicaRouter:
+    """Роутер БД: запись всегда идет в default, чтение в помеченных
+    replica_reads view - на одну из реплик из DATABASE_REPLICAS."""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """Включает чтение с реплик для view, помеченных replica_reads.
+    После записи в БД ставит cookie, которая на REPLICA_PIN_SECONDS
+    закрепляет пользователя за мастером, чтобы он сразу видел свои
+    изменения, даже если реплика отстает."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica_token = _use_replica.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE,
+                    '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            _use_replica.reset(use_replica_token)
+            _wrote.reset(wrote_token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(view_func, 'replica_reads', False)
+                and PIN_COOKIE not in request.COOKIES):
+            _use_replica.set(True)
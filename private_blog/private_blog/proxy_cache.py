@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+CACHEABLE_STATUSES = (200, 301, 404)
+
+
+class ProxyCacheMiddleware(MiddlewareMixin):
+    """Заголовки для кеша nginx (proxy_cache в infra_dev/nginx.conf).
+    GET-ответ анониму (без cookie сессии в запросе и без Set-Cookie в
+    ответе) общий для всех: nginx держит его PROXY_CACHE_TIMEOUT секунд
+    (X-Accel-Expires, клиенту nginx его не передает), браузеры и другие
+    кеши - до s-maxage. Ответы пользователям с сессией - private.
+    Ответы, для которых view сам задал Cache-Control (never_cache),
+    не трогаются. Стоит до SessionMiddleware, чтобы видеть ее cookie."""
+
+    def process_response(self, request, response):
+        if (request.method not in ('GET', 'HEAD')
+                or response.status_code not in CACHEABLE_STATUSES
+                or response.has_header('Cache-Control')):
+            return response
+        patch_vary_headers(response, ('Cookie',))
+        if (settings.SESSION_COOKIE_NAME in request.COOKIES
+                or response.cookies):
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        timeout = settings.PROXY_CACHE_TIMEOUT
+        patch_cache_control(response, public=True, max_age=0,
+                            s_maxage=timeout)
+        response['X-Accel-Expires'] = timeout
+        return response
@@ -14,6 +14,7 @@ ALLOWED_HOSTS = ['*']
 INSTALLED_APPS = [
     'users',
     'posts',
+    'tasks',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -25,10 +26,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'private_blog.compression.CompressionMiddleware',
+    'private_blog.proxy_cache.ProxyCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'private_blog.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -42,13 +46,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR, INCLUDES],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны проекта минифицируются один раз при компиляции.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'private_blog.template_loaders.MinifyingFilesystemLoader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'posts.context_processors.unread_messages',
             ],
         },
     },
@@ -61,6 +72,9 @@ if os.getenv('ACTIONS_TESTS'):
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR.joinpath('db.sqlite3'),
+            # Файловая тестовая БД нужна для многопоточных тестов:
+            # in-memory SQLite блокирует таблицы при параллельной записи.
+            'TEST': {'NAME': BASE_DIR.joinpath('test_db.sqlite3')},
         }
     }
 else:
@@ -78,6 +92,43 @@ else:
         }
     }
 
+# Новые входы запоминают кеширующий бэкенд. ModelBackend остается в списке,
+# чтобы сессии, созданные до его появления, продолжали действовать.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Реплики только для чтения. DB_REPLICA_HOSTS - список хостов PostgreSQL
+# через запятую; SQLITE_REPLICA - локальная реплика на втором файле
+# SQLite (см. manage.py simulate_replication). В тестах реплики
+# отражают default.
+DATABASE_REPLICAS = []
+if os.getenv('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.joinpath('db_replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['private_blog.db_router.PrimaryReplicaRouter']
+
+# Сколько секунд после записи пользователь читает только с мастера.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -110,10 +161,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR.joinpath('static')
+# Имена файлов статики содержат хеш содержимого, рядом лежат .gz/.br
+# (см. private_blog/storage.py). Тестам без collectstatic манифест
+# недоступен, поэтому для них остается обычное хранилище.
+if os.getenv('ACTIONS_TESTS'):
+    STATICFILES_STORAGE = (
+        'django.contrib.staticfiles.storage.StaticFilesStorage'
+    )
+else:
+    STATICFILES_STORAGE = (
+        'private_blog.storage.CompressedManifestStaticFilesStorage'
+    )
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR.joinpath('media')
 
+# Обработка загружаемых изображений статей (posts/images.py).
+IMAGE_UPLOAD_MAX_BYTES = 20 * 2 ** 20
+IMAGE_MAX_PIXELS = 50 * 10 ** 6
+IMAGE_MAX_EDGE = 1600
+IMAGE_JPEG_QUALITY = 85
+
 LOGIN_URL = reverse_lazy('login')
 LOGIN_REDIRECT_URL = reverse_lazy('index')
 
@@ -121,12 +189,120 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 PAGE_NO = 10
 
+# Общая (анонимная) оболочка главной страницы сбрасывается при изменении
+# статей, комментариев и лайков, поэтому может жить долго.
+INDEX_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Защита от одновременного пересчета кеша (posts.caching.get_or_compute):
+# пересчитывает один процесс, остальные отдают устаревшее значение.
+# Блокировка работает между процессами только при общем CACHE_BACKEND.
+CACHE_STAMPEDE_PROTECTION = True
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 5
+CACHE_STALE_TIMEOUT = 60 * 5
+CACHE_EARLY_BETA = 1.0
+
+# Удаление статей и пользователей (posts/deletion.py): связанные строки
+# удаляются пачками, статья сразу скрывается и удаляется фоновой задачей.
+DELETE_BATCH_SIZE = 1000
+POST_DELETE_IN_BACKGROUND = True
+
+# Рассылка от автора (posts/messaging.py): получателей в одной пачке.
+BROADCAST_BATCH_SIZE = 1000
+
+# Счетчики непрочитанных сообщений для значка в меню (posts/messaging.py)
+# кешируются и сбрасываются при новых сообщениях и прочтении диалога.
+UNREAD_CACHE_TIMEOUT = 60 * 60
+
+# Выгрузка данных (posts/export.py): строк на один запрос к БД.
+EXPORT_CHUNK_SIZE = 2000
+
+# Уровень Brotli для динамических ответов (CompressionMiddleware).
+BROTLI_QUALITY = 5
+
+# JSON API (posts/api.py): курсорная пагинация, кеш до изменения данных.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_TIMEOUT = INDEX_CACHE_TIMEOUT
+
+# Ленты RSS/Atom: ответ кешируется на версию содержимого.
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Карта сайта собирается фоновой задачей в статические файлы,
+# которые отдает nginx. SITE_URL нужен для абсолютных ссылок.
+SITE_URL = os.getenv('SITE_URL', default='http://127.0.0.1')
+SITEMAP_ROOT = Path(os.getenv(
+    'SITEMAP_ROOT', default=BASE_DIR.joinpath('sitemaps')
+))
+SITEMAP_CHUNK_SIZE = 1000
+SITEMAP_UPDATE_DELAY = 60 * 5
+
+# Статические копии публичных страниц для анонимов (их отдает nginx).
+PRERENDER_ROOT = Path(os.getenv(
+    'PRERENDER_ROOT', default=BASE_DIR.joinpath('prerendered')
+))
+PRERENDER_DELAY = 10
+
+# Микрокеш nginx для анонимов (private_blog/proxy_cache.py). После
+# изменений задача purge_proxy_cache обновляет страницы через внутренний
+# server nginx по адресу PROXY_CACHE_PURGE_URL (пусто - не обновлять).
+PROXY_CACHE_TIMEOUT = 10
+PROXY_CACHE_PURGE_URL = os.getenv('PROXY_CACHE_PURGE_URL', default='')
+PROXY_CACHE_PURGE_DELAY = 2
+PROXY_CACHE_PURGE_TIMEOUT = 5
+
+# Для нескольких процессов нужен общий кеш (Redis, Memcached), иначе сброс
+# кеша в одном процессе не увидят остальные: кеш сбрасывают воркеры
+# run_workers и команды вроде import_posts и delete_user, а не только web.
+# В docker-compose это Redis (сервис cache); с LocMemCache такие команды
+# при запуске выводят предупреждение tasks.W001.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
     }
 }
 
+if os.getenv('ACTIONS_TESTS'):
+    # Тесты идут в одном процессе, общий кеш им не нужен.
+    SILENCED_SYSTEM_CHECKS = ['tasks.W001']
+
+# Письма из обработчиков запросов только ставятся в очередь (одним INSERT),
+# а отправляет их через EMAIL_DELIVERY_BACKEND периодическая задача
+# users.tasks.deliver_queued_mail в воркерах run_workers (вручную - команда
+# send_queued_mail). Попытки и задержки считаются для каждого письма.
+EMAIL_BACKEND = 'users.mail.OutboxEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.getenv(
+    'EMAIL_DELIVERY_BACKEND',
+    default='django.core.mail.backends.smtp.EmailBackend'
+)
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60
+EMAIL_QUEUE_MAX_RETRY_DELAY = 60 * 60
+# Письма, захваченные упавшим воркером, возвращаются в очередь через:
+EMAIL_QUEUE_LOCK_TIMEOUT = 60 * 10
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_INTERVAL = 10
+
+# Фоновые задачи (приложение tasks, команда run_workers).
+TASK_WORKER_PROCESSES = int(os.getenv('TASK_WORKER_PROCESSES', default=2))
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 30
+TASK_LOCK_TIMEOUT = 60 * 10
+TASK_KEEP_FINISHED = 7
+TASK_SCHEDULE = {
+    'tasks.tasks.delete_finished_tasks': 60 * 60 * 24,
+    'users.tasks.deliver_queued_mail': EMAIL_QUEUE_INTERVAL,
+    # Правки обновляют только свои куски карты сайта; полная проверка
+    # подписей - страховка на случай массовых правок в обход сигналов.
+    'posts.tasks.build_sitemaps': 60 * 60 * 24,
+    'posts.tasks.publish_pages': 60 * 60 * 24,
+}
+
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
@@ -0,0 +1,44 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.json', '.xml')
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хешем содержимого в имени файла.
+    При collectstatic рядом с каждым хешированным текстовым файлом
+    записываются сжатые копии .gz и .br (если установлен brotli),
+    которые nginx отдает как есть через gzip_static/brotli_static."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        compressed = [('.gz', gzip.compress(content, compresslevel=9))]
+        if brotli is not None:
+            compressed.append(('.br', brotli.compress(content)))
+        for suffix, data in compressed:
+            if len(data) >= len(content):
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(data)
+            stat = os.stat(path)
+            os.utime(path + suffix, (stat.st_atime, stat.st_mtime))
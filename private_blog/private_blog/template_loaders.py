@@ -0,0 +1,39 @@
+import re
+
+from django.template.loaders import filesystem
+
+# Блоки, внутри которых пробелы значимы или могут быть синтаксисом (JS).
+PRESERVED_BLOCKS = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL,
+)
+# Перенос строки вместе с отступами вокруг него.
+INDENTED_NEWLINES = re.compile(r'[ \t]*\n\s*')
+
+
+def minify_html(source):
+    """Функция убирает из исходника шаблона отступы и переводы строк,
+    заменяя каждую такую последовательность одним пробелом: браузер все
+    равно схлопывает пробелы, поэтому вывод выглядит так же. Содержимое
+    pre, textarea, script и style не меняется."""
+    parts = PRESERVED_BLOCKS.split(source)
+    # split с двумя группами дает: текст, блок, имя тега, текст, ...
+    minified = []
+    for index in range(0, len(parts), 3):
+        minified.append(INDENTED_NEWLINES.sub(' ', parts[index]))
+        if index + 1 < len(parts):
+            minified.append(parts[index + 1])
+    return ''.join(minified).strip()
+
+
+class MinifyingFilesystemLoader(filesystem.Loader):
+    """Загрузчик шаблонов проекта (TEMPLATES_DIR), который минифицирует
+    HTML-шаблоны один раз при чтении исходника. Вместе с cached.Loader
+    это происходит при компиляции шаблона, а не на каждый ответ.
+    Шаблоны приложений (админка, письма) загружаются без изменений."""
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if origin.name.endswith('.html'):
+            return minify_html(contents)
+        return contents
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+from django.views.static import serve
 
 urlpatterns = [
     path('auth/', include('users.urls')),
@@ -18,6 +19,13 @@ if settings.DEBUG:
         settings.STATIC_URL,
         document_root=settings.STATIC_ROOT
     )
+    urlpatterns += [
+        re_path(
+            r'^(?P<path>sitemap[\w-]*\.xml)$',
+            serve,
+            {'document_root': settings.SITEMAP_ROOT},
+        ),
+    ]
 
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
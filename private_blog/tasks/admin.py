@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from posts.admin import LargeTableAdmin
+
+from .models import Task
+
+
+class TaskAdmin(LargeTableAdmin):
+    """Класс нужен для вывода на странице админа
+    детальной информации по фоновым задачам."""
+
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'progress',
+        'run_at',
+        'finished',
+    )
+    search_fields = ('name',)
+    list_filter = ('status',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Проверка общего кеша: воркеры run_workers и команды управления
+    сбрасывают кеш главной, счетчиков непрочитанных и пользователей в
+    своем процессе. С локальным кешем web этих сбросов не увидит и
+    будет отдавать устаревшие данные до истечения сроков."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        f'Кеш {backend} не общий для процессов: сбросы кеша из воркеров '
+        'и команд управления не дойдут до web.',
+        hint='Укажите CACHE_BACKEND и CACHE_LOCATION общего кеша '
+             '(Redis, Memcached) для web и воркеров.',
+        id='tasks.W001',
+    )]
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.queue import requeue_stale, schedule_periodic, work
+
+
+def run_worker(worker_id, batch_size, sleep):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    work(worker_id, batch_size=batch_size, sleep=sleep)
+
+
+class Command(BaseCommand):
+    help = ('Запускает пул процессов, выполняющих фоновые задачи из '
+            'таблицы Task, и планировщик периодических задач.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.TASK_WORKER_PROCESSES,
+            help='Количество процессов-воркеров.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1,
+            help='Сколько задач воркер захватывает за раз.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи в текущем процессе и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            schedule_periodic()
+            work(f'{os.getpid()}', options['batch_size'], once=True)
+            return
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        workers = {}
+        while not self.stopping:
+            schedule_periodic()
+            requeue_stale()
+            for number in range(options['processes']):
+                process = workers.get(number)
+                if process is None or not process.is_alive():
+                    workers[number] = self.start_worker(number, options)
+            time.sleep(options['sleep'])
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
+
+    def start_worker(self, number, options):
+        # Дочерние процессы не должны наследовать открытые соединения с БД.
+        connections.close_all()
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(
+                f'{os.getpid()}-{number}',
+                options['batch_size'],
+                options['sleep'],
+            ),
+            daemon=True,
+        )
+        process.start()
+        self.stdout.write(f'Запущен воркер {number} (pid {process.pid})')
+        return process
+
+    def stop(self, signum, frame):
+        self.stopping = True
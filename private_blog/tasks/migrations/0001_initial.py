@@ -0,0 +1,41 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Задача')),
+                ('args', models.JSONField(default=list, verbose_name='Аргументы')),
+                ('kwargs', models.JSONField(default=dict, verbose_name='Именованные аргументы')),
+                ('status', models.CharField(choices=[('PENDING', 'Ожидает выполнения'), ('RUNNING', 'Выполняется'), ('DONE', 'Выполнена'), ('FAILED', 'Не выполнена')], default='PENDING', max_length=7, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток выполнения')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Выполнить не раньше')),
+                ('unique_key', models.CharField(blank=True, max_length=250, null=True, unique=True, verbose_name='Ключ уникальности')),
+                ('locked_by', models.CharField(blank=True, max_length=64, verbose_name='Воркер')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Время захвата')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'ordering': ('run_at', 'pk'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'run_at'], name='task_due_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Класс создает БД SQL для очереди фоновых задач. Задачи
+    выполняет команда run_workers."""
+
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUSES = (
+        (PENDING, 'Ожидает выполнения'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(verbose_name='Задача', max_length=200)
+    args = models.JSONField(verbose_name='Аргументы', default=list)
+    kwargs = models.JSONField(
+        verbose_name='Именованные аргументы',
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=7,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток выполнения',
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=3,
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now,
+    )
+    unique_key = models.CharField(
+        verbose_name='Ключ уникальности',
+        max_length=250,
+        unique=True,
+        blank=True,
+        null=True,
+    )
+    locked_by = models.CharField(
+        verbose_name='Воркер',
+        max_length=64,
+        blank=True,
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Время захвата',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    progress = models.JSONField(
+        verbose_name='Прогресс выполнения',
+        default=dict,
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        ordering = ('run_at', 'pk')
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='task_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
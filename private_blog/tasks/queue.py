@@ -0,0 +1,194 @@
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+_registry = {}
+_current_task = ContextVar('current_task', default=None)
+
+
+def task(func=None, *, max_attempts=None):
+    """Декоратор регистрирует функцию как фоновую задачу и добавляет
+    ей методы delay(*args, **kwargs) и schedule(run_at, *args, **kwargs).
+    Аргументы задачи должны сериализоваться в JSON."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        _registry[name] = func
+        func.task_name = name
+        func.delay = lambda *args, **kwargs: enqueue(
+            name, args, kwargs, max_attempts=attempts
+        )
+        func.schedule = lambda run_at, *args, **kwargs: enqueue(
+            name, args, kwargs, run_at=run_at, max_attempts=attempts
+        )
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, unique_key=None,
+            max_attempts=None):
+    """Функция ставит задачу в очередь одним INSERT. Если передан
+    unique_key и такая задача уже есть, повторная не создается."""
+    new_task = Task(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at or timezone.now(),
+        unique_key=unique_key,
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+    )
+    if unique_key is None:
+        new_task.save()
+    else:
+        Task.objects.bulk_create([new_task], ignore_conflicts=True)
+    return new_task
+
+
+def _mark_claimed(candidates, claim_token, now, batch_size):
+    ids = list(candidates.values_list('pk', flat=True)[:batch_size])
+    return ids and candidates.model.objects.using(candidates.db).filter(
+        pk__in=ids,
+        status=Task.PENDING,
+    ).update(
+        status=Task.RUNNING,
+        locked_by=claim_token,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+
+
+def claim(worker_id, batch_size=1):
+    """Функция захватывает пачку готовых к выполнению задач. В PostgreSQL
+    кандидаты выбираются с FOR UPDATE SKIP LOCKED. В SQLite блокировок
+    строк нет, а чтение и запись в одной транзакции дают конкурирующим
+    воркерам 'database is locked', поэтому там захват идет в автокоммите.
+    В обоих случаях захват подтверждается условным UPDATE по статусу,
+    и одну задачу не возьмут два воркера."""
+    db = router.db_for_write(Task)
+    claim_token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    now = timezone.now()
+    candidates = Task.objects.using(db).filter(
+        status=Task.PENDING,
+        run_at__lte=now,
+    ).order_by('run_at', 'pk')
+    if connections[db].features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=db):
+            claimed = _mark_claimed(
+                candidates.select_for_update(skip_locked=True),
+                claim_token, now, batch_size,
+            )
+    else:
+        claimed = _mark_claimed(candidates, claim_token, now, batch_size)
+    if not claimed:
+        return []
+    return list(Task.objects.using(db).filter(
+        locked_by=claim_token,
+        status=Task.RUNNING,
+    ))
+
+
+def execute(claimed_task):
+    """Функция выполняет захваченную задачу и записывает результат:
+    при ошибке задача откладывается с экспоненциальной задержкой,
+    а после исчерпания попыток помечается как невыполненная."""
+    func = _registry.get(claimed_task.name)
+    token = _current_task.set(claimed_task)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {claimed_task.name} не найдена')
+        func(*claimed_task.args, **claimed_task.kwargs)
+    except Exception:
+        claimed_task.last_error = traceback.format_exc()
+        if claimed_task.attempts >= claimed_task.max_attempts:
+            claimed_task.status = Task.FAILED
+            claimed_task.finished = timezone.now()
+        else:
+            claimed_task.status = Task.PENDING
+            claimed_task.run_at = timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY
+                * 2 ** (claimed_task.attempts - 1)
+            )
+    else:
+        claimed_task.status = Task.DONE
+        claimed_task.finished = timezone.now()
+    finally:
+        _current_task.reset(token)
+    claimed_task.save(
+        update_fields=['status', 'run_at', 'last_error', 'finished']
+    )
+    return claimed_task.status
+
+
+def get_progress():
+    """Функция возвращает сохраненный прогресс выполняемой задачи: при
+    повторной попытке по нему можно продолжить с места сбоя. Вне
+    воркера возвращает пустой словарь."""
+    current = _current_task.get()
+    return dict(current.progress) if current is not None else {}
+
+
+def report_progress(**progress):
+    """Функция дописывает значения в прогресс выполняемой задачи одним
+    UPDATE (его видно в админке). Вызванная внутри транзакции задачи,
+    запись фиксируется вместе с ее результатом. Вне воркера ничего не
+    делает."""
+    current = _current_task.get()
+    if current is None:
+        return
+    current.progress = {**current.progress, **progress}
+    Task.objects.filter(pk=current.pk).update(progress=current.progress)
+
+
+def requeue_stale():
+    """Функция возвращает в очередь задачи, захваченные воркером,
+    который завис или упал дольше TASK_LOCK_TIMEOUT секунд назад.
+    Задачи, исчерпавшие попытки (например, каждый раз роняющие воркер),
+    помечаются как невыполненные."""
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED,
+        locked_by='',
+        finished=now,
+        last_error='Воркер не завершил задачу',
+    )
+    return failed + stale.update(status=Task.PENDING, locked_by='')
+
+
+def schedule_periodic(now=None):
+    """Функция ставит в очередь периодические задачи из TASK_SCHEDULE
+    (имя задачи -> интервал в секундах). Ключ уникальности включает
+    номер интервала, поэтому несколько планировщиков не создадут дублей."""
+    now = now or timezone.now()
+    for name, interval in settings.TASK_SCHEDULE.items():
+        slot = int(now.timestamp() // interval)
+        enqueue(name, unique_key=f'{name}@{slot}')
+
+
+def work(worker_id, batch_size=1, sleep=1.0, once=False):
+    """Цикл воркера: захватывает и выполняет задачи, а если очередь
+    пуста - ждет sleep секунд (или выходит при once=True)."""
+    while True:
+        claimed = claim(worker_id, batch_size)
+        for claimed_task in claimed:
+            execute(claimed_task)
+        if claimed:
+            continue
+        if once:
+            return
+        time.sleep(sleep)
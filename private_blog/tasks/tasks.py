@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import task
+
+
+@task
+def delete_finished_tasks():
+    """Задача удаляет завершенные задачи старше TASK_KEEP_FINISHED дней."""
+    deadline = timezone.now() - timedelta(days=settings.TASK_KEEP_FINISHED)
+    Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED),
+        finished__lt=deadline,
+    ).delete()
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from tasks.checks import shared_cache_check
+
+REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://cache:6379/1',
+    }
+}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    def test_local_cache_is_reported(self):
+        """С LocMemCache (по умолчанию) проверка предупреждает, что
+        сбросы кеша из воркеров не дойдут до web."""
+        self.assertEqual(
+            [warning.id for warning in shared_cache_check(None)],
+            ['tasks.W001'],
+        )
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_shared_cache_passes(self):
+        """Общий кеш проверку проходит."""
+        self.assertEqual(shared_cache_check(None), [])
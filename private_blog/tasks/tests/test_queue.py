@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import (claim, enqueue, get_progress, report_progress,
+                         requeue_stale, schedule_periodic, task)
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise RuntimeError('Ошибка в задаче')
+
+
+@task(max_attempts=2)
+def fails_halfway():
+    done = get_progress().get('done', 0)
+    calls.append(done)
+    report_progress(done=done + 1)
+    if done == 0:
+        raise RuntimeError('Сбой на середине')
+
+
+@override_settings(TASK_SCHEDULE={})
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_delayed_task_is_executed(self):
+        """Задача из delay выполняется воркером, отложенная - позже."""
+        remember.delay('сейчас')
+        remember.schedule(timezone.now() + timedelta(hours=1), 'потом')
+        call_command('run_workers', once=True)
+        self.assertEqual(calls, ['сейчас'])
+        self.assertEqual(
+            Task.objects.get(args=['сейчас']).status, Task.DONE
+        )
+        self.assertEqual(
+            Task.objects.get(args=['потом']).status, Task.PENDING
+        )
+
+    def test_failed_task_is_retried_then_failed(self):
+        """Упавшая задача откладывается, а после max_attempts
+        помечается как невыполненная."""
+        always_fails.delay()
+        call_command('run_workers', once=True)
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.run_at, timezone.now())
+        self.assertIn('Ошибка в задаче', failed.last_error)
+        Task.objects.update(run_at=timezone.now())
+        call_command('run_workers', once=True)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    def test_claimed_task_is_not_claimed_twice(self):
+        """Захваченную задачу не получит другой воркер, пока она
+        не зависнет дольше TASK_LOCK_TIMEOUT."""
+        remember.delay(1)
+        self.assertEqual(len(claim('first', 10)), 1)
+        self.assertEqual(claim('second', 10), [])
+        self.assertEqual(requeue_stale(), 0)
+        Task.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(len(claim('second', 10)), 1)
+
+    def test_stale_task_without_attempts_fails(self):
+        """Задача, уронившая воркер на последней попытке, не
+        возвращается в очередь, а помечается как невыполненная."""
+        always_fails.delay()
+        claim('first', 10)
+        Task.objects.update(
+            attempts=2, locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(requeue_stale(), 1)
+        stale = Task.objects.get()
+        self.assertEqual(stale.status, Task.FAILED)
+        self.assertIsNotNone(stale.finished)
+        self.assertEqual(claim('second', 10), [])
+
+    @override_settings(TASK_SCHEDULE={remember.task_name: 60})
+    def test_periodic_task_is_enqueued_once_per_interval(self):
+        """Периодическая задача ставится в очередь один раз за интервал."""
+        now = timezone.now()
+        schedule_periodic(now)
+        schedule_periodic(now)
+        self.assertEqual(Task.objects.count(), 1)
+        schedule_periodic(now + timedelta(seconds=60))
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_unknown_task_fails(self):
+        """Задача без зарегистрированной функции не выполняется."""
+        enqueue('tasks.tests.missing', max_attempts=1)
+        call_command('run_workers', once=True)
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_progress_is_saved_and_survives_retry(self):
+        """Прогресс задачи сохраняется в БД, и повторная попытка
+        продолжает с сохраненного места."""
+        fails_halfway.delay()
+        call_command('run_workers', once=True)
+        saved = Task.objects.get(name=fails_halfway.task_name)
+        self.assertEqual(saved.progress, {'done': 1})
+        saved.run_at = timezone.now()
+        saved.save()
+        call_command('run_workers', once=True)
+        self.assertEqual(calls, [0, 1])
+        saved.refresh_from_db()
+        self.assertEqual(saved.status, Task.DONE)
+        self.assertEqual(saved.progress, {'done': 2})
+        self.assertEqual(get_progress(), {})
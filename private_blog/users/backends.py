@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+User = get_user_model()
+
+# Версия формата закешированных пользователей: при изменении модели
+# пользователя достаточно увеличить ее, чтобы старые записи игнорировались.
+USER_CACHE_VERSION = 1
+USER_CACHE_TIMEOUT = 60 * 60
+
+
+def get_user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Функция удаляет пользователя из кеша."""
+    cache.delete(get_user_cache_key(user_id), version=USER_CACHE_VERSION)
+
+
+class CachedModelBackend(ModelBackend):
+    """Бэкенд аутентификации, который берет пользователя по id из кеша:
+    AuthenticationMiddleware не обращается к auth_user на каждом запросе.
+    Кеш сбрасывается при любом сохранении пользователя (users.signals)."""
+
+    def get_user(self, user_id):
+        key = get_user_cache_key(user_id)
+        user = cache.get(key, version=USER_CACHE_VERSION)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(
+                key, user, USER_CACHE_TIMEOUT, version=USER_CACHE_VERSION
+            )
+        return user if self.user_can_authenticate(user) else None
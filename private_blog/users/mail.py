@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который не ходит на SMTP-сервер, а одним
+    INSERT кладет письма в очередь QueuedEmail. Вложения не
+    поддерживаются: в блоге они не используются."""
+
+    def send_messages(self, email_messages):
+        queued = [
+            QueuedEmail.from_message(message)
+            for message in email_messages
+            if message.recipients()
+        ]
+        if not queued:
+            return 0
+        try:
+            QueuedEmail.objects.bulk_create(queued)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(queued)
+
+
+def _mark_sending(candidates, now, batch_size):
+    ids = list(candidates.values_list('pk', flat=True)[:batch_size])
+    if ids:
+        QueuedEmail.objects.filter(
+            pk__in=ids,
+            status=QueuedEmail.PENDING,
+        ).update(
+            status=QueuedEmail.SENDING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return ids
+
+
+def claim_emails(batch_size):
+    """Функция захватывает пачку писем: помечает их SENDING со временем
+    захвата и считает попытку. В PostgreSQL кандидаты выбираются с
+    FOR UPDATE SKIP LOCKED в короткой транзакции, в SQLite - в
+    автокоммите (как tasks.queue.claim). Условный UPDATE по статусу не
+    дает двум воркерам взять одно письмо. Сама отправка идет уже вне
+    транзакции и не держит блокировки строк."""
+    now = timezone.now()
+    candidates = QueuedEmail.objects.filter(
+        status=QueuedEmail.PENDING,
+        next_attempt__lte=now,
+    ).order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = _mark_sending(
+                candidates.select_for_update(skip_locked=True),
+                now, batch_size,
+            )
+    else:
+        ids = _mark_sending(candidates, now, batch_size)
+    if not ids:
+        return []
+    return list(QueuedEmail.objects.filter(
+        pk__in=ids,
+        status=QueuedEmail.SENDING,
+        locked_at=now,
+    ))
+
+
+def record_failure(email, error):
+    """Функция откладывает письмо с экспоненциальной задержкой, а после
+    EMAIL_QUEUE_MAX_ATTEMPTS попыток помечает его неотправленным."""
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = QueuedEmail.FAILED
+        return
+    delay = min(
+        settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (email.attempts - 1),
+        settings.EMAIL_QUEUE_MAX_RETRY_DELAY,
+    )
+    email.status = QueuedEmail.PENDING
+    email.next_attempt = timezone.now() + timedelta(seconds=delay)
+
+
+def send_one(smtp_connection, email):
+    try:
+        smtp_connection.send_messages([email.to_message(smtp_connection)])
+    except Exception as error:
+        record_failure(email, error)
+    else:
+        email.status = QueuedEmail.SENT
+        email.last_error = ''
+
+
+def send_batch(batch_size):
+    """Функция отправляет пачку писем через одно соединение с почтовым
+    сервером и записывает результаты одним bulk_update. Если соединение
+    не открылось, попытка засчитывается всем неотправленным письмам
+    пачки. Возвращает количество обработанных писем."""
+    batch = claim_emails(batch_size)
+    if not batch:
+        return 0
+    try:
+        with get_connection(settings.EMAIL_DELIVERY_BACKEND) as smtp:
+            for email in batch:
+                send_one(smtp, email)
+    except Exception as error:
+        for email in batch:
+            if email.status == QueuedEmail.SENDING:
+                record_failure(email, error)
+    for email in batch:
+        email.locked_at = None
+    QueuedEmail.objects.bulk_update(
+        batch, ['status', 'next_attempt', 'last_error', 'locked_at']
+    )
+    return len(batch)
+
+
+def requeue_stale_emails():
+    """Функция возвращает в очередь письма, захваченные воркером, который
+    упал дольше EMAIL_QUEUE_LOCK_TIMEOUT секунд назад; письма без
+    оставшихся попыток помечаются неотправленными."""
+    stale = QueuedEmail.objects.filter(
+        status=QueuedEmail.SENDING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.EMAIL_QUEUE_LOCK_TIMEOUT
+        ),
+    )
+    failed = stale.filter(
+        attempts__gte=settings.EMAIL_QUEUE_MAX_ATTEMPTS,
+    ).update(
+        status=QueuedEmail.FAILED,
+        locked_at=None,
+        last_error='Воркер не завершил отправку',
+    )
+    return failed + stale.update(status=QueuedEmail.PENDING, locked_at=None)
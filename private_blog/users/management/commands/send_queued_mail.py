@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.mail import requeue_stale_emails, send_batch
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди QueuedEmail пачками через одно '
+            'SMTP-соединение на пачку, с повторными попытками и '
+            'экспоненциальной задержкой между ними. Обычно это делает '
+            'задача deliver_queued_mail в воркерах run_workers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь один раз и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                requeue_stale_emails()
+                processed = send_batch(options['batch_size'])
+            except Exception as error:
+                if options['once']:
+                    raise CommandError(error)
+                self.stderr.write(f'Ошибка отправки почты: {error}')
+                processed = 0
+            if processed:
+                continue
+            if options['once']:
+                return
+            time.sleep(options['sleep'])
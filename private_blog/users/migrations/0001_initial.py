@@ -0,0 +1,42 @@
+# Generated by Django 4.1.1 on 2026-10-19 16:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_email', models.CharField(blank=True, max_length=254, verbose_name='Отправитель')),
+                ('to', models.JSONField(default=list, verbose_name='Получатели')),
+                ('cc', models.JSONField(default=list, verbose_name='Копия')),
+                ('bcc', models.JSONField(default=list, verbose_name='Скрытая копия')),
+                ('reply_to', models.JSONField(default=list, verbose_name='Ответить')),
+                ('headers', models.JSONField(default=dict, verbose_name='Заголовки')),
+                ('subject', models.CharField(max_length=998, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Текст письма')),
+                ('alternatives', models.JSONField(default=list, verbose_name='Альтернативные версии письма')),
+                ('status', models.CharField(choices=[('PENDING', 'Ожидает отправки'), ('SENT', 'Отправлено'), ('FAILED', 'Не отправлено')], default='PENDING', max_length=7, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время следующей попытки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='queuedemail',
+            index=models.Index(fields=['status', 'next_attempt'], name='queued_email_due_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.1 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedemail',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Время захвата'),
+        ),
+        migrations.AlterField(
+            model_name='queuedemail',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Ожидает отправки'), ('SENDING', 'Отправляется'), ('SENT', 'Отправлено'), ('FAILED', 'Не отправлено')], default='PENDING', max_length=7, verbose_name='Статус'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    """Класс создает БД SQL для очереди исходящих писем. Письма
+    отправляет команда send_queued_mail, а не обработчик запроса."""
+
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=254,
+        blank=True,
+    )
+    to = models.JSONField(verbose_name='Получатели', default=list)
+    cc = models.JSONField(verbose_name='Копия', default=list)
+    bcc = models.JSONField(verbose_name='Скрытая копия', default=list)
+    reply_to = models.JSONField(verbose_name='Ответить', default=list)
+    headers = models.JSONField(verbose_name='Заголовки', default=dict)
+    subject = models.CharField(verbose_name='Тема', max_length=998)
+    body = models.TextField(verbose_name='Текст письма')
+    alternatives = models.JSONField(
+        verbose_name='Альтернативные версии письма',
+        default=list,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=7,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0,
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Время следующей попытки',
+        default=timezone.now,
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Время захвата',
+        blank=True,
+        null=True,
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Дата постановки в очередь',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        ordering = ('pk',)
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='queued_email_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.subject[:30]
+
+    @classmethod
+    def from_message(cls, message):
+        """Метод создает (не сохраняя) запись очереди из EmailMessage."""
+        return cls(
+            from_email=message.from_email or '',
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            headers=dict(message.extra_headers),
+            subject=message.subject,
+            body=message.body,
+            alternatives=[
+                list(alternative)
+                for alternative in getattr(message, 'alternatives', [])
+            ],
+        )
+
+    def to_message(self, connection=None):
+        """Метод собирает из записи очереди письмо для отправки."""
+        return EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+            headers=self.headers,
+            alternatives=[tuple(item) for item in self.alternatives],
+            connection=connection,
+        )
@@ -0,0 +1,16 @@
+from django.conf import settings
+
+from tasks.queue import task
+
+from .mail import requeue_stale_emails, send_batch
+
+
+@task
+def deliver_queued_mail():
+    """Задача отправляет письма из очереди QueuedEmail пачками, пока
+    готовые к отправке не закончатся. Ее раз в EMAIL_QUEUE_INTERVAL
+    секунд ставит планировщик run_workers (TASK_SCHEDULE), поэтому
+    отдельный процесс для почты не нужен."""
+    requeue_stale_emails()
+    while send_batch(settings.EMAIL_QUEUE_BATCH_SIZE):
+        continue
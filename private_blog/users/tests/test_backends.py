@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import User
+
+
+class CachedAuthTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='UserOne',
+            password='Old-pass-123',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_warm_cache_needs_no_auth_queries(self):
+        """На прогретом кеше сессия и пользователь не читаются из БД."""
+        self.client.get(reverse('viewer_state'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('viewer_state'))
+        self.assertTrue(response.json()['authenticated'])
+
+    def test_sessions_of_model_backend_stay_valid(self):
+        """Сессии, созданные со стандартным ModelBackend, не
+        разлогиниваются после включения кеширующего бэкенда."""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(reverse('viewer_state'))
+        self.assertTrue(response.json()['authenticated'])
+
+    def test_user_update_invalidates_cache(self):
+        """Изменение данных пользователя сбрасывает его кеш."""
+        self.client.get(reverse('viewer_state'))
+        self.client.post(
+            reverse('user_update'),
+            {'first_name': 'Новое', 'last_name': 'Имя', 'email': 'a@a.ru'}
+        )
+        response = self.client.get(reverse('private_cabinet'))
+        self.assertEqual(response.context['user'].first_name, 'Новое')
+
+    def test_staff_flag_change_invalidates_cache(self):
+        """Изменение прав пользователя видно на следующем запросе."""
+        self.client.get(reverse('viewer_state'))
+        user = User.objects.get(pk=self.user.pk)
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse('viewer_state'))
+        self.assertTrue(response.json()['is_staff'])
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля другие сессии перестают действовать,
+        несмотря на закешированного пользователя."""
+        other_client = Client()
+        other_client.force_login(self.user)
+        other_client.get(reverse('viewer_state'))
+        self.client.post(reverse('password_change'), {
+            'old_password': 'Old-pass-123',
+            'new_password1': 'New-pass-456',
+            'new_password2': 'New-pass-456',
+        })
+        response = self.client.get(reverse('viewer_state'))
+        self.assertTrue(response.json()['authenticated'])
+        response = other_client.get(reverse('viewer_state'))
+        self.assertFalse(response.json()['authenticated'])
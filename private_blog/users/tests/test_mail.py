@@ -0,0 +1,132 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+from users.mail import requeue_stale_emails
+from users.models import QueuedEmail
+from users.tasks import deliver_queued_mail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('Нет соединения')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('Соединение не открыто')
+
+
+@override_settings(
+    EMAIL_BACKEND='users.mail.OutboxEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class QueuedEmailTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='UserOne',
+            email='user_one@test.test',
+            password='Pass-123-pass',
+        )
+
+    def test_password_reset_only_queues_email(self):
+        """Сброс пароля кладет письмо в очередь, а воркер его отправляет."""
+        with self.assertNumQueries(2):
+            self.client.post(
+                reverse('password_reset'), {'email': self.user.email}
+            )
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.to, [self.user.email])
+        call_command('send_queued_mail', once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedEmail.SENT)
+        self.assertEqual(queued.attempts, 1)
+
+    @override_settings(
+        TASK_SCHEDULE={deliver_queued_mail.task_name: 10},
+        EMAIL_QUEUE_BATCH_SIZE=1,
+    )
+    def test_workers_deliver_queue_periodically(self):
+        """Очередь писем разбирает периодическая задача обычных
+        воркеров, пачками, пока не закончатся готовые письма."""
+        for number in range(3):
+            mail.send_mail('Тема', 'Текст', None, [f'{number}@test.test'])
+        self.assertEqual(len(mail.outbox), 0)
+        call_command('run_workers', once=True)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(
+            QueuedEmail.objects.exclude(status=QueuedEmail.SENT).exists()
+        )
+
+    @override_settings(
+        EMAIL_DELIVERY_BACKEND='users.tests.test_mail.FailingBackend',
+        EMAIL_QUEUE_MAX_ATTEMPTS=2,
+    )
+    def test_failed_email_is_retried_with_backoff(self):
+        """Неотправленное письмо откладывается, а после исчерпания
+        попыток помечается как неотправленное."""
+        mail.send_mail('Тема', 'Текст', 'blog@test.test', ['a@test.test'])
+        call_command('send_queued_mail', once=True)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.status, QueuedEmail.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.next_attempt, timezone.now())
+        self.assertIn('Сервер недоступен', queued.last_error)
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        call_command('send_queued_mail', once=True)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedEmail.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    @override_settings(
+        EMAIL_DELIVERY_BACKEND='users.tests.test_mail.UnreachableBackend',
+    )
+    def test_connection_failure_counts_for_whole_batch(self):
+        """Если почтовый сервер недоступен, попытка засчитывается всем
+        письмам пачки, и они откладываются, а не берутся снова."""
+        for number in range(2):
+            mail.send_mail(
+                f'Тема {number}', 'Текст', 'blog@test.test', ['a@test.test']
+            )
+        call_command('send_queued_mail', once=True)
+        for queued in QueuedEmail.objects.all():
+            self.assertEqual(queued.status, QueuedEmail.PENDING)
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreater(queued.next_attempt, timezone.now())
+            self.assertIn('Нет соединения', queued.last_error)
+            self.assertIsNone(queued.locked_at)
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_stale_sending_emails_are_requeued(self):
+        """Письма упавшего воркера возвращаются в очередь, а без
+        оставшихся попыток помечаются неотправленными."""
+        stale = timezone.now() - timedelta(days=1)
+        for attempts in (1, 2):
+            mail.send_mail('Тема', 'Текст', 'blog@test.test', ['a@test.test'])
+            QueuedEmail.objects.filter(attempts=0).update(
+                status=QueuedEmail.SENDING, locked_at=stale,
+                attempts=attempts,
+            )
+        self.assertEqual(requeue_stale_emails(), 2)
+        self.assertEqual(
+            QueuedEmail.objects.get(attempts=1).status, QueuedEmail.PENDING
+        )
+        self.assertEqual(
+            QueuedEmail.objects.get(attempts=2).status, QueuedEmail.FAILED
+        )